@@ -10,14 +10,30 @@ bl_info = {
     "tracker_url": ""
 }
 
-import bpy  
-from . import ui
-from . import projector
-from . import operators
+try:
+    import bpy
+except ImportError:
+    # Imported outside of Blender, e.g. to use the optics module on its own.
+    bpy = None
+
+if bpy is not None:
+    from . import registry
+    from . import scheduler
+    from . import handles
+    from . import images
+    from . import ui
+    from . import projector
+    from . import operators
+    from . import api
 
 def register():
+    registry.register()
+    scheduler.register()
+    handles.register()
+    images.register()
     projector.register()
     operators.register()
+    api.register()
     ui.register()
     
     # 렌즈 관리 등록
@@ -57,7 +73,32 @@ def register():
     except Exception as e:
         print(f"Error registering corner_pin: {str(e)}")
 
+    # Analysis needs NumPy, which comes with Blender.
+    try:
+        from . import analysis
+        analysis.register()
+    except Exception as e:
+        print(f"Error registering analysis: {str(e)}")
+
+    try:
+        from . import warp
+        warp.register()
+    except Exception as e:
+        print(f"Error registering warp: {str(e)}")
+
 def unregister():
+    try:
+        from . import warp
+        warp.unregister()
+    except Exception as e:
+        print(f"Error unregistering warp: {str(e)}")
+
+    try:
+        from . import analysis
+        analysis.unregister()
+    except Exception as e:
+        print(f"Error unregistering analysis: {str(e)}")
+
     # 코너 핀 모듈 등록 해제 추가
     try:
         from . import corner_pin
@@ -72,5 +113,10 @@ def unregister():
         print(f"Error unregistering lens_management: {str(e)}")
         
     ui.unregister()
+    api.unregister()
     operators.unregister()
-    projector.unregister()
\ No newline at end of file
+    projector.unregister()
+    images.unregister()
+    handles.unregister()
+    scheduler.unregister()
+    registry.unregister()
\ No newline at end of file
@@ -0,0 +1,30 @@
+"""
+Analysis of projector setups against scene geometry.
+
+The kernels (coverage, ...) only need NumPy and can be used without Blender; the
+operators and panels are loaded when bpy is available.
+"""
+try:
+    import bpy
+except ImportError:
+    bpy = None
+
+if bpy is not None:
+    from . import properties
+    from . import operators
+    from . import masks
+    from . import panel
+
+
+def register():
+    properties.register()
+    operators.register()
+    masks.register()
+    panel.register()
+
+
+def unregister():
+    panel.unregister()
+    masks.unregister()
+    operators.unregister()
+    properties.unregister()
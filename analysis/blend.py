@@ -0,0 +1,174 @@
+"""
+Edge blend and black level masks for overlapping projectors.
+
+Pure NumPy, no bpy. Every projector gets a weight that ramps from 0 at the edge of its
+image to 1 at blend_width inside it. Where projectors overlap on the target surface, each
+one contributes its weight divided by the sum of the weights of all projectors reaching
+that point, so the light adds up to the light of a single projector.
+
+The ramps are evaluated per pixel at the full resolution of a projector. Where the other
+projectors hit the surface is only known at the surface samples: their image coordinates
+are binned into a grid over the image, holes are filled from neighbouring cells and the
+grid is interpolated to the full resolution.
+
+Projectors don't emit true black. Outside of the overlaps the black level is lower than
+inside, the black level mask lifts those regions up to the brightest black.
+
+Both masks are returned gamma encoded (value ** (1 / gamma)), the way they would be fed
+to a real projector. 8 bit images keep more precision in the dark part of the ramp that
+way; the blend node group decodes them again.
+"""
+import numpy as np
+
+from . import coverage
+
+
+def ramp(distance, blend_width):
+    """ Smooth ramp from 0 at distance 0 to 1 at blend_width. """
+    if blend_width <= 0:
+        return (np.asarray(distance) > 0).astype(np.float64)
+    t = np.clip(np.asarray(distance) / blend_width, 0, 1)
+    return t * t * (3 - 2 * t)
+
+
+def edge_weights(u, v, width, height, blend_width):
+    """
+    Weight of image coordinates u, v (see coverage.project()). The distance to the nearest
+    image edge is measured in units of the image width, so the ramp is equally wide on all
+    sides.
+    """
+    distance_x = np.minimum(u, 1 - u)
+    distance_y = np.minimum(v, 1 - v) * height / width
+    return ramp(np.minimum(distance_x, distance_y), blend_width)
+
+
+def image_edge_weights(width, height, blend_width):
+    """ edge_weights() for the center of every pixel. Returns an (height, width) array. """
+    u = (np.arange(width) + 0.5) / width
+    v = (np.arange(height) + 0.5) / height
+    # The ramp is monotonic, so the ramp of the smaller distance is the smaller ramp.
+    weights_x = ramp(np.minimum(u, 1 - u), blend_width)
+    weights_y = ramp(np.minimum(v, 1 - v) * height / width, blend_width)
+    return np.minimum.outer(weights_y, weights_x)
+
+
+def _fill_holes(values, known):
+    """ Grow the known cells of a grid into the unknown ones by averaging the known neighbours. """
+    values = np.where(known, values, 0.0)
+    known = known.copy()
+    h, w = values.shape
+    for _ in range(h + w):
+        if known.all():
+            break
+        padded_values = np.pad(values, 1)
+        padded_known = np.pad(known, 1).astype(np.float64)
+        total = np.zeros_like(values)
+        count = np.zeros_like(values)
+        for dy, dx in ((0, 1), (2, 1), (1, 0), (1, 2)):
+            total += padded_values[dy:dy + h, dx:dx + w]
+            count += padded_known[dy:dy + h, dx:dx + w]
+        grown = ~known & (count > 0)
+        if not grown.any():
+            break
+        values[grown] = total[grown] / count[grown]
+        known |= grown
+    return values
+
+
+def bin_samples(u, v, values, grid_w, grid_h):
+    """
+    Average sample values per grid cell. Cells without a sample take the values of their
+    neighbours. Returns an (grid_h, grid_w) array.
+    """
+    rows, columns = coverage.grid_cells(u, v, grid_w, grid_h)
+    cells = rows * grid_w + columns
+    total = np.bincount(cells, weights=values, minlength=grid_w * grid_h)
+    count = np.bincount(cells, minlength=grid_w * grid_h)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = total / count
+    return _fill_holes(mean.reshape(grid_h, grid_w), (count > 0).reshape(grid_h, grid_w))
+
+
+def _interpolation(pixels, size, grid_size):
+    """ Lower and upper grid index and weight of the upper one for the centers of pixels. """
+    position = np.clip((pixels + 0.5) * grid_size / size - 0.5, 0, grid_size - 1)
+    low = np.floor(position).astype(np.int64)
+    high = np.minimum(low + 1, grid_size - 1)
+    return low, high, (position - low).astype(np.float32)
+
+
+def upsample(grid, width, height, window=None):
+    """
+    Bilinear interpolation of a grid to (height, width) float32 pixels, one axis at a time.
+    window = (rows, columns) as two slices only interpolates those pixels.
+    """
+    rows, columns = window or (slice(0, height), slice(0, width))
+    grid = grid.astype(np.float32)
+    low, high, t = _interpolation(np.arange(rows.start, rows.stop), height, grid.shape[0])
+    result = grid[low] * (1 - t)[:, np.newaxis] + grid[high] * t[:, np.newaxis]
+    low, high, t = _interpolation(np.arange(columns.start, columns.stop), width, grid.shape[1])
+    return result[:, low] * (1 - t) + result[:, high] * t
+
+
+def _window(reach, width, height):
+    """ Pixels covered by the grid cells with reach > 0 and their neighbours, as (rows, columns) slices. """
+    grid_h, grid_w = reach.shape
+    rows = np.flatnonzero(reach.any(axis=1))
+    columns = np.flatnonzero(reach.any(axis=0))
+    return (slice(max(rows[0] - 1, 0) * height // grid_h, -(-min(rows[-1] + 2, grid_h) * height // grid_h)),
+            slice(max(columns[0] - 1, 0) * width // grid_w, -(-min(columns[-1] + 2, grid_w) * width // grid_w)))
+
+
+def masks(specs, points, normals, blend_width=0.2, black_level=0.0, gamma=2.2, subsample=8, occlusion=True):
+    """
+    Compute the masks of all projectors for a target surface given by samples.
+    blend_width is the widest ramp in units of the image width, black_level the black of a
+    projector as a fraction of its white. Yields (blend, black) per projector in the order
+    of specs, both (height, width) float32 arrays with rows from bottom to top like the
+    pixels of a Blender image.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    normals = np.asarray(normals, dtype=np.float64).reshape(-1, 3)
+    hits = [coverage.hits(spec, points, normals, subsample, occlusion) for spec in specs]
+    overlap = np.sum([hit.visible for hit in hits], axis=0) if hits else np.zeros(len(points))
+    most_overlap = max(int(overlap.max(initial=0)), 1)
+
+    for i, (spec, hit) in enumerate(zip(specs, hits)):
+        width, height = int(spec.width), int(spec.height)
+        own = image_edge_weights(width, height, blend_width).astype(np.float32)
+        others = np.zeros((height, width), dtype=np.float32)
+        projectors = np.ones((height, width), dtype=np.float32)
+
+        index = np.flatnonzero(hit.visible)
+        grid_w, grid_h = coverage.grid_size(spec, subsample, len(index))
+        u, v = hit.u[index], hit.v[index]
+        pixel_u = (np.arange(width, dtype=np.float32) + 0.5) / width
+        pixel_v = (np.arange(height, dtype=np.float32) + 0.5) / height
+        for j, other in enumerate(hits):
+            shared = other.visible[index]
+            if j == i or not shared.any():
+                continue
+            # Where the other projector reaches the surface seen through this one. Only the
+            # pixels around that region are computed.
+            reach = bin_samples(u, v, shared.astype(np.float64), grid_w, grid_h)
+            window = rows, columns = _window(reach > 0, width, height)
+            reach = upsample(reach, width, height, window)
+            # Image coordinates of the other projector are smooth over the surface, unlike
+            # its weights, so they are interpolated and its ramp is evaluated per pixel.
+            # Interpolating the difference to the own coordinates keeps the error small
+            # where both images are aligned, e.g. along a shared top or bottom edge.
+            su, sv = u[shared], v[shared]
+            other_u = pixel_u[np.newaxis, columns] + upsample(
+                bin_samples(su, sv, other.u[index][shared] - su, grid_w, grid_h), width, height, window)
+            other_v = pixel_v[rows, np.newaxis] + upsample(
+                bin_samples(su, sv, other.v[index][shared] - sv, grid_w, grid_h), width, height, window)
+            others[window] += edge_weights(other_u, other_v, specs[j].width, specs[j].height, blend_width) * reach
+            projectors[window] += reach
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            blend = np.where(own > 0, own / (own + others), 0)
+        # Every projector reaching a point lifts its share of the missing black.
+        black = black_level * np.maximum(most_overlap - projectors, 0) / projectors
+
+        exponent = np.float32(1 / gamma)
+        yield np.power(blend, exponent), np.power(black, exponent)
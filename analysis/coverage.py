@@ -0,0 +1,170 @@
+"""
+Coverage and pixel density of projectors on surface samples.
+
+Pure NumPy, no bpy. Instead of casting one ray per projector pixel, every surface sample
+(vertex or face center) is projected forward into the pixel grid of each projector. That
+is the same test as casting the pixel rays, but it runs as a handful of array operations
+per projector. Occlusion between the samples is resolved with a depth buffer over the
+(optionally sub-sampled) pixel grid.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from .. import optics
+
+# Everything the analysis needs to know about one projector.
+# matrix is the 4x4 world matrix of the projector camera.
+ProjectorSpec = namedtuple('ProjectorSpec', 'name matrix throw_ratio h_shift v_shift width height')
+
+
+def project(spec, points):
+    """
+    Project world space points into the image of a projector.
+    Returns (u, v, depth): u and v are in [0, 1] inside the image (u to the right, v up),
+    depth is the distance along the optical axis, negative behind the lens.
+    """
+    inverse = np.linalg.inv(np.asarray(spec.matrix, dtype=np.float64))
+    local = points @ inverse[:3, :3].T + inverse[:3, 3]
+    depth = -local[:, 2]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x = local[:, 0] / depth
+        y = local[:, 1] / depth
+
+    size = optics.image_size(spec.throw_ratio, 1.0, spec.width, spec.height)
+    center = optics.image_center(spec.throw_ratio, spec.h_shift, spec.v_shift, 1.0, spec.width, spec.height)
+    u = (x - center[0]) / size[0] + 0.5
+    v = (y - center[1]) / size[1] + 0.5
+    return u, v, depth
+
+
+def grid_size(spec, subsample, sample_count):
+    """
+    Size (columns, rows) of a grid over the image of a projector for binning samples: the
+    pixel grid reduced by subsample, and never finer than the samples can fill. Surfaces are
+    only known at their samples, a cell without a sample is a hole.
+    """
+    scale = min(1.0 / subsample, np.sqrt(sample_count / 2 / (spec.width * spec.height)))
+    return max(1, int(np.ceil(spec.width * scale))), max(1, int(np.ceil(spec.height * scale)))
+
+
+def grid_cells(u, v, grid_w, grid_h):
+    """ Row and column of the grid cell for image coordinates in [0, 1]. """
+    rows = np.clip((v * grid_h).astype(np.int64), 0, grid_h - 1)
+    columns = np.clip((u * grid_w).astype(np.int64), 0, grid_w - 1)
+    return rows, columns
+
+
+def _min_filter(buffer):
+    """ 3x3 minimum filter, closes the remaining single cell holes between samples. """
+    padded = np.pad(buffer, 1, constant_values=np.inf)
+    h, w = buffer.shape
+    result = buffer.copy()
+    for dy in range(3):
+        for dx in range(3):
+            np.minimum(result, padded[dy:dy + h, dx:dx + w], out=result)
+    return result
+
+
+# Where the light of one projector hits the samples. All fields are (N,) arrays.
+#   visible        the projector reaches the sample
+#   u, v           image coordinates, see project()
+#   depth          distance along the optical axis
+#   distance       distance from the lens
+#   cos_incidence  cosine of the angle between the incoming light and the surface normal
+#   cos_off_axis   cosine of the angle between the light ray and the optical axis
+Hits = namedtuple('Hits', 'visible u v depth distance cos_incidence cos_off_axis')
+
+
+def hits(spec, points, normals, subsample=1, occlusion=True, depth_tolerance=0.02):
+    """
+    Find the samples a projector reaches. points and normals are (N, 3) arrays in world
+    space, normals don't need to be unit length. subsample > 1 coarsens the pixel grid used
+    for the depth buffer. Returns Hits.
+    """
+    u, v, depth = project(spec, points)
+    inside = (depth > 0) & (u >= 0) & (u <= 1) & (v >= 0) & (v <= 1)
+
+    origin = np.asarray(spec.matrix, dtype=np.float64)[:3, 3]
+    rays = points - origin
+    distance = np.linalg.norm(rays, axis=1)
+    normal_length = np.linalg.norm(normals, axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cos_incidence = -np.einsum('ij,ij->i', rays, normals) / (distance * normal_length)
+        cos_off_axis = depth / distance
+    visible = inside & (cos_incidence > 0)
+
+    if occlusion and visible.any():
+        index = np.flatnonzero(visible)
+        grid_w, grid_h = grid_size(spec, subsample, len(index))
+        rows, columns = grid_cells(u[index], v[index], grid_w, grid_h)
+        depth_buffer = np.full((grid_h, grid_w), np.inf)
+        np.minimum.at(depth_buffer, (rows, columns), depth[index])
+        depth_buffer = _min_filter(depth_buffer)
+        visible[index] = depth[index] <= depth_buffer[rows, columns] * (1 + depth_tolerance)
+
+    return Hits(visible, u, v, depth, distance, cos_incidence, cos_off_axis)
+
+
+def evaluate(spec, points, normals, subsample=1, occlusion=True, depth_tolerance=0.02):
+    """
+    Evaluate one projector on surface samples, see hits() for the arguments.
+    Returns (visible, pixels_per_meter, incidence) as (N,) arrays; incidence is the angle in
+    radians between the incoming light and the surface normal. Values of samples the
+    projector doesn't reach are 0.
+    """
+    hit = hits(spec, points, normals, subsample, occlusion, depth_tolerance)
+    visible = hit.visible
+
+    # A pixel of the image plane at depth 1 covers (W / width)^2. On the surface that area is
+    # scaled by depth^2 * cos(off axis) / cos(incidence).
+    image_width = optics.image_size(spec.throw_ratio, 1.0, spec.width, spec.height)[0]
+    pixels_per_meter = np.zeros(len(points))
+    incidence = np.zeros(len(points))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        density = spec.width / (image_width * hit.depth) * np.sqrt(hit.cos_incidence / hit.cos_off_axis)
+    pixels_per_meter[visible] = density[visible]
+    incidence[visible] = np.arccos(np.clip(hit.cos_incidence[visible], -1, 1))
+    return visible, pixels_per_meter, incidence
+
+
+def analyze(specs, points, normals, subsample=1, occlusion=True):
+    """
+    Evaluate all projectors on the same samples and combine the results.
+    Returns a dict of (N,) arrays:
+        overlap           number of projectors reaching a sample
+        pixels_per_meter  highest pixel density of all projectors
+        incidence         incidence angle (radians) of the projector with the highest density
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    normals = np.asarray(normals, dtype=np.float64).reshape(-1, 3)
+    overlap = np.zeros(len(points), dtype=np.int32)
+    best_density = np.zeros(len(points))
+    best_incidence = np.zeros(len(points))
+    for spec in specs:
+        visible, density, incidence = evaluate(spec, points, normals, subsample, occlusion)
+        overlap += visible
+        better = density > best_density
+        best_density[better] = density[better]
+        best_incidence[better] = incidence[better]
+    return {
+        'overlap': overlap,
+        'pixels_per_meter': best_density,
+        'incidence': best_incidence,
+    }
+
+
+# Color ramp from blue over green and yellow to red.
+_RAMP = np.array(((0.0, 0.0, 1.0), (0.0, 1.0, 1.0), (0.0, 1.0, 0.0), (1.0, 1.0, 0.0), (1.0, 0.0, 0.0)))
+
+
+def heatmap(values, low=0.0, high=1.0):
+    """ Map values to RGBA colors of a blue to red ramp. Returns an (N, 4) float array. """
+    values = np.asarray(values, dtype=np.float64)
+    span = high - low if high > low else 1.0
+    t = np.clip((values - low) / span, 0, 1) * (len(_RAMP) - 1)
+    stops = np.arange(len(_RAMP))
+    colors = np.ones((len(values), 4))
+    for channel in range(3):
+        colors[:, channel] = np.interp(t, stops, _RAMP[:, channel])
+    return colors
@@ -0,0 +1,119 @@
+"""
+Edge blend and black level mask images in the node trees of the projectors.
+
+The masks are computed by blend.masks() and written into one blend and one black level
+image per projector with a single foreach_set each. With auto update enabled, moving a
+blended projector or the target regenerates the masks a moment later.
+"""
+import logging
+import time
+
+import bpy
+import numpy as np
+
+from .. import images, registry
+from ..projector import add_blend_nodes
+from . import blend
+from .mesh_data import projector_spec, sample_surface
+
+log = logging.getLogger(name=__file__)
+
+# Wait this long after the last change before regenerating the masks (seconds).
+AUTO_UPDATE_DELAY = 0.3
+
+
+def mask_image(node, name, width, height):
+    """ Return the image of a mask node, created or resized to width x height as needed. """
+    image = node.image
+    if image is None:
+        image = bpy.data.images.new(name, width, height, alpha=False)
+        image.colorspace_settings.name = 'Non-Color'
+        node.image = image
+    elif tuple(image.size) != (width, height):
+        image.scale(width, height)
+    return images.mark(image)
+
+
+def write_mask(image, values):
+    """ Write a (height, width) mask into the RGB channels of an image. """
+    pixels = np.empty(values.shape + (4,), dtype=np.float32)
+    pixels[..., :3] = values[..., np.newaxis]
+    pixels[..., 3] = 1
+    image.pixels.foreach_set(pixels.ravel())
+    image.update()
+
+
+def generate(scene, target, projectors):
+    """ Compute the masks of projectors for the target mesh and show them in their node trees. """
+    settings = scene.proj_analysis
+    specs = [projector_spec(projector) for projector in projectors]
+    points, normals = sample_surface(target, settings.blend_samples)
+    results = blend.masks(specs, points, normals,
+                          blend_width=settings.blend_width, black_level=settings.black_level,
+                          gamma=settings.blend_gamma, subsample=settings.subsample,
+                          occlusion=settings.occlusion)
+    for projector, spec, (blend_values, black_values) in zip(projectors, specs, results):
+        rig = add_blend_nodes(projector)
+        if not rig:
+            continue
+        width, height = int(spec.width), int(spec.height)
+        write_mask(mask_image(rig.blend_mask, f'{projector.name} Edge Blend', width, height), blend_values)
+        write_mask(mask_image(rig.black_mask, f'{projector.name} Black Level', width, height), black_values)
+        rig.blend.inputs['Gamma'].default_value = settings.blend_gamma
+
+
+def blended_projectors(scene):
+    """ Projectors in scene that show their edge blend masks. """
+    return [projector for projector in registry.projectors()
+            if registry.in_scene(projector, scene) and projector.proj_settings.edge_blend]
+
+
+_pending_scene = None
+
+
+def _on_timer():
+    global _pending_scene
+    scene, _pending_scene = _pending_scene, None
+    try:
+        settings = scene.proj_analysis
+    except (AttributeError, ReferenceError):
+        return None
+    projectors = blended_projectors(scene)
+    if settings.target and projectors:
+        start = time.perf_counter()
+        generate(scene, settings.target, projectors)
+        log.debug(f'Updated the masks of {len(projectors)} projectors in {time.perf_counter() - start:.2f}s')
+    return None
+
+
+@bpy.app.handlers.persistent
+def on_depsgraph_update(scene, depsgraph):
+    """ Regenerate the masks after a blended projector or the target changed. """
+    global _pending_scene
+    settings = scene.proj_analysis
+    if not settings.blend_auto_update or not settings.target:
+        return
+    target = settings.target
+    projectors = blended_projectors(scene)
+    # Objects count when they moved, their data (lens, mesh) on any change.
+    moved = {obj.as_pointer() for obj in projectors + [target]}
+    changed = {obj.data.as_pointer() for obj in projectors + [target]}
+    for update in depsgraph.updates:
+        pointer = update.id.original.as_pointer()
+        if (pointer in moved and (update.is_updated_transform or update.is_updated_geometry)) or pointer in changed:
+            _pending_scene = scene
+            if bpy.app.timers.is_registered(_on_timer):
+                bpy.app.timers.unregister(_on_timer)
+            bpy.app.timers.register(_on_timer, first_interval=AUTO_UPDATE_DELAY)
+            return
+
+
+def register():
+    bpy.app.handlers.depsgraph_update_post.append(on_depsgraph_update)
+
+
+def unregister():
+    if on_depsgraph_update in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(on_depsgraph_update)
+    if bpy.app.timers.is_registered(_on_timer):
+        bpy.app.timers.unregister(_on_timer)
@@ -0,0 +1,116 @@
+"""
+Moving data between Blender and the analysis kernels.
+
+Samples and projector specs are read with foreach_get into NumPy arrays; results are
+written back as mesh attributes with foreach_set. There are no per-element Python loops.
+"""
+import numpy as np
+
+from ..projector import projector_resolution
+from .coverage import ProjectorSpec
+
+
+def projector_spec(projector):
+    """ Describe a projector object for the analysis kernels. """
+    proj_settings = projector.proj_settings
+    width, height = projector_resolution(projector)
+    matrix = np.array(projector.matrix_world, dtype=np.float64)
+    # The kernels expect an unscaled camera.
+    matrix[:3, :3] /= np.linalg.norm(matrix[:3, :3], axis=0)
+    return ProjectorSpec(projector.name, matrix, proj_settings.throw_ratio,
+                         proj_settings.h_shift, proj_settings.v_shift, width, height)
+
+
+def _read(collection, attribute, count, width=3):
+    values = np.empty(count * width, dtype=np.float64)
+    collection.foreach_get(attribute, values)
+    return values.reshape(count, width)
+
+
+def collect_samples(obj, domain='POINT'):
+    """
+    Return world space (points, normals) of the vertices (domain 'POINT') or the face centers
+    (domain 'FACE') of a mesh object.
+    """
+    mesh = obj.data
+    if domain == 'FACE':
+        count = len(mesh.polygons)
+        points = _read(mesh.polygons, 'center', count)
+        normals = _read(mesh.polygons, 'normal', count)
+    else:
+        count = len(mesh.vertices)
+        points = _read(mesh.vertices, 'co', count)
+        normals = _read(mesh.vertices, 'normal', count)
+
+    matrix = np.array(obj.matrix_world, dtype=np.float64)
+    points = points @ matrix[:3, :3].T + matrix[:3, 3]
+    # Normals transform with the inverse transpose.
+    normals = normals @ np.linalg.inv(matrix[:3, :3])
+    return points, normals
+
+
+def sample_surface(obj, count, seed=0):
+    """
+    Return world space (points, normals) of count points spread evenly over the faces of a
+    mesh object, independent of how finely it is subdivided. The same seed gives the same
+    points, so repeated analyses of an unchanged mesh don't flicker.
+    """
+    mesh = obj.data
+    mesh.calc_loop_triangles()
+    triangle_count = len(mesh.loop_triangles)
+    if not triangle_count or count <= 0:
+        return np.empty((0, 3)), np.empty((0, 3))
+
+    matrix = np.array(obj.matrix_world, dtype=np.float64)
+    vertices = _read(mesh.vertices, 'co', len(mesh.vertices)) @ matrix[:3, :3].T + matrix[:3, 3]
+    indices = np.empty(triangle_count * 3, dtype=np.int32)
+    mesh.loop_triangles.foreach_get('vertices', indices)
+    a, b, c = vertices[indices.reshape(-1, 3)].transpose(1, 0, 2)
+    cross = np.cross(b - a, c - a)
+    areas = np.linalg.norm(cross, axis=1)
+    if not areas.sum():
+        return np.empty((0, 3)), np.empty((0, 3))
+
+    # Pick triangles by area, then a uniform point inside each.
+    rng = np.random.default_rng(seed)
+    chosen = rng.choice(triangle_count, size=count, p=areas / areas.sum())
+    r1, r2 = rng.random((2, count, 1))
+    root = np.sqrt(r1)
+    points = a[chosen] * (1 - root) + b[chosen] * (root * (1 - r2)) + c[chosen] * (root * r2)
+    return points, cross[chosen]
+
+
+def face_to_corner(mesh, values):
+    """ Repeat per face values for every face corner. """
+    loop_totals = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get('loop_total', loop_totals)
+    return np.repeat(values, loop_totals, axis=0)
+
+
+def write_scalar(mesh, name, values, domain='POINT'):
+    """ Store one float per vertex or face in a FLOAT attribute, replacing an existing one. """
+    attribute = mesh.attributes.get(name)
+    if attribute and (attribute.domain != domain or attribute.data_type != 'FLOAT'):
+        mesh.attributes.remove(attribute)
+        attribute = None
+    if not attribute:
+        attribute = mesh.attributes.new(name, 'FLOAT', domain)
+    attribute.data.foreach_set('value', np.ascontiguousarray(values, dtype=np.float32).ravel())
+
+
+def write_colors(mesh, name, colors, domain='POINT'):
+    """
+    Store RGBA colors in a color attribute, replacing an existing one. Color attributes are
+    only displayed for vertices and face corners, so per face colors go to the corners.
+    """
+    if domain == 'FACE':
+        colors = face_to_corner(mesh, colors)
+        domain = 'CORNER'
+    attribute = mesh.attributes.get(name)
+    if attribute and (attribute.domain != domain or attribute.data_type != 'FLOAT_COLOR'):
+        mesh.attributes.remove(attribute)
+        attribute = None
+    if not attribute:
+        attribute = mesh.attributes.new(name, 'FLOAT_COLOR', domain)
+    attribute.data.foreach_set('color', np.ascontiguousarray(colors, dtype=np.float32).ravel())
+    return attribute
@@ -0,0 +1,255 @@
+import time
+
+import bpy
+import numpy as np
+from bpy.types import Operator
+from mathutils import Matrix, Vector
+
+from .. import api, scheduler
+from ..helper import get_projectors
+from ..lens_management.properties import select_lens
+from . import coverage, masks, photometry, placement
+from .mesh_data import collect_samples, projector_spec, sample_surface, write_colors, write_scalar
+
+# Names of the attributes written by the coverage analysis.
+COVERAGE_COLORS = ('Projector Coverage', 'Projector Overlap', 'Projector Pixel Density', 'Projector Incidence')
+ILLUMINANCE_COLOR = 'Projector Illuminance'
+
+
+def selected_meshes(context):
+    return [obj for obj in context.selected_objects if obj.type == 'MESH']
+
+
+def gather(targets, domain):
+    """ Samples of all targets in one array, plus the offsets to split results per target. """
+    samples = [collect_samples(obj, domain) for obj in targets]
+    points = np.concatenate([s[0] for s in samples]) if samples else np.empty((0, 3))
+    normals = np.concatenate([s[1] for s in samples]) if samples else np.empty((0, 3))
+    offsets = np.cumsum([0] + [len(s[0]) for s in samples])
+    return points, normals, offsets
+
+
+class PROJECTOR_OT_analyze_coverage(Operator):
+    """Compute coverage, overlap, pixel density and incidence angle of all projectors on the selected meshes"""
+    bl_idname = 'projector.analyze_coverage'
+    bl_label = 'Analyze Coverage'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        return context.mode == 'OBJECT' and bool(selected_meshes(context)) and bool(get_projectors(context))
+
+    def execute(self, context):
+        start = time.perf_counter()
+        settings = context.scene.proj_analysis
+        domain = settings.domain
+        targets = selected_meshes(context)
+        specs = [projector_spec(projector) for projector in get_projectors(context)]
+
+        # All targets are evaluated together, so they can occlude each other.
+        points, normals, offsets = gather(targets, domain)
+        result = coverage.analyze(specs, points, normals,
+                                  subsample=settings.subsample, occlusion=settings.occlusion)
+
+        overlap = result['overlap']
+        density = result['pixels_per_meter']
+        incidence = np.degrees(result['incidence'])
+        density_max = settings.pixels_per_meter_max or max(float(density.max(initial=0)), 1.0)
+        colors = {
+            'Projector Coverage': np.repeat((overlap > 0).astype(np.float64)[:, np.newaxis], 4, axis=1),
+            'Projector Overlap': coverage.heatmap(overlap, 0, max(int(overlap.max(initial=0)), 1)),
+            'Projector Pixel Density': coverage.heatmap(density, 0, density_max),
+            'Projector Incidence': coverage.heatmap(incidence, 0, 90),
+        }
+        colors['Projector Coverage'][:, 3] = 1
+
+        for obj, begin, end in zip(targets, offsets[:-1], offsets[1:]):
+            mesh = obj.data
+            write_scalar(mesh, 'proj_overlap', overlap[begin:end], domain)
+            write_scalar(mesh, 'proj_pixels_per_meter', density[begin:end], domain)
+            write_scalar(mesh, 'proj_incidence', incidence[begin:end], domain)
+            for name in COVERAGE_COLORS:
+                attribute = write_colors(mesh, name, colors[name][begin:end], domain)
+                if name == 'Projector Coverage' and hasattr(mesh, 'color_attributes'):
+                    mesh.color_attributes.active_color = attribute
+            mesh.update()
+
+        covered = int((overlap > 0).sum())
+        self.report({'INFO'}, f'{len(specs)} projectors, {covered}/{len(overlap)} samples covered '
+                              f'({time.perf_counter() - start:.2f}s)')
+        return {'FINISHED'}
+
+
+class PROJECTOR_OT_analyze_illuminance(Operator):
+    """Compute the illuminance (lux) of all projectors on the selected meshes and its uniformity"""
+    bl_idname = 'projector.analyze_illuminance'
+    bl_label = 'Analyze Illuminance'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        return context.mode == 'OBJECT' and bool(selected_meshes(context)) and bool(get_projectors(context))
+
+    def execute(self, context):
+        start = time.perf_counter()
+        settings = context.scene.proj_analysis
+        domain = settings.domain
+        targets = selected_meshes(context)
+        projectors = get_projectors(context)
+        specs = [projector_spec(projector) for projector in projectors]
+        if settings.light_source == 'POWER':
+            light = {'intensity': photometry.intensity_from_power(
+                [projector.proj_settings.power for projector in projectors])}
+        else:
+            light = {'lumens': [projector.proj_settings.lumens for projector in projectors]}
+        vignetting = [projector.get('lens_vignetting', 0.0) for projector in projectors]
+
+        points, normals, offsets = gather(targets, domain)
+        lux = photometry.analyze(specs, points, normals, vignetting=vignetting,
+                                 subsample=settings.subsample, occlusion=settings.occlusion, **light)
+
+        stats = photometry.uniformity(lux)
+        settings.lux_min, settings.lux_average, settings.lux_max = stats['min'], stats['average'], stats['max']
+        colors = coverage.heatmap(lux, 0, settings.target_lux or max(stats['max'], 1.0))
+        for obj, begin, end in zip(targets, offsets[:-1], offsets[1:]):
+            mesh = obj.data
+            write_scalar(mesh, 'proj_lux', lux[begin:end], domain)
+            attribute = write_colors(mesh, ILLUMINANCE_COLOR, colors[begin:end], domain)
+            if hasattr(mesh, 'color_attributes'):
+                mesh.color_attributes.active_color = attribute
+            mesh.update()
+
+        message = (f'{stats["min"]:.0f} / {stats["average"]:.0f} / {stats["max"]:.0f} lux (min / avg / max), '
+                   f'uniformity {stats["min_average"]:.0%} (min / avg) {stats["min_max"]:.0%} (min / max)')
+        if settings.target_lux:
+            reached = float((lux[lux > 0] >= settings.target_lux).mean()) if (lux > 0).any() else 0.0
+            message += f', {reached:.0%} reach {settings.target_lux:.0f} lux'
+        self.report({'INFO'}, f'{message} ({time.perf_counter() - start:.2f}s)')
+        return {'FINISHED'}
+
+
+class PROJECTOR_OT_generate_blend_masks(Operator):
+    """Generate edge blend and black level masks for all projectors on the target surface"""
+    bl_idname = 'projector.generate_blend_masks'
+    bl_label = 'Generate Blend Masks'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        return (context.mode == 'OBJECT' and context.scene.proj_analysis.target is not None
+                and bool(get_projectors(context)))
+
+    def execute(self, context):
+        start = time.perf_counter()
+        projectors = get_projectors(context)
+        masks.generate(context.scene, context.scene.proj_analysis.target, projectors)
+        with scheduler.batch():
+            for projector in projectors:
+                projector.proj_settings['edge_blend'] = True
+                scheduler.mark(projector, scheduler.LINKS)
+        self.report({'INFO'}, f'Blend masks of {len(projectors)} projectors '
+                              f'({time.perf_counter() - start:.2f}s)')
+        return {'FINISHED'}
+
+
+def lens_catalogue():
+    """ Lenses of the lens database, empty without the lens management module. """
+    try:
+        from ..lens_management.database import lens_db
+    except ImportError:
+        return []
+    return placement.lenses_from_catalogue(lens_db)
+
+
+def apply_lens(context, projector, result):
+    """ Select the lens of a placement result through the lens manager of projector. """
+    # The lens manager callbacks work on the active object.
+    context.view_layer.objects.active = projector
+    select_lens(projector.lens_manager, result.lens.manufacturer, result.lens.model)
+    # Selecting a lens resets throw ratio and shift, put the optimized values back.
+    proj_settings = projector.proj_settings
+    proj_settings.throw_ratio = result.throw_ratio
+    proj_settings.h_shift = result.h_shift
+    proj_settings.v_shift = result.v_shift
+
+
+class PROJECTOR_OT_optimize_placement(Operator):
+    """Place new projectors in the mounting region and choose their lenses, so they cover the target"""
+    bl_idname = 'projector.optimize_placement'
+    bl_label = 'Place Projectors'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        settings = context.scene.proj_analysis
+        return context.mode == 'OBJECT' and settings.target is not None and settings.mount is not None
+
+    def execute(self, context):
+        start = time.perf_counter()
+        settings = context.scene.proj_analysis
+        points, normals = sample_surface(settings.target, settings.placement_samples)
+        mount = settings.mount
+        corners = np.array([mount.matrix_world @ Vector(corner) for corner in mount.bound_box])
+        width, height = (int(value) for value in settings.placement_resolution.split('x'))
+        lenses = lens_catalogue()
+
+        window_manager = context.window_manager
+        window_manager.progress_begin(0, settings.placement_count)
+        try:
+            with placement.Solver(points, normals, corners.min(axis=0), corners.max(axis=0), lenses,
+                                  width=width, height=height,
+                                  required_overlap=settings.placement_overlap,
+                                  pixels_per_meter=settings.placement_pixels_per_meter,
+                                  workers=settings.placement_workers or None) as solver:
+                results = solver.solve(settings.placement_count, settings.placement_candidates,
+                                       progress=lambda index, count: window_manager.progress_update(index))
+        finally:
+            window_manager.progress_end()
+        if not results:
+            self.report({'ERROR'}, 'No projector position reaches the target from the mounting region')
+            return {'CANCELLED'}
+        elapsed = time.perf_counter() - start
+
+        layouts = [{
+            'location': tuple(result.position),
+            'rotation': Matrix(result.rotation.tolist()).to_euler(),
+            'resolution': settings.placement_resolution,
+            'throw_ratio': result.throw_ratio,
+            'h_shift': result.h_shift,
+            'v_shift': result.v_shift,
+        } for result in results]
+        projectors = api.create_many(layouts, context)
+
+        # Nothing may be selected while the lenses are applied, or 'Edit All Selected' would
+        # copy the values of one projector to the others.
+        for obj in context.selected_objects:
+            obj.select_set(False)
+        with scheduler.batch():
+            for projector, result in zip(projectors, results):
+                if result.lens.manufacturer and hasattr(projector, 'lens_manager'):
+                    apply_lens(context, projector, result)
+        for projector in projectors:
+            projector.select_set(True)
+        context.view_layer.objects.active = projectors[-1]
+
+        self.report({'INFO'}, f'Placed {len(projectors)} projectors, {solver.coverage:.0%} of the target covered, '
+                              f'{solver.evaluated} candidates in {elapsed:.1f}s')
+        return {'FINISHED'}
+
+
+classes = (
+    PROJECTOR_OT_analyze_coverage,
+    PROJECTOR_OT_analyze_illuminance,
+    PROJECTOR_OT_generate_blend_masks,
+    PROJECTOR_OT_optimize_placement,
+)
+
+
+def register():
+    for cls in classes:
+        bpy.utils.register_class(cls)
+
+
+def unregister():
+    for cls in reversed(classes):
+        bpy.utils.unregister_class(cls)
@@ -0,0 +1,68 @@
+import bpy
+from bpy.types import Panel
+
+
+class PROJECTOR_PT_analysis(Panel):
+    bl_label = "Projection Analysis"
+    bl_idname = "PROJECTOR_PT_analysis"
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_category = "Projector"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        layout = self.layout
+        layout.use_property_split = True
+        layout.use_property_decorate = False
+        settings = context.scene.proj_analysis
+
+        col = layout.column()
+        col.prop(settings, 'target')
+        col.prop(settings, 'domain')
+        col.prop(settings, 'occlusion')
+        sub = col.column()
+        sub.active = settings.occlusion
+        sub.prop(settings, 'subsample')
+        col.prop(settings, 'pixels_per_meter_max')
+
+        layout.operator('projector.analyze_coverage', icon='MOD_UVPROJECT')
+
+        layout.label(text='Illuminance:')
+        col = layout.column()
+        col.prop(settings, 'light_source')
+        col.prop(settings, 'target_lux')
+        layout.operator('projector.analyze_illuminance', icon='LIGHT_SUN')
+        if settings.lux_max:
+            col = layout.column(align=True)
+            col.label(text=f'Min {settings.lux_min:.0f} lx, Avg {settings.lux_average:.0f} lx, '
+                           f'Max {settings.lux_max:.0f} lx')
+            col.label(text=f'Uniformity {settings.lux_min / settings.lux_average:.0%} (min / avg)')
+
+        layout.label(text='Edge Blending:')
+        col = layout.column()
+        col.prop(settings, 'blend_samples')
+        col.prop(settings, 'blend_width')
+        col.prop(settings, 'blend_gamma')
+        col.prop(settings, 'black_level')
+        col.prop(settings, 'blend_auto_update')
+        layout.operator('projector.generate_blend_masks', icon='IMAGE_ALPHA')
+
+        layout.label(text='Automatic Placement:')
+        col = layout.column()
+        col.prop(settings, 'mount')
+        col.prop(settings, 'placement_count')
+        col.prop(settings, 'placement_overlap')
+        col.prop(settings, 'placement_pixels_per_meter')
+        col.prop(settings, 'placement_resolution')
+        col.prop(settings, 'placement_samples')
+        col.prop(settings, 'placement_candidates')
+        col.prop(settings, 'placement_workers')
+        layout.operator('projector.optimize_placement', icon='OUTLINER_OB_CAMERA')
+
+
+def register():
+    bpy.utils.register_class(PROJECTOR_PT_analysis)
+
+
+def unregister():
+    bpy.utils.unregister_class(PROJECTOR_PT_analysis)
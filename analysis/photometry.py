@@ -0,0 +1,98 @@
+"""
+Illuminance (lux) of projectors on surface samples, without rendering.
+
+Pure NumPy, no bpy. Visibility comes from coverage.hits(); the light of all projectors is
+then computed for all samples at once as (projectors, samples) arrays.
+
+Two ways to tell how much light a projector emits:
+    lumens     Rated light output. A projector spreads it evenly over its image on a
+               screen perpendicular to the optical axis, so the illuminance there is
+               lumens / image area.
+    intensity  Luminous intensity in candela, the same in every direction of the image.
+               This is what the spot light of a projector rig does in Cycles, see
+               intensity_from_power().
+Lens vignetting darkens the image towards the corners: vignetting is the fraction of light
+lost in the corners, the falloff is quadratic in the distance from the image center.
+"""
+import numpy as np
+
+from .. import optics
+from . import coverage
+
+# Luminous efficacy used to convert watts to lumens (lm/W).
+LUMINOUS_EFFICACY = 683.0
+
+
+def intensity_from_power(power):
+    """ Luminous intensity (cd) of a Blender spot light with power in watts and a white image. """
+    return np.asarray(power, dtype=np.float64) * LUMINOUS_EFFICACY / (4 * np.pi)
+
+
+def relative_illumination(u, v, width, height, vignetting):
+    """ Brightness relative to the image center, 1 - vignetting in the corners. """
+    aspect = height / width
+    radius_squared = ((u - 0.5) ** 2 + ((v - 0.5) * aspect) ** 2) / (0.25 * (1 + aspect ** 2))
+    return 1 - vignetting * radius_squared
+
+
+def illuminance(specs, hits, lumens=None, intensity=None, vignetting=0.0):
+    """
+    Illuminance (lux) of every projector on every sample. Pass either lumens or intensity,
+    one value per projector; vignetting is per projector too or one for all.
+    Returns a (projectors, samples) array, 0 where a projector doesn't reach a sample.
+    """
+    if not specs:
+        return np.zeros((0, 0))
+    visible = np.array([hit.visible for hit in hits])
+    u = np.array([hit.u for hit in hits])
+    v = np.array([hit.v for hit in hits])
+    depth = np.array([hit.depth for hit in hits])
+    distance = np.array([hit.distance for hit in hits])
+    cos_incidence = np.array([hit.cos_incidence for hit in hits])
+    cos_off_axis = np.array([hit.cos_off_axis for hit in hits])
+
+    width = np.array([spec.width for spec in specs], dtype=np.float64)[:, np.newaxis]
+    height = np.array([spec.height for spec in specs], dtype=np.float64)[:, np.newaxis]
+    vignetting = np.broadcast_to(np.asarray(vignetting, dtype=np.float64), (len(specs),))[:, np.newaxis]
+    falloff = relative_illumination(u, v, width, height, vignetting)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if intensity is not None:
+            candela = np.asarray(intensity, dtype=np.float64)[:, np.newaxis]
+            lux = candela * cos_incidence / distance ** 2
+        else:
+            throw_ratio = np.array([spec.throw_ratio for spec in specs])
+            size = optics.image_size(throw_ratio, 1.0, width[:, 0], height[:, 0])
+            # Lumens per unit area of the image plane at depth 1, spread over the surface.
+            flux_density = (np.asarray(lumens, dtype=np.float64) / size.prod(axis=-1))[:, np.newaxis]
+            lux = flux_density * cos_incidence / (depth ** 2 * cos_off_axis)
+    return np.where(visible, lux * falloff, 0.0)
+
+
+def analyze(specs, points, normals, lumens=None, intensity=None, vignetting=0.0, subsample=8, occlusion=True):
+    """ Total illuminance of all projectors on samples, see illuminance(). Returns an (N,) array. """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    normals = np.asarray(normals, dtype=np.float64).reshape(-1, 3)
+    hits = [coverage.hits(spec, points, normals, subsample, occlusion) for spec in specs]
+    if not hits:
+        return np.zeros(len(points))
+    return illuminance(specs, hits, lumens, intensity, vignetting).sum(axis=0)
+
+
+def uniformity(lux, mask=None):
+    """
+    Brightness statistics of the samples in mask (all lit samples by default).
+    Returns a dict with min, average, max, min/average and min/max.
+    """
+    lux = np.asarray(lux, dtype=np.float64)
+    values = lux[lux > 0] if mask is None else lux[mask]
+    if not len(values):
+        return {'min': 0.0, 'average': 0.0, 'max': 0.0, 'min_average': 0.0, 'min_max': 0.0}
+    low, average, high = float(values.min()), float(values.mean()), float(values.max())
+    return {
+        'min': low,
+        'average': average,
+        'max': high,
+        'min_average': low / average if average else 0.0,
+        'min_max': low / high if high else 0.0,
+    }
@@ -0,0 +1,306 @@
+"""
+Automatic placement and lens selection of projectors.
+
+Pure NumPy, no bpy, so the candidate scoring can run in worker processes.
+
+The projectors are placed one after the other (greedy). For every projector a batch of
+random candidates is drawn: a position inside the mounting box, an aim point on the part
+of the target that is not covered yet, a lens from the catalogue and a throw ratio and
+lens shift inside the ranges of that lens. The best candidate is then refined by drawing
+new candidates around it with a shrinking spread.
+
+A candidate scores the area it newly covers, weighted by how close its pixel density gets
+to the requested density. From the second projector on, candidates that overlap the
+projectors placed so far less than the required overlap are penalized. Occlusion is not
+considered; run the coverage analysis on the result for that.
+
+Candidates are scored in vectorized batches of (candidates, samples) arrays. Batches are
+spread over a process pool; without one (workers=1, or if the pool can't be created or
+its workers fail to start) they are scored in this process.
+"""
+import logging
+import math
+from collections import namedtuple
+from concurrent import futures
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+log = logging.getLogger(name=__file__)
+
+# Throw ratio and lens shift ranges (percent) of a lens. manufacturer and model are None for
+# the generic lens used when there is no catalogue.
+Lens = namedtuple('Lens', 'manufacturer model throw_min throw_max h_min h_max v_min v_max')
+
+GENERIC_LENS = Lens(None, None, 0.4, 3.0, 0.0, 0.0, 0.0, 0.0)
+
+# One solution per projector. rotation is the 3x3 world rotation of the projector camera.
+Placement = namedtuple('Placement', 'position rotation lens throw_ratio h_shift v_shift')
+
+# Struct of arrays for a batch of candidates, one entry per candidate.
+Candidates = namedtuple('Candidates', 'positions rotations lens_indices throw_ratio h_shift v_shift')
+
+# Candidates per vectorized batch, bounds the (candidates, samples) arrays.
+BATCH_SIZE = 64
+
+
+def lenses_from_catalogue(lens_db):
+    """ All lenses of a LensDatabase as Lens tuples. """
+    lenses = []
+    for manufacturer in lens_db.get_manufacturers():
+        for model in lens_db.get_models(manufacturer):
+            specs = (lens_db.get_lens_profile(manufacturer, model) or {}).get('specs', {})
+            throw_ratio = specs.get('throw_ratio')
+            if not isinstance(throw_ratio, dict) or 'min' not in throw_ratio:
+                continue
+            shift = specs.get('lens_shift', {})
+            h_min, h_max = shift.get('h_shift_range', (0.0, 0.0))
+            v_min, v_max = shift.get('v_shift_range', (0.0, 0.0))
+            lenses.append(Lens(manufacturer, model, float(throw_ratio['min']),
+                               float(throw_ratio.get('max', throw_ratio['min'])),
+                               float(h_min), float(h_max), float(v_min), float(v_max)))
+    return lenses
+
+
+def look_at(positions, targets):
+    """
+    Rotations (C, 3, 3) of cameras at positions looking at targets, without roll: the X
+    axis of the camera stays horizontal. The camera looks along its -Z axis.
+    """
+    forward = targets - positions
+    forward /= np.linalg.norm(forward, axis=-1, keepdims=True)
+    z = -forward
+    x = np.cross((0.0, 0.0, 1.0), z)
+    length = np.linalg.norm(x, axis=-1, keepdims=True)
+    # Looking straight up or down, any horizontal X will do.
+    x = np.where(length > 1e-6, x / np.maximum(length, 1e-12), (1.0, 0.0, 0.0))
+    y = np.cross(z, x)
+    return np.stack((x, y, z), axis=-1)
+
+
+def footprint(candidates, points, normals, width, height):
+    """
+    Where every candidate hits the samples and with which pixel density. normals must be
+    unit length. Returns (inside, density) as (C, N) arrays.
+    """
+    # Everything is expanded into (C, 3) x (3, N) matrix products, no (C, N, 3) arrays.
+    positions, rotations = candidates.positions, candidates.rotations
+    x, y, z = (rotations[:, :, k] @ points.T - np.einsum('ck,ck->c', rotations[:, :, k], positions)[:, np.newaxis]
+               for k in range(3))
+    depth = -z
+    # Projector position minus sample position, dotted with the normal.
+    facing = positions @ normals.T - np.einsum('nk,nk->n', points, normals)
+
+    # The image is 1 / throw_ratio wide at depth 1. Same density as coverage.evaluate(),
+    # cos(incidence) / cos(off axis) simplifies to facing / depth.
+    throw_ratio = candidates.throw_ratio[:, np.newaxis]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inverse_depth = 1 / depth
+        u = x * inverse_depth * throw_ratio - candidates.h_shift[:, np.newaxis] / 100 + 0.5
+        v = y * inverse_depth * (throw_ratio * width / height) - candidates.v_shift[:, np.newaxis] / 100 + 0.5
+        density = width * throw_ratio * inverse_depth * np.sqrt(facing * inverse_depth)
+    inside = (depth > 0) & (facing > 0) & (u >= 0) & (u <= 1) & (v >= 0) & (v <= 1)
+    return inside, np.where(inside, density, 0.0)
+
+
+# Samples of the worker process, set by _init_worker().
+_samples = {}
+
+
+def _init_worker(points, normals, width, height):
+    _samples['points'] = points
+    _samples['normals'] = normals
+    _samples['width'] = width
+    _samples['height'] = height
+
+
+def _score_batch(candidates, covered, required_overlap, pixels_per_meter):
+    """ Score a batch of candidates against the samples covered so far. Returns (C,) scores. """
+    inside, density = footprint(candidates, _samples['points'], _samples['normals'],
+                                _samples['width'], _samples['height'])
+    sample_count = inside.shape[1]
+    quality = np.minimum(density / pixels_per_meter, 1.0) if pixels_per_meter > 0 else inside
+    gain = (quality * (inside & ~covered)).sum(axis=1) / sample_count
+    # Small bonus for sharper images, so equally covering candidates prefer higher density.
+    reached = np.maximum(inside.sum(axis=1), 1)
+    gain += 1e-3 * (quality * inside).sum(axis=1) / reached
+    if covered.any():
+        overlap = (inside & covered).sum(axis=1) / reached
+        gain -= np.maximum(required_overlap - overlap, 0.0)
+        # Candidates that don't touch the covered area at all can't blend.
+        gain[overlap == 0] -= 1.0
+    return np.where(inside.any(axis=1), gain, -np.inf)
+
+
+def _split(candidates, size):
+    for begin in range(0, len(candidates.positions), size):
+        yield Candidates(*(field[begin:begin + size] for field in candidates))
+
+
+class Solver:
+    """
+    Places count projectors for the target samples. Use as a context manager, so the
+    process pool is shut down afterwards:
+
+        with Solver(points, normals, mount_min, mount_max, lenses) as solver:
+            placements = solver.solve(3)
+    """
+
+    def __init__(self, points, normals, mount_min, mount_max, lenses, width=1920, height=1080,
+                 required_overlap=0.15, pixels_per_meter=0.0, workers=None, seed=0):
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        normals = np.asarray(normals, dtype=np.float64).reshape(-1, 3)
+        self.normals = normals / np.linalg.norm(normals, axis=1, keepdims=True)
+        self.mount_min = np.asarray(mount_min, dtype=np.float64)
+        self.mount_max = np.asarray(mount_max, dtype=np.float64)
+        self.lenses = list(lenses) or [GENERIC_LENS]
+        self.width, self.height = float(width), float(height)
+        self.required_overlap = required_overlap
+        self.pixels_per_meter = pixels_per_meter
+        self.rng = np.random.default_rng(seed)
+        self.covered = np.zeros(len(self.points), dtype=bool)
+        self.evaluated = 0
+
+        ranges = np.array([lens[2:] for lens in self.lenses], dtype=np.float64)
+        self._throw_min, self._throw_max, self._h_min, self._h_max, self._v_min, self._v_max = ranges.T
+
+        self._executor = None
+        if workers != 1:
+            try:
+                import multiprocessing
+                self._executor = futures.ProcessPoolExecutor(
+                    max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker, initargs=(self.points, self.normals, self.width, self.height))
+            except (OSError, ValueError, ImportError) as e:
+                log.warning(f'No process pool, scoring in this process: {e}')
+        _init_worker(self.points, self.normals, self.width, self.height)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def close(self):
+        if self._executor:
+            # score() waits for all of its jobs, nothing is pending here.
+            self._executor.shutdown()
+            self._executor = None
+
+    def _lens_values(self, lens_indices, throw_t, h_t, v_t):
+        """ Throw ratio and shifts at the relative positions t in [0, 1] of the lens ranges. """
+        throw_ratio = self._throw_min[lens_indices] + throw_t * (self._throw_max - self._throw_min)[lens_indices]
+        h_shift = self._h_min[lens_indices] + h_t * (self._h_max - self._h_min)[lens_indices]
+        v_shift = self._v_min[lens_indices] + v_t * (self._v_max - self._v_min)[lens_indices]
+        return throw_ratio, h_shift, v_shift
+
+    def random_candidates(self, count):
+        """ Candidates spread over the whole search space, aimed at uncovered samples. """
+        rng = self.rng
+        positions = rng.uniform(self.mount_min, self.mount_max, (count, 3))
+        pool = np.flatnonzero(~self.covered)
+        if not len(pool):
+            pool = np.arange(len(self.points))
+        aims = self.points[rng.choice(pool, count)]
+        lens_indices = rng.integers(len(self.lenses), size=count)
+        # Most lenses can't shift in both directions, so no shift is drawn more often.
+        h_t, v_t = rng.uniform(0, 1, (2, count))
+        throw_ratio, h_shift, v_shift = self._lens_values(lens_indices, rng.uniform(0, 1, count), h_t, v_t)
+        h_shift = np.where(rng.uniform(0, 1, count) < 0.5, np.clip(0.0, self._h_min[lens_indices],
+                                                                   self._h_max[lens_indices]), h_shift)
+        v_shift = np.where(rng.uniform(0, 1, count) < 0.5, np.clip(0.0, self._v_min[lens_indices],
+                                                                   self._v_max[lens_indices]), v_shift)
+        return Candidates(positions, look_at(positions, aims), lens_indices, throw_ratio, h_shift, v_shift)
+
+    def perturbed_candidates(self, best, count, spread):
+        """ Candidates around best. spread is relative to the size of the search space. """
+        rng = self.rng
+        extent = np.maximum(self.mount_max - self.mount_min, 1e-6)
+        positions = np.clip(best.position + rng.normal(0, spread, (count, 3)) * extent, self.mount_min, self.mount_max)
+        target_extent = np.ptp(self.points, axis=0).max()
+        forward = -best.rotation[:, 2]
+        # The distance along the optical axis to the target stays about the same.
+        distance = np.linalg.norm(self.points - best.position, axis=1).mean()
+        aims = best.position + forward * distance + rng.normal(0, spread * target_extent, (count, 3))
+        lens_index = self.lenses.index(best.lens)
+        keep = rng.uniform(0, 1, count) < 0.8
+        lens_indices = np.where(keep, lens_index, rng.integers(len(self.lenses), size=count))
+
+        def relative(value, low, high):
+            span = high - low
+            return np.where(span > 0, (value - low) / np.where(span > 0, span, 1), 0.5)
+
+        throw_t = relative(best.throw_ratio, self._throw_min[lens_index], self._throw_max[lens_index])
+        h_t = relative(best.h_shift, self._h_min[lens_index], self._h_max[lens_index])
+        v_t = relative(best.v_shift, self._v_min[lens_index], self._v_max[lens_index])
+        jitter = np.clip(np.array((throw_t, h_t, v_t))[:, np.newaxis] + rng.normal(0, spread, (3, count)), 0, 1)
+        throw_ratio, h_shift, v_shift = self._lens_values(lens_indices, *jitter)
+        return Candidates(positions, look_at(positions, aims), lens_indices, throw_ratio, h_shift, v_shift)
+
+    def score(self, candidates):
+        """ Scores of candidates, spread over the process pool if there is one. """
+        batches = list(_split(candidates, BATCH_SIZE))
+        args = (self.covered, self.required_overlap, self.pixels_per_meter)
+        scores = None
+        if self._executor:
+            # The workers are only started by the first submit(), a pool that can't start
+            # them (no usable spawn context, a __main__ that can't be imported) breaks here.
+            try:
+                jobs = [self._executor.submit(_score_batch, batch, *args) for batch in batches]
+                scores = [job.result() for job in jobs]
+            except (BrokenProcessPool, OSError) as e:
+                log.warning(f'The process pool failed, scoring in this process: {e}')
+                self._executor.shutdown(wait=False)
+                self._executor = None
+        if scores is None:
+            scores = [_score_batch(batch, *args) for batch in batches]
+        self.evaluated += len(candidates.positions)
+        return np.concatenate(scores)
+
+    def _placement(self, candidates, index):
+        return Placement(candidates.positions[index], candidates.rotations[index],
+                         self.lenses[candidates.lens_indices[index]], float(candidates.throw_ratio[index]),
+                         float(candidates.h_shift[index]), float(candidates.v_shift[index]))
+
+    def place_one(self, candidate_count=2000, refine_rounds=4):
+        """ Find the best next projector, mark what it covers and return (Placement, score). """
+        candidates = self.random_candidates(candidate_count)
+        scores = self.score(candidates)
+        best_index = int(np.argmax(scores))
+        best, best_score = self._placement(candidates, best_index), float(scores[best_index])
+
+        for round_index in range(refine_rounds):
+            candidates = self.perturbed_candidates(best, max(candidate_count // 4, 1), 0.1 / 2 ** round_index)
+            scores = self.score(candidates)
+            index = int(np.argmax(scores))
+            if scores[index] > best_score:
+                best, best_score = self._placement(candidates, index), float(scores[index])
+
+        self.covered |= self.covers(best)
+        return best, best_score
+
+    def covers(self, placement):
+        """ Samples reached by a placement. """
+        candidates = Candidates(placement.position[np.newaxis], placement.rotation[np.newaxis],
+                                np.array([self.lenses.index(placement.lens)]), np.array([placement.throw_ratio]),
+                                np.array([placement.h_shift]), np.array([placement.v_shift]))
+        inside, _ = footprint(candidates, self.points, self.normals, self.width, self.height)
+        return inside[0]
+
+    def solve(self, count, candidate_count=2000, refine_rounds=4, progress=None):
+        """ Place count projectors. progress(index, count) is called after every projector. """
+        placements = []
+        for index in range(count):
+            placement, score = self.place_one(candidate_count, refine_rounds)
+            if not math.isfinite(score):
+                log.warning('No candidate reaches the target, stopping.')
+                break
+            placements.append(placement)
+            if progress:
+                progress(index + 1, count)
+        return placements
+
+    @property
+    def coverage(self):
+        """ Fraction of the target covered by the placed projectors. """
+        return float(self.covered.mean()) if len(self.covered) else 0.0
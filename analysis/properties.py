@@ -0,0 +1,116 @@
+import bpy
+from bpy.props import BoolProperty, EnumProperty, FloatProperty, IntProperty, PointerProperty
+
+from ..projector import RESOLUTIONS
+
+
+class ProjectionAnalysisSettings(bpy.types.PropertyGroup):
+    """ Settings shared by the projection analysis operators. Stored on the scene. """
+    target: PointerProperty(
+        name="Target",
+        type=bpy.types.Object,
+        poll=lambda self, obj: obj.type == 'MESH',
+        description="Projection surface for edge blending and automatic placement")
+    domain: EnumProperty(
+        name="Domain",
+        items=[('POINT', 'Vertices', 'One value per vertex'),
+               ('FACE', 'Faces', 'One value per face')],
+        default='POINT',
+        description="Evaluate the projectors per vertex or per face")
+    subsample: IntProperty(
+        name="Sub-sampling",
+        description="Combine this many projector pixels (per side) into one cell of the occlusion buffer",
+        default=8, min=1, soft_max=64)
+    occlusion: BoolProperty(
+        name="Occlusion",
+        description="Surfaces hidden behind other analyzed surfaces don't receive light",
+        default=True)
+    pixels_per_meter_max: FloatProperty(
+        name="Pixel Density Range",
+        description="Pixel density shown as red in the pixel density map. 0 uses the highest density found",
+        default=0.0, min=0.0, subtype='NONE')
+
+    # Illuminance
+    light_source: EnumProperty(
+        name="Light",
+        items=[('LUMENS', 'Lumens', 'Rated brightness of the projectors, spread evenly over the image'),
+               ('POWER', 'Power', 'Power of the spot lights, the way Cycles renders them')],
+        default='LUMENS',
+        description="What the light output of a projector is computed from")
+    target_lux: FloatProperty(
+        name="Target Illuminance",
+        description="Illuminance the surface should reach (lux). Shown as red in the illuminance map, "
+                    "0 uses the highest illuminance found",
+        default=0.0, min=0.0, soft_max=10000.0)
+    lux_min: FloatProperty(name="Minimum", description="Lowest illuminance of the last analysis (lux)")
+    lux_average: FloatProperty(name="Average", description="Average illuminance of the last analysis (lux)")
+    lux_max: FloatProperty(name="Maximum", description="Highest illuminance of the last analysis (lux)")
+
+    # Edge blending
+    blend_samples: IntProperty(
+        name="Samples",
+        description="Number of points spread over the target to find the overlaps",
+        default=200000, min=1000, soft_max=2000000)
+    blend_width: FloatProperty(
+        name="Blend Width",
+        description="Width of the soft edge ramp, as a fraction of the image width",
+        default=0.2, min=0.0, max=0.5, subtype='FACTOR')
+    blend_gamma: FloatProperty(
+        name="Gamma",
+        description="Gamma of the projectors. The masks are encoded with it, the way a projector would receive them",
+        default=2.2, min=1.0, soft_max=3.0)
+    black_level: FloatProperty(
+        name="Black Level",
+        description="Light a projector emits for black, as a fraction of its white. "
+                    "Regions with fewer projectors are lifted to the black of the overlaps",
+        default=0.0, min=0.0, max=0.2, precision=4)
+    blend_auto_update: BoolProperty(
+        name="Auto Update",
+        description="Regenerate the masks when a blended projector or the target changes",
+        default=False)
+
+    # Automatic placement
+    mount: PointerProperty(
+        name="Mounting Region",
+        type=bpy.types.Object,
+        description="Projectors are placed inside the bounding box of this object")
+    placement_count: IntProperty(
+        name="Projectors",
+        description="Number of projectors to place",
+        default=2, min=1, soft_max=32)
+    placement_overlap: FloatProperty(
+        name="Overlap",
+        description="Share of the image of a projector that should overlap the projectors placed before it",
+        default=0.15, min=0.0, max=0.9, subtype='FACTOR')
+    placement_pixels_per_meter: FloatProperty(
+        name="Pixel Density",
+        description="Pixel density (pixels per meter) at which a covered surface counts fully. "
+                    "0 only maximizes the coverage",
+        default=100.0, min=0.0, soft_max=2000.0)
+    placement_resolution: EnumProperty(
+        name="Resolution",
+        items=[resolution for resolution in RESOLUTIONS if resolution[0] != 'custom'],
+        default='1920x1080',
+        description="Resolution of the placed projectors")
+    placement_samples: IntProperty(
+        name="Samples",
+        description="Number of points spread over the target to score the candidates with",
+        default=5000, min=100, soft_max=100000)
+    placement_candidates: IntProperty(
+        name="Candidates",
+        description="Random candidates tried for every projector, a quarter more per refinement round",
+        default=2000, min=10, soft_max=100000)
+    placement_workers: IntProperty(
+        name="Processes",
+        description="Worker processes that score the candidates. 0 uses one per CPU, 1 scores in Blender itself",
+        default=0, min=0, soft_max=64)
+
+
+def register():
+    bpy.utils.register_class(ProjectionAnalysisSettings)
+    bpy.types.Scene.proj_analysis = PointerProperty(type=ProjectionAnalysisSettings)
+
+
+def unregister():
+    del bpy.types.Scene.proj_analysis
+    bpy.utils.unregister_class(ProjectionAnalysisSettings)
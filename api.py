@@ -0,0 +1,157 @@
+"""
+Scripting API of the Projectors addon.
+
+The operators in projector.py build every projector through bpy.ops, which is fine for a
+single interactive projector but slow for whole venues. The functions in here build
+projectors directly on bpy.data and are meant to be called from scripts, e.g.:
+
+    from Projectors import api
+    api.create_many([
+        {'location': (0, -5, 3), 'rotation': (1.4, 0, 0), 'throw_ratio': 1.2},
+        {'location': (4, -5, 3), 'rotation': (1.4, 0, 0.3), 'resolution': '2560x1600'},
+    ])
+"""
+import logging
+import math
+
+import bpy
+
+from . import registry, scheduler
+from .helper import ADDON_ID
+from .projector import RESOLUTIONS, build_root_tree
+
+log = logging.getLogger(name=__file__)
+
+# Same defaults as init_projector() uses for projectors created through the operator.
+LAYOUT_DEFAULTS = {
+    'name': 'Projector',
+    'location': (0.0, 0.0, 0.0),
+    'rotation': (0.0, 0.0, 0.0),
+    'throw_ratio': 0.8,
+    'power': 1000.0,
+    'resolution': '1920x1080',
+    'h_shift': 0.0,
+    'v_shift': 0.0,
+    'use_custom_texture_res': True,
+    'show_pixel_grid': False,
+}
+
+_RESOLUTION_NUMBERS = {res[0]: res[3] for res in RESOLUTIONS}
+
+# proj_settings values that are copied from a layout.
+_SETTINGS_KEYS = ('throw_ratio', 'power', 'h_shift', 'v_shift',
+                  'use_custom_texture_res', 'show_pixel_grid')
+
+
+def _build_template():
+    """
+    Build the master spot light and camera data-blocks once.
+    Every projector created by create_many() gets a .copy() of these.
+    """
+    spot_data = bpy.data.lights.new('Projector.Spot', 'SPOT')
+    spot_data.spot_size = math.pi - 0.001
+    spot_data.spot_blend = 0
+    spot_data.shadow_soft_size = 0.0
+    spot_data.cycles.use_multiple_importance_sampling = False
+
+    build_root_tree(spot_data)
+
+    cam_data = bpy.data.cameras.new('Projector')
+    cam_data.lens_unit = 'FOV'
+    cam_data.sensor_width = 10
+    cam_data.display_size = 1
+    return spot_data, cam_data
+
+
+def _apply_layout(cam, layout):
+    """ Fill transform and proj_settings of a new projector without triggering update callbacks. """
+    cam.location = layout['location']
+    cam.rotation_euler = layout['rotation']
+
+    proj_settings = cam.proj_settings
+    # Assigning ID properties directly does not call the update callbacks.
+    # The recompute pass at the end of create_many() computes all derived values in one go.
+    for key in _SETTINGS_KEYS:
+        proj_settings[key] = layout[key]
+    # Enum ID properties store the item number.
+    resolution = layout['resolution']
+    if resolution not in _RESOLUTION_NUMBERS:
+        # Any 'WIDTHxHEIGHT' string that is not in the dropdown becomes a custom resolution.
+        width, height = resolution.split('x')
+        proj_settings['custom_width'] = int(width)
+        proj_settings['custom_height'] = int(height)
+        resolution = 'custom'
+    proj_settings['resolution'] = _RESOLUTION_NUMBERS[resolution]
+
+
+def create_many(layouts, context=None, collection=None):
+    """
+    Create one projector per layout and return the projector (camera) objects.
+
+    A layout is a dict with any of the keys in LAYOUT_DEFAULTS. Missing keys use the
+    same defaults as projectors created through the 'projector.create' operator.
+    Nothing in here goes through bpy.ops, so no undo steps are pushed per projector;
+    when called from an operator the whole batch is a single undo step.
+    """
+    context = context if context else bpy.context
+    collection = collection if collection else context.scene.collection
+    layouts = [dict(LAYOUT_DEFAULTS, **layout) for layout in layouts]
+    if not layouts:
+        return []
+
+    spot_template, cam_template = _build_template()
+
+    projectors = []
+    try:
+        for layout in layouts:
+            cam = bpy.data.objects.new(layout['name'], cam_template.copy())
+            spot = bpy.data.objects.new('Projector.Spot', spot_template.copy())
+            spot.scale = (.01, .01, .01)
+            spot.hide_select = True
+            spot[ADDON_ID.format('spot')] = True
+            spot.parent = cam
+            collection.objects.link(cam)
+            collection.objects.link(spot)
+
+            registry.add(cam)
+            _apply_layout(cam, layout)
+            projectors.append(cam)
+    finally:
+        bpy.data.lights.remove(spot_template)
+        bpy.data.cameras.remove(cam_template)
+
+    # A single, vectorized recompute pass over all new projectors.
+    scheduler.run_many([(cam, scheduler.ALL) for cam in projectors])
+
+    log.debug(f'Created {len(projectors)} projectors.')
+    return projectors
+
+
+class PROJECTOR_OT_create_many(bpy.types.Operator):
+    """Create a projector for every selected object, placed at the object's transform"""
+    bl_idname = 'projector.create_many'
+    bl_label = 'Create Projectors at Selected'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        return context.mode == 'OBJECT' and bool(context.selected_objects)
+
+    def execute(self, context):
+        layouts = []
+        for obj in context.selected_objects:
+            layouts.append({
+                'location': obj.matrix_world.to_translation(),
+                'rotation': obj.matrix_world.to_euler(),
+            })
+        projectors = create_many(layouts, context)
+        self.report({'INFO'}, f'Created {len(projectors)} projectors')
+        return {'FINISHED'}
+
+
+def register():
+    bpy.utils.register_class(PROJECTOR_OT_create_many)
+
+
+def unregister():
+    bpy.utils.unregister_class(PROJECTOR_OT_create_many)
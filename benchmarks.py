@@ -0,0 +1,60 @@
+"""
+Benchmarks for the Projectors addon. Run them inside Blender, e.g. through `python cmd.py bench`
+or directly with: blender --addons Projectors --factory-startup -b -P benchmarks.py
+"""
+import importlib
+import time
+
+import bpy
+
+api = importlib.import_module('Projectors.api')
+
+SIZES = (10, 25, 50, 100, 200)
+# Creating projectors through the operator is slow, so only measure the smaller sizes.
+OPERATOR_SIZES = (10, 25, 50)
+
+
+def clear_scene():
+    for obj in list(bpy.data.objects):
+        bpy.data.objects.remove(obj, do_unlink=True)
+    for light in list(bpy.data.lights):
+        bpy.data.lights.remove(light)
+    for cam in list(bpy.data.cameras):
+        bpy.data.cameras.remove(cam)
+
+
+def grid_layouts(n):
+    return [{'location': (i % 20 * 2.0, i // 20 * 2.0, 3.0), 'rotation': (1.4, 0.0, 0.0)}
+            for i in range(n)]
+
+
+def time_create_many(n):
+    clear_scene()
+    start = time.perf_counter()
+    api.create_many(grid_layouts(n))
+    return time.perf_counter() - start
+
+
+def time_operator(n):
+    clear_scene()
+    start = time.perf_counter()
+    for layout in grid_layouts(n):
+        bpy.context.scene.cursor.location = layout['location']
+        bpy.ops.projector.create()
+    return time.perf_counter() - start
+
+
+def bench_creation():
+    print('Projector creation')
+    print(f"{'N':>6} {'create_many [s]':>16} {'per proj [ms]':>14} {'operator [s]':>13} {'speedup':>8}")
+    for n in SIZES:
+        t_api = time_create_many(n)
+        t_op = time_operator(n) if n in OPERATOR_SIZES else None
+        op_col = f'{t_op:13.3f}' if t_op is not None else f"{'-':>13}"
+        speedup = f'{t_op / t_api:7.1f}x' if t_op is not None else f"{'-':>8}"
+        print(f'{n:6d} {t_api:16.3f} {t_api / n * 1000:14.2f} {op_col} {speedup}')
+    clear_scene()
+
+
+if __name__ == '__main__':
+    bench_creation()
@@ -58,37 +58,48 @@ class CMD(object):
         """ This function allows running the test suite agains different version of Blender.
         !!MacOS only!!
         """
-        versions_dir = versions_dir if versions_dir else blender_versions_dir
-        binaries = blender_binaries(versions_dir)
-
-        # 1) Mimic the Blender User Script directory.
-        # 2) Copy the addon into the temporally created structure.
-        # 3) Use the BLENDER_USER_SCRIPTS environment variable to point Blender to the created scripts directory.
-        with tempfile.TemporaryDirectory() as tempdir:
-            tempdir = Path(tempdir)
-            addon_dir = tempdir / 'scripts' / 'addons' / 'Projectors'
-            addon_dir.mkdir(parents=True)
-            scripts_dir = addon_dir.parent.parent
-            # Copy addon into temp dir.
-            copy_tree(str(Path(__file__).parent), str(addon_dir))
-
-            # Set the environment variable to the temp scripts dir.
-            os.environ['BLENDER_USER_SCRIPTS'] = str(scripts_dir)
-            log.debug(
-                f'BLENDER_USER_SCRIPTS: {os.environ.get("BLENDER_USER_SCRIPTS")}')
-
-            # Run the tests against all Blender versions.
-            for name, path in binaries.items():
-                print('\n'*3)
-                log.info(f'Testing against: {name}')
-                print('=='*50)
-                subprocess.run([str(path.resolve()), '--addons',
-                                'Projectors', '--factory-startup', '-noaudio', '-b', '-P', 'tests.py'])
-
-        log.debug(f'Temp dir { tempdir } was deleted: {not tempdir.exists()}')
-
+        run_in_blender('tests.py', versions_dir)
         return 'Finished Testing'
 
+    def bench(self, versions_dir=None):
+        """ Run the benchmarks (benchmarks.py) against different version of Blender.
+        !!MacOS only!!
+        """
+        run_in_blender('benchmarks.py', versions_dir)
+        return 'Finished Benchmarking'
+
+
+def run_in_blender(script, versions_dir=None):
+    """ Run a python script with the addon enabled in every Blender version found in versions_dir. """
+    versions_dir = versions_dir if versions_dir else blender_versions_dir
+    binaries = blender_binaries(versions_dir)
+
+    # 1) Mimic the Blender User Script directory.
+    # 2) Copy the addon into the temporally created structure.
+    # 3) Use the BLENDER_USER_SCRIPTS environment variable to point Blender to the created scripts directory.
+    with tempfile.TemporaryDirectory() as tempdir:
+        tempdir = Path(tempdir)
+        addon_dir = tempdir / 'scripts' / 'addons' / 'Projectors'
+        addon_dir.mkdir(parents=True)
+        scripts_dir = addon_dir.parent.parent
+        # Copy addon into temp dir.
+        copy_tree(str(Path(__file__).parent), str(addon_dir))
+
+        # Set the environment variable to the temp scripts dir.
+        os.environ['BLENDER_USER_SCRIPTS'] = str(scripts_dir)
+        log.debug(
+            f'BLENDER_USER_SCRIPTS: {os.environ.get("BLENDER_USER_SCRIPTS")}')
+
+        # Run the script against all Blender versions.
+        for name, path in binaries.items():
+            print('\n'*3)
+            log.info(f'Running {script} against: {name}')
+            print('=='*50)
+            subprocess.run([str(path.resolve()), '--addons',
+                            'Projectors', '--factory-startup', '-noaudio', '-b', '-P', script])
+
+    log.debug(f'Temp dir { tempdir } was deleted: {not tempdir.exists()}')
+
 
 if __name__ == '__main__':
     fire.Fire(CMD)
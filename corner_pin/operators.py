@@ -267,12 +267,8 @@ class CORNER_PIN_OT_test_effect(bpy.types.Operator):
             corner_pin_node = node_tree.nodes.new('ShaderNodeGroup')
             corner_pin_node.name = 'Corner Pin'
             
-            if 'CornerPinCorrection' in bpy.data.node_groups:
-                corner_pin_node.node_tree = bpy.data.node_groups['CornerPinCorrection']
-            else:
-                from . import nodes
-                nodes.create_corner_pin_node_group()
-                corner_pin_node.node_tree = bpy.data.node_groups['CornerPinCorrection']
+            from . import nodes
+            corner_pin_node.node_tree = nodes.create_corner_pin_node_group()
         
         # 텍스처 벡터 연결 시도
         texture_vector = None
@@ -310,10 +306,9 @@ class CORNER_PIN_OT_test_effect(bpy.types.Operator):
                 try:
                     # 코너 위치 업데이트 - 극단적인 값으로 설정하여 변화가 눈에 띄게 함
                     if cp.enabled:
-                        corner_pin_node.inputs[1].default_value = (0.2, 1.0, 0.0)  # Top Left
-                        corner_pin_node.inputs[2].default_value = (0.8, 1.0, 0.0)  # Top Right
-                        corner_pin_node.inputs[3].default_value = (0.0, 0.0, 0.0)  # Bottom Left
-                        corner_pin_node.inputs[4].default_value = (1.0, 0.0, 0.0)  # Bottom Right
+                        from . import nodes
+                        # Top Left, Top Right, Bottom Left, Bottom Right
+                        nodes.set_corner_values(corner_pin_node, [(0.2, 1.0), (0.8, 1.0), (0.0, 0.0), (1.0, 0.0)])
                     else:
                         self.report({'WARNING'}, "Corner pin is not enabled")
                 except Exception as e:
@@ -3,10 +3,11 @@
 import bpy
 from bpy.props import FloatVectorProperty, BoolProperty, PointerProperty, StringProperty, EnumProperty
 
+from . import nodes
+
 def update_corner_pin(self, context):
     """코너 핀 설정 변경 시 노드 업데이트"""
-    print(f"update_corner_pin called: {self}")
-    
+
     # 무한 재귀 방지 플래그
     if getattr(update_corner_pin, '_is_updating', False):
         return
@@ -14,6 +15,16 @@ def update_corner_pin(self, context):
     update_corner_pin._is_updating = True
     
     try:
+        # 코너 값만 바뀐 경우 (이미 연결된 코너 핀 노드): 캐시된 노드에 값만 기록
+        if self.enabled:
+            from .. import handles
+            rig = handles.get(self.id_data)
+            corner_pin_node = rig.corner_pin if rig else None
+            if (corner_pin_node and rig.image_vector.is_linked
+                    and rig.image_vector.links[0].from_node == corner_pin_node
+                    and nodes.set_corner_values(corner_pin_node, nodes.corner_values(self))):
+                return
+
         obj = context.active_object
         if not obj or not hasattr(obj, 'corner_pin'):
             print("No active object with corner_pin attribute")
@@ -44,7 +55,7 @@ def update_corner_pin(self, context):
         for node in node_tree.nodes:
             if node.name == 'Group':
                 group_node = node
-            elif node.bl_idname == 'ShaderNodeTexImage':
+            elif node.bl_idname == 'ShaderNodeTexImage' and node.name == 'Image Texture':
                 image_texture_node = node
             elif node.name == 'Corner Pin':
                 corner_pin_node = node
@@ -67,6 +78,14 @@ def update_corner_pin(self, context):
         if not texture_vector_output:
             print("texture vector output not found")
             return
+
+        # 렌즈 시뮬레이션이나 워프 그리드가 켜진 경우 보정된 좌표 (Lens LUT, Warp)가 코너 핀의 입력
+        from .. import handles
+        from ..projector import corrected_texture_vector
+        rig = handles.get(obj)
+        if rig:
+            texture_vector_output = corrected_texture_vector(obj, rig)
+            group_node = texture_vector_output.node
         
         # Vector 입력 찾기
         vector_input = None
@@ -123,12 +142,7 @@ def update_corner_pin(self, context):
                 corner_pin_node.name = 'Corner Pin'
                 
                 # 노드 그룹 생성 또는 가져오기
-                node_group_name = 'CornerPinCorrection'
-                if node_group_name not in bpy.data.node_groups:
-                    from . import nodes
-                    nodes.create_corner_pin_node_group()
-                
-                corner_pin_node.node_tree = bpy.data.node_groups[node_group_name]
+                corner_pin_node.node_tree = nodes.create_corner_pin_node_group()
                 
                 # 노드 위치 설정
                 corner_pin_node.location = (
@@ -158,10 +172,7 @@ def update_corner_pin(self, context):
             
             # 3. 코너 값 설정
             try:
-                corner_pin_node.inputs[1].default_value = (self.top_left[0], self.top_left[1], 0.0)
-                corner_pin_node.inputs[2].default_value = (self.top_right[0], self.top_right[1], 0.0)
-                corner_pin_node.inputs[3].default_value = (self.bottom_left[0], self.bottom_left[1], 0.0)
-                corner_pin_node.inputs[4].default_value = (self.bottom_right[0], self.bottom_right[1], 0.0)
+                nodes.set_corner_values(corner_pin_node, nodes.corner_values(self))
                 print("  - Corner values set successfully")
             except Exception as e:
                 print(f"  - Error setting corner values: {e}")
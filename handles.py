@@ -0,0 +1,158 @@
+"""
+Cached handles to the nodes of a projector rig.
+
+Finding the spot light of a projector and the nodes in its node tree means walking the
+children of the camera and scanning nodes and sockets by name or type. The update
+functions run on every slider step, so the result of that search is cached per projector.
+
+A cache entry is only trusted while the node tree still has the same nodes. Any change of
+the topology (a node added or removed in the node editor, the corner pin switched on or
+off, ...) changes the stamp and the handles are looked up again. If a required node is
+missing the root tree of the projector is rebuilt (see repair()).
+"""
+import logging
+
+import bpy
+
+log = logging.getLogger(name=__file__)
+
+# projector.as_pointer() -> RigHandles
+_cache = {}
+
+
+def _stamp(node_tree):
+    """ Cheap fingerprint of the nodes in a tree. New nodes are appended at the end. """
+    nodes = node_tree.nodes
+    count = len(nodes)
+    return count, nodes[-1].as_pointer() if count else 0
+
+
+class RigHandles:
+    """ Nodes and sockets of one projector rig that the update functions write to. """
+    __slots__ = ('projector', 'spot', 'node_tree', 'stamp',
+                 'group', 'image', 'emission', 'output', 'pixel_grid', 'corner_pin',
+                 'blend', 'blend_mask', 'black_mask', 'lens', 'lens_lut', 'warp', 'warp_map',
+                 'texture_vector', 'image_vector', 'image_color', 'emission_color', 'output_surface')
+
+    def __init__(self, projector, spot):
+        self.projector = projector
+        self.spot = spot
+        self.node_tree = spot.data.node_tree
+        self.stamp = _stamp(self.node_tree)
+
+        nodes = self.node_tree.nodes
+        self.group = nodes.get('Group')
+        self.image = nodes.get('Image Texture')
+        self.emission = nodes.get('Emission')
+        self.pixel_grid = nodes.get('pixel_grid')
+        self.corner_pin = nodes.get('Corner Pin')
+        self.blend = nodes.get('Edge Blend')
+        self.blend_mask = nodes.get('Blend Mask')
+        self.black_mask = nodes.get('Black Level Mask')
+        self.lens = nodes.get('Lens')
+        self.lens_lut = nodes.get('Lens LUT')
+        self.warp = nodes.get('Warp')
+        self.warp_map = nodes.get('Warp Map')
+        self.output = nodes.get('Light Output')
+        if not self.output:
+            self.output = next((n for n in nodes if n.bl_idname == 'ShaderNodeOutputLight'), None)
+
+        self.texture_vector = self.group.outputs.get('texture vector') if self.group else None
+        self.image_vector = self.image.inputs.get('Vector') if self.image else None
+        self.image_color = self.image.outputs.get('Color') if self.image else None
+        self.emission_color = self.emission.inputs.get('Color') if self.emission else None
+        self.output_surface = self.output.inputs.get('Surface') if self.output else None
+
+    @property
+    def complete(self):
+        """ True if every node and socket a projector needs was found. Corner pin, edge blend, lens and warp are optional. """
+        return all(handle is not None for handle in (
+            self.group, self.image, self.emission, self.output, self.pixel_grid,
+            self.texture_vector, self.image_vector, self.image_color,
+            self.emission_color, self.output_surface))
+
+    def is_current(self, projector):
+        """ Check that the handles still describe the rig of projector. """
+        try:
+            return (self.spot.parent == projector
+                    and self.spot.data.node_tree == self.node_tree
+                    and _stamp(self.node_tree) == self.stamp)
+        except ReferenceError:
+            # The spot light was removed.
+            return False
+
+
+def _find_spot(projector):
+    for child in projector.children:
+        if child.type == 'LIGHT':
+            return child
+    return None
+
+
+def repair(projector, spot):
+    """
+    Rebuild the root node tree of a projector whose nodes are missing and schedule a full
+    recompute of its derived values.
+    """
+    from . import projector as proj
+    from . import scheduler
+    log.warning(f'Repairing the node tree of projector {projector.name}')
+    proj.build_root_tree(spot.data)
+    scheduler.mark(projector, scheduler.ALL)
+
+
+def get(projector, allow_repair=True):
+    """
+    Return the RigHandles of projector or None if the projector has no spot light.
+    Pass allow_repair=False where data can't be written, e.g. in Panel.draw(); an incomplete
+    rig is returned as None then.
+    """
+    key = projector.as_pointer()
+    rig = _cache.get(key)
+    if rig is not None and rig.is_current(projector):
+        return rig
+
+    _cache.pop(key, None)
+    spot = _find_spot(projector)
+    if not spot:
+        return None
+    if spot.data.node_tree is None or not RigHandles(projector, spot).complete:
+        if not allow_repair:
+            return None
+        repair(projector, spot)
+    rig = RigHandles(projector, spot)
+    _cache[key] = rig
+    return rig
+
+
+def invalidate(projector=None):
+    """ Forget the handles of one projector or of all projectors. """
+    if projector is None:
+        _cache.clear()
+    else:
+        _cache.pop(projector.as_pointer(), None)
+
+
+@bpy.app.handlers.persistent
+def on_file_changed(*_):
+    """ Node references don't survive loading a file or restoring an undo step. """
+    _cache.clear()
+
+
+_HANDLERS = (
+    bpy.app.handlers.load_pre,
+    bpy.app.handlers.undo_pre,
+    bpy.app.handlers.redo_pre,
+)
+
+
+def register():
+    for handlers in _HANDLERS:
+        handlers.append(on_file_changed)
+
+
+def unregister():
+    for handlers in _HANDLERS:
+        if on_file_changed in handlers:
+            handlers.remove(on_file_changed)
+    _cache.clear()
@@ -23,15 +23,14 @@ def random_color(alpha=False):
 
 def get_projectors(context, only_selected=False):
     """ Get all or only the selected projectors from the scene. """
-    objs = context.selected_objects if only_selected else context.scene.objects
+    from . import registry
     projectors = []
-    for obj in objs:
-        if obj.type == 'CAMERA' and obj.name.startswith('Projector'):
-            if only_selected:
-                if obj.select_get():
-                    projectors.append(obj)
-            else:
+    for obj in registry.projectors():
+        if only_selected:
+            if obj.select_get():
                 projectors.append(obj)
+        elif registry.in_scene(obj, context.scene):
+            projectors.append(obj)
     return projectors
 
 
@@ -44,6 +43,18 @@ def get_projector(context):
         return None
 
 
+def get_active_projector(context):
+    """
+    Return the active object if it is a selected projector, also when other projectors are
+    selected too. It is the projector whose changes are copied to the others.
+    """
+    from . import registry
+    obj = context.active_object
+    if obj and obj.get(registry.ID_KEY) and registry.get(obj[registry.ID_KEY]) == obj and obj.select_get():
+        return obj
+    return None
+
+
 def auto_offset():
     offset = 0
 
@@ -0,0 +1,34 @@
+"""
+Images the addon writes pixel by pixel, like the edge blend masks and the warp maps.
+
+Generated images only exist in memory and are lost when the file is closed. The modules
+writing them tag them with mark(); one save_pre handler packs every tagged image that
+changed into the blend file.
+"""
+import bpy
+
+# Custom property marking generated images.
+GENERATED_KEY = 'projectors_generated'
+
+
+def mark(image):
+    """ Tag an image as generated, so its pixels are packed when the file is saved. """
+    if not image.get(GENERATED_KEY):
+        image[GENERATED_KEY] = True
+    return image
+
+
+@bpy.app.handlers.persistent
+def pack_generated(*_):
+    for image in bpy.data.images:
+        if image.get(GENERATED_KEY) and image.is_dirty:
+            image.pack()
+
+
+def register():
+    bpy.app.handlers.save_pre.append(pack_generated)
+
+
+def unregister():
+    if pack_generated in bpy.app.handlers.save_pre:
+        bpy.app.handlers.save_pre.remove(pack_generated)
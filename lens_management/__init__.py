@@ -1,8 +1,24 @@
+"""
+Lens catalogue and lens selection for projectors.
+
+The database and the lens finder don't need Blender and can be imported from plain
+Python; the panels, properties and operators are loaded when bpy is available.
+"""
+try:
+    import bpy
+except ImportError:
+    bpy = None
+
 from . import database
-from . import panel
-from . import properties
-from . import operators
-from . import manager_panel  # 새로 추가
+
+if bpy is not None:
+    from . import panel
+    from . import properties
+    from . import operators
+    from . import manager_panel  # 새로 추가
+    from . import finder_panel
+    from . import chart_panel
+    from . import watcher
 
 def register():
     print("lens_management.__init__.register() called")
@@ -10,10 +26,18 @@ def register():
     operators.register()
     panel.register()
     manager_panel.register()  # 새로 추가
+    finder_panel.register()
+    chart_panel.register()
+    watcher.register()
     print("lens_management.__init__.register() completed")
 
 def unregister():
+    # 저널에 남은 렌즈 편집을 파일에 반영
+    database.lens_db.flush()
+    watcher.unregister()
+    chart_panel.unregister()
+    finder_panel.unregister()
     manager_panel.unregister()  # 새로 추가
     panel.unregister()
     operators.unregister()
-    properties.unregister()
\ No newline at end of file
+    properties.unregister()
@@ -0,0 +1,134 @@
+"""
+Catalogue of projector bodies and the lenses that fit them.
+
+The bodies are in database/bodies, one JSON file per manufacturer next to the lens files:
+
+    {"EB-PU1007W": {"lumens": 7000, "resolution": "1920x1200",
+                    "lenses": {"Epson": ["ELPLX01", "ELPLU03", ...]}}}
+
+The files are small and loaded together. Loading builds the join index between bodies and
+lenses in both directions: the lenses of a body by lens manufacturer, to filter the lens
+enums, and the bodies of a lens, to show where it fits. Neither needs to look at the lens
+catalogue.
+"""
+import json
+import logging
+from collections import namedtuple
+from pathlib import Path
+
+log = logging.getLogger(name=__file__)
+
+# One projector body. resolution is "<width>x<height>", lenses {lens manufacturer: [model]}.
+Body = namedtuple('Body', 'manufacturer model lumens resolution lenses')
+
+
+def body_id(manufacturer, model):
+    """Identifier of a body, as used by the body enum and stored on projectors."""
+    return f"{manufacturer}/{model}"
+
+
+def parse_resolution(resolution):
+    """(width, height) of a resolution like "1920x1200" or [1920, 1200], None if there is none."""
+    if isinstance(resolution, str):
+        resolution = resolution.lower().split('x')
+    try:
+        width, height = (int(value) for value in resolution)
+    except (TypeError, ValueError):
+        return None
+    return width, height
+
+
+class BodyCatalogue:
+    """Projector bodies with an index of the compatible lenses in both directions."""
+
+    def __init__(self, bodies_dir=None):
+        self.bodies_dir = Path(bodies_dir) if bodies_dir else Path(__file__).parent / "database" / "bodies"
+        self.generation = 0  # Bumped whenever the files are (re)loaded
+        self._mtimes = None
+        self.bodies = {}  # body id -> Body
+        self.lenses_of = {}  # body id -> {lens manufacturer: frozenset of models}
+        self.bodies_of = {}  # (lens manufacturer, model) -> [body id]
+
+    def _stat(self):
+        if not self.bodies_dir.is_dir():
+            return {}
+        return {path.name: path.stat().st_mtime for path in self.bodies_dir.glob("*.json")}
+
+    def _load(self, mtimes):
+        bodies = {}
+        for name in sorted(mtimes):
+            path = self.bodies_dir / name
+            manufacturer = path.stem.capitalize()
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                log.error(f"Error loading projector bodies from {path}: {e}")
+                continue
+            for model, specs in data.items():
+                lenses = {lens_manufacturer.capitalize(): sorted(models)
+                          for lens_manufacturer, models in specs.get('lenses', {}).items()}
+                bodies[body_id(manufacturer, model)] = Body(
+                    manufacturer, model, specs.get('lumens'), specs.get('resolution'), lenses)
+
+        self.bodies = bodies
+        self.lenses_of = {}
+        self.bodies_of = {}
+        for key, body in bodies.items():
+            self.lenses_of[key] = {lens_manufacturer: frozenset(models)
+                                   for lens_manufacturer, models in body.lenses.items()}
+            for lens_manufacturer, models in body.lenses.items():
+                for model in models:
+                    self.bodies_of.setdefault((lens_manufacturer, model), []).append(key)
+        self._mtimes = mtimes
+        self.generation += 1
+
+    def _ensure(self):
+        if self._mtimes is None:
+            self._load(self._stat())
+
+    def reload_changed(self):
+        """Reload the bodies if a file changed, was added or removed. Returns True if it did."""
+        if self._mtimes is None:
+            return False
+        mtimes = self._stat()
+        if mtimes == self._mtimes:
+            return False
+        self._load(mtimes)
+        return True
+
+    def get_bodies(self):
+        """All bodies sorted by manufacturer and model."""
+        self._ensure()
+        return sorted(self.bodies.values(), key=lambda body: (body.manufacturer, body.model))
+
+    def get_body(self, key):
+        self._ensure()
+        return self.bodies.get(key)
+
+    def compatible_manufacturers(self, key):
+        """Lens manufacturers with lenses for a body, None if the body isn't known (no filter)."""
+        self._ensure()
+        lenses = self.lenses_of.get(key)
+        return None if lenses is None else set(lenses)
+
+    def compatible_models(self, key, lens_manufacturer):
+        """Models of a lens manufacturer that fit a body, None if the body isn't known (no filter)."""
+        self._ensure()
+        lenses = self.lenses_of.get(key)
+        if lenses is None:
+            return None
+        return lenses.get(lens_manufacturer, frozenset())
+
+    def fits(self, key, lens_manufacturer, model):
+        """Whether a lens fits a body; every lens fits an unknown body."""
+        models = self.compatible_models(key, lens_manufacturer)
+        return models is None or model in models
+
+    def bodies_for_lens(self, lens_manufacturer, model):
+        """The bodies a lens fits."""
+        self._ensure()
+        return [self.bodies[key] for key in self.bodies_of.get((lens_manufacturer, model), ())]
+
+
+body_catalogue = BodyCatalogue()
@@ -0,0 +1,179 @@
+# lens_management/chart_panel.py
+import bpy
+from bpy.types import Panel, Operator, PropertyGroup
+from bpy.props import EnumProperty, FloatProperty, IntProperty, StringProperty, PointerProperty
+from .database import lens_db
+from .charts import chart_widths, catalogue_chart, export_chart, get_chart
+
+# Lenses listed in the preview table, the export has all of them.
+PREVIEW_ROWS = 12
+
+_manufacturer_items = (None, [])
+
+
+def get_manufacturers(self, context):
+    """제조사 목록 (목록이 바뀔 때만 다시 만듦, Blender가 문자열을 참조하므로 리스트를 유지해야 함)"""
+    global _manufacturer_items
+    key = (id(lens_db), lens_db.list_generation)
+    if _manufacturer_items[0] != key:
+        items = [('ALL', "All Manufacturers", "Chart every lens of the catalogue")]
+        items += [(m, m, "") for m in sorted(lens_db.get_manufacturers())]
+        _manufacturer_items = (key, items)
+    return _manufacturer_items[1]
+
+
+class LensChartProperties(PropertyGroup):
+    width_min: FloatProperty(
+        name="Smallest Width",
+        description="Smallest image width of the chart",
+        default=2.0,
+        min=0.01,
+        subtype='DISTANCE',
+        unit='LENGTH'
+    )
+    width_max: FloatProperty(
+        name="Largest Width",
+        description="Largest image width of the chart",
+        default=10.0,
+        min=0.01,
+        subtype='DISTANCE',
+        unit='LENGTH'
+    )
+    steps: IntProperty(
+        name="Widths",
+        description="Number of image widths from the smallest to the largest",
+        default=5,
+        min=1,
+        soft_max=8,
+        max=100
+    )
+    aspect_width: IntProperty(
+        name="Aspect Width",
+        description="Width of the aspect ratio of the image",
+        default=16,
+        min=1
+    )
+    aspect_height: IntProperty(
+        name="Aspect Height",
+        description="Height of the aspect ratio of the image",
+        default=9,
+        min=1
+    )
+    manufacturer: EnumProperty(
+        name="Manufacturer",
+        description="Lenses to chart",
+        items=get_manufacturers
+    )
+
+    def chart_args(self):
+        """(widths, aspect, manufacturer) of the chart for charts.get_chart()."""
+        manufacturer = None if self.manufacturer in ('ALL', '') else self.manufacturer
+        return (chart_widths(self.width_min, max(self.width_min, self.width_max), self.steps),
+                self.aspect_height / self.aspect_width, manufacturer)
+
+
+class LENS_OT_export_throw_chart(Operator):
+    """모든 렌즈의 투사 거리 표를 CSV 또는 JSON 파일로 내보내기"""
+    bl_idname = "lens.export_throw_chart"
+    bl_label = "Export Throw Chart"
+    bl_options = {'REGISTER'}
+
+    filepath: StringProperty(
+        name="File Path",
+        description="CSV 또는 JSON 파일 경로 (확장자로 형식 결정)",
+        default="",
+        subtype='FILE_PATH'
+    )
+
+    filter_glob: StringProperty(
+        default="*.csv;*.json",
+        options={'HIDDEN'}
+    )
+
+    def execute(self, context):
+        chart = catalogue_chart(lens_db, *context.scene.lens_chart.chart_args())
+        if not len(chart):
+            self.report({'ERROR'}, "No lenses with a throw ratio to chart")
+            return {'CANCELLED'}
+        try:
+            export_chart(chart, self.filepath)
+        except OSError as e:
+            self.report({'ERROR'}, f"Could not write the throw chart: {e}")
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Exported the throw chart of {len(chart)} lenses to {self.filepath}")
+        return {'FINISHED'}
+
+    def invoke(self, context, event):
+        if not self.filepath:
+            self.filepath = "throw_chart.csv"
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+
+class LENS_PT_chart_panel(Panel):
+    bl_label = "Throw Chart"
+    bl_idname = "LENS_PT_chart_panel"
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_category = "Lens Manager"
+    bl_context = "objectmode"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        layout = self.layout
+        settings = context.scene.lens_chart
+
+        col = layout.column(align=True)
+        col.use_property_split = True
+        col.use_property_decorate = False
+        col.prop(settings, "manufacturer")
+        col.prop(settings, "width_min")
+        col.prop(settings, "width_max")
+        col.prop(settings, "steps")
+        row = col.row(align=True)
+        row.prop(settings, "aspect_width", text="Aspect")
+        row.prop(settings, "aspect_height", text="")
+
+        chart = get_chart(lens_db, *settings.chart_args())
+        box = layout.box()
+        if not len(chart):
+            box.label(text="No lenses with a throw ratio", icon='INFO')
+            return
+
+        # 표: 렌즈마다 한 줄, 화면 너비마다 최소-최대 투사 거리
+        col = box.column(align=True)
+        row = col.row(align=True)
+        row.label(text="Lens / Width")
+        for width, height in zip(chart.widths, chart.heights):
+            row.label(text=f"{width:0.2f} x {height:0.2f}")
+        for (manufacturer, model), distance in zip(chart.names[:PREVIEW_ROWS], chart.distance[:PREVIEW_ROWS]):
+            row = col.row(align=True)
+            row.label(text=model if settings.manufacturer != 'ALL' else f"{manufacturer} {model}")
+            for distance_min, distance_max in distance:
+                if distance_min == distance_max:
+                    row.label(text=f"{distance_min:0.2f}")
+                else:
+                    row.label(text=f"{distance_min:0.2f}-{distance_max:0.2f}")
+        if len(chart) > PREVIEW_ROWS:
+            col.label(text=f"... {len(chart) - PREVIEW_ROWS} more lenses in the export")
+
+        layout.operator("lens.export_throw_chart", icon='EXPORT')
+
+
+classes = (
+    LensChartProperties,
+    LENS_OT_export_throw_chart,
+    LENS_PT_chart_panel,
+)
+
+
+def register():
+    for cls in classes:
+        bpy.utils.register_class(cls)
+    bpy.types.Scene.lens_chart = PointerProperty(type=LensChartProperties)
+
+
+def unregister():
+    del bpy.types.Scene.lens_chart
+    for cls in reversed(classes):
+        bpy.utils.unregister_class(cls)
@@ -0,0 +1,134 @@
+"""
+Throw distance charts: how far from the screen every lens of the catalogue has to be for a
+range of image widths, and how far its lens shift moves the image there.
+
+A lens with the throw ratio range [throw_min, throw_max] projects an image width W wide
+from W * throw_min to W * throw_max away. A shift of s percent moves the image by s percent
+of its width (horizontal) or height (vertical). All lenses and widths are computed at
+once as (lenses, widths) arrays from the limits of the lens finder index, so a chart of the
+full catalogue costs a few array multiplications.
+"""
+import csv
+import json
+from collections import namedtuple
+
+import numpy as np
+
+from .finder import get_index
+
+# Columns of the CSV export, one row per lens and image width. Lengths are in the unit of
+# the widths, shifts in percent.
+CSV_COLUMNS = ('manufacturer', 'model', 'image_width', 'image_height', 'throw_ratio_min', 'throw_ratio_max',
+               'distance_min', 'distance_max', 'h_offset_min', 'h_offset_max', 'v_offset_min', 'v_offset_max')
+
+
+# Decimals of the exported values; a tenth of a millimeter for widths in meters.
+DECIMALS = 4
+
+
+def chart_widths(width_min, width_max, steps):
+    """steps image widths from width_min to width_max."""
+    return np.linspace(width_min, width_max, max(1, int(steps)))
+
+
+class ThrowChart(namedtuple('ThrowChart', 'names limits widths heights distance h_offset v_offset')):
+    """
+    Throw distances and shift offsets of N lenses at W image widths.
+        names      [(manufacturer, model)] of the lenses
+        limits     (N, 6) throw ratio and shift ranges, see finder.lens_limits()
+        widths     (W,) image widths, heights (W,) the matching image heights
+        distance   (N, W, 2) minimum and maximum throw distance
+        h_offset   (N, W, 2) horizontal image offset at the minimum and maximum shift
+        v_offset   (N, W, 2) vertical image offset at the minimum and maximum shift
+    """
+    __slots__ = ()
+
+    def __len__(self):
+        return len(self.names)
+
+    def rows(self):
+        """The chart as CSV rows, see CSV_COLUMNS."""
+        lens_count, width_count = self.distance.shape[:2]
+        # All numbers of a row side by side in one (N * W, 10) array.
+        values = np.concatenate((
+            np.broadcast_to(self.widths[:, np.newaxis], (lens_count, width_count, 1)),
+            np.broadcast_to(self.heights[:, np.newaxis], (lens_count, width_count, 1)),
+            np.broadcast_to(self.limits[:, np.newaxis, :2], (lens_count, width_count, 2)),
+            self.distance, self.h_offset, self.v_offset), axis=2)
+        values = np.round(values, DECIMALS).reshape(-1, 10).tolist()
+        names = [name for name in self.names for _ in range(width_count)]
+        return [(*name, *value) for name, value in zip(names, values)]
+
+    def to_dict(self):
+        """The chart as JSON data, one entry per lens with its values per image width."""
+        limits = self.limits.tolist()
+        distance, h_offset, v_offset = (np.round(values, DECIMALS).tolist()
+                                        for values in (self.distance, self.h_offset, self.v_offset))
+        return {
+            'image_widths': np.round(self.widths, DECIMALS).tolist(),
+            'image_heights': np.round(self.heights, DECIMALS).tolist(),
+            'lenses': [{'manufacturer': manufacturer, 'model': model,
+                        'throw_ratio': limit[:2], 'h_shift_range': limit[2:4], 'v_shift_range': limit[4:],
+                        'distance': distance[i], 'h_offset': h_offset[i], 'v_offset': v_offset[i]}
+                       for i, ((manufacturer, model), limit) in enumerate(zip(self.names, limits))]
+        }
+
+
+def throw_chart(names, limits, widths, aspect):
+    """
+    Chart of lenses with limits (see finder.lens_limits()) for image widths and an aspect
+    ratio (height / width).
+    """
+    limits = np.asarray(limits, dtype=np.float64).reshape(-1, 6)
+    widths = np.atleast_1d(np.asarray(widths, dtype=np.float64))
+    heights = widths * aspect
+    # (N, 1, 2) ranges against (W, 1) sizes broadcast to (N, W, 2).
+    throw, h_shift, v_shift = (limits[:, np.newaxis, i:i + 2] for i in (0, 2, 4))
+    return ThrowChart(list(names), limits, widths, heights,
+                      throw * widths[:, np.newaxis],
+                      h_shift / 100 * widths[:, np.newaxis],
+                      v_shift / 100 * heights[:, np.newaxis])
+
+
+def catalogue_chart(lens_db, widths, aspect, manufacturer=None):
+    """Chart of all lenses with a throw ratio of a LensDatabase, or of one manufacturer."""
+    index = get_index(lens_db)
+    names, limits = index.names, index.limits
+    if manufacturer:
+        selected = [i for i, name in enumerate(names) if name[0] == manufacturer]
+        names, limits = [names[i] for i in selected], limits[selected]
+    return throw_chart(names, limits, widths, aspect)
+
+
+_last = (None, None)  # (key, chart) of the last chart
+
+
+def get_chart(lens_db, widths, aspect, manufacturer=None):
+    """catalogue_chart(), repeated requests for the same chart (every redraw) are free."""
+    global _last
+    widths = tuple(float(width) for width in np.atleast_1d(widths))
+    key = (id(lens_db), lens_db.generation, widths, float(aspect), manufacturer)
+    if _last[0] != key:
+        _last = (key, catalogue_chart(lens_db, widths, aspect, manufacturer))
+    return _last[1]
+
+
+def write_csv(chart, path):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_COLUMNS)
+        writer.writerows(chart.rows())
+
+
+def write_json(chart, path):
+    # dumps() encodes in one go, dump() writes every small piece on its own.
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(chart.to_dict(), ensure_ascii=False))
+
+
+def export_chart(chart, path):
+    """Write a chart to a .json file, or to a CSV file for any other extension."""
+    if str(path).lower().endswith('.json'):
+        write_json(chart, path)
+    else:
+        write_csv(chart, path)
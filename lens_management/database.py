@@ -1,47 +1,142 @@
 import json
 import os
-import bpy
 from pathlib import Path
-import time
+
+import numpy as np
+
+from .importer import parse_throw
+from .journal import Journal, COMPACT_EVERY
 
 class LensDatabase:
-    def __init__(self):
-        self.manufacturers = {}
-        self.cache = {}  # 캐싱을 위한 딕셔너리
+    """렌즈 데이터베이스 - 제조사별 JSON 파일을 처음 사용할 때 하나씩 로드
+    
+    생성 시에는 아무 파일도 읽지 않습니다. 제조사 목록은 database 폴더의 파일 이름에서
+    얻고, 제조사의 렌즈 데이터는 그 제조사가 처음 조회될 때 파싱합니다.
+    """
+    def __init__(self, database_dir=None):
+        self.database_dir = Path(database_dir) if database_dir else Path(__file__).parent / "database"
+        self._files = None  # 제조사 이름 -> JSON 파일 (처음 사용할 때 스캔)
+        self._loaded = {}  # 로드된 제조사의 렌즈 데이터
         self.last_load_time = {}  # 각 파일별 마지막 로드 시간
+        self.generation = 0  # 데이터가 바뀔 때마다 증가 (인덱스 무효화용)
+        self.list_generation = 0  # 제조사 목록이 바뀐 generation
+        self._generations = {}  # 제조사 이름 -> 그 제조사의 데이터가 바뀐 generation
+        self._base_generation = 0  # 모든 제조사가 바뀐 generation (새로고침)
+        self._journals = {}  # 제조사 이름 -> 편집 저널
+    
+    def _touch(self, *manufacturers, listed=False):
+        """데이터 변경 기록 - generation을 증가시켜 인덱스와 캐시를 무효화
+        
+        Args:
+            manufacturers: 데이터가 바뀐 제조사들 (없으면 모든 제조사)
+            listed (bool): 제조사 목록이 바뀌었는지 여부
+        """
+        self.generation += 1
+        for manufacturer in manufacturers:
+            self._generations[manufacturer] = self.generation
+        if not manufacturers and not listed:
+            self._base_generation = self.generation
+            listed = True
+        if listed:
+            self.list_generation = self.generation
+    
+    def manufacturer_generation(self, manufacturer):
+        """제조사의 데이터가 마지막으로 바뀐 generation - 캐시가 이 값과 같으면 아직 유효"""
+        return max(self._generations.get(manufacturer, 0), self._base_generation)
+    
+    def _scan(self):
+        """database 폴더의 제조사 파일 목록 (파일은 파싱하지 않음)"""
+        if self._files is None:
+            self._files = {}
+            if self.database_dir.exists():
+                for json_file in self.database_dir.glob("*.json"):
+                    self._files[json_file.stem.capitalize()] = json_file
+        return self._files
+    
+    def _known(self):
+        """파일이 있거나 메모리에 추가된 모든 제조사 이름"""
+        return set(self._scan()) | set(self._loaded)
+    
+    def _file(self, manufacturer):
+        """제조사의 JSON 파일 경로"""
+        return self.database_dir / f"{manufacturer.lower()}.json"
+    
+    def _journal(self, manufacturer):
+        """제조사 파일의 편집 저널"""
+        if manufacturer not in self._journals:
+            self._journals[manufacturer] = Journal(self._file(manufacturer))
+        return self._journals[manufacturer]
+    
+    def _record(self, manufacturer, entry):
+        """편집 하나를 저널에 추가 - 파일 전체를 다시 쓰지 않고, 편집이 쌓이면 백그라운드에서 압축"""
+        self._touch(manufacturer)
+        journal = self._journal(manufacturer)
+        try:
+            journal.append(entry)
+        except OSError as e:
+            print(f"Error journaling lens edit, saving the whole file: {e}")
+            self._save_manufacturer_data(manufacturer)
+            return
+        if journal.entries >= COMPACT_EVERY:
+            journal.compact(self._loaded[manufacturer], on_written=self._written)
+    
+    def _written(self, json_file):
+        """압축된 파일의 로드 시간 기록 (파일이 외부에서 바뀐 것으로 보지 않도록)"""
+        self.last_load_time[json_file.stem.capitalize()] = os.path.getmtime(json_file)
+    
+    def flush(self):
+        """저널에 남은 편집을 모두 제조사 파일에 반영"""
+        for manufacturer, journal in self._journals.items():
+            journal.wait()
+            if journal.entries and manufacturer in self._loaded:
+                journal.compact(self._loaded[manufacturer], background=False, on_written=self._written)
+            journal.close()
+    
+    def _get(self, manufacturer):
+        """제조사의 렌즈 데이터 - 아직 로드되지 않았으면 지금 로드, 없는 제조사면 None"""
+        if manufacturer in self._loaded:
+            return self._loaded[manufacturer]
+        json_file = self._scan().get(manufacturer)
+        if json_file is None:
+            return None
+        self.load_manufacturer_database(json_file)
+        return self._loaded.get(manufacturer)
+    
+    @property
+    def manufacturers(self):
+        """모든 제조사의 렌즈 데이터 (전체 로드가 필요한 경우에만 사용)"""
         self.load_all_databases()
+        return self._loaded
     
     def load_all_databases(self):
-        """모든 제조사의 렌즈 데이터베이스를 로드"""
-        database_dir = Path(__file__).parent / "database"
-        if not database_dir.exists():
-            database_dir.mkdir(exist_ok=True)
-            
-        for json_file in database_dir.glob("*.json"):
-            self.load_manufacturer_database(json_file)
+        """아직 로드되지 않은 모든 제조사의 렌즈 데이터베이스를 로드"""
+        for manufacturer, json_file in list(self._scan().items()):
+            if manufacturer not in self._loaded:
+                self.load_manufacturer_database(json_file)
     
     def load_manufacturer_database(self, json_file):
         """특정 제조사의 렌즈 데이터베이스를 로드"""
         manufacturer = json_file.stem.capitalize()
         file_mtime = os.path.getmtime(json_file)
         
-        # 파일이 수정되지 않았고 캐시에 있으면 캐시 사용
+        # 파일이 수정되지 않았고 이미 로드되어 있으면 그대로 사용
         if manufacturer in self.last_load_time and file_mtime <= self.last_load_time[manufacturer]:
-            if manufacturer in self.cache:
-                self.manufacturers[manufacturer] = self.cache[manufacturer]
-                print(f"Using cached data for {manufacturer}")
+            if manufacturer in self._loaded:
                 return
         
         try:
             with open(json_file, 'r', encoding='utf-8') as f:
                 data = json.load(f)
-                # 데이터 표준화 처리
-                standardized_data = self.standardize_lens_data(data)
-                self.manufacturers[manufacturer] = standardized_data
-                # 캐시 업데이트
-                self.cache[manufacturer] = standardized_data
+                # 데이터 표준화 처리 후 저널의 편집 적용
+                models = self.standardize_lens_data(data)
+                journal = self._journal(manufacturer)
+                pending = journal.replay(models)
+                self._loaded[manufacturer] = models
                 self.last_load_time[manufacturer] = file_mtime
-                print(f"Loaded lens database for {manufacturer}")
+                self._touch(manufacturer)
+                if pending:
+                    # 압축 중에 중단된 경우 - 복구된 데이터를 바로 저장
+                    journal.compact(models, background=False, on_written=self._written)
         except json.JSONDecodeError as e:
             self.handle_json_error(json_file, e)
         except Exception as e:
@@ -52,8 +147,10 @@ class LensDatabase:
         error_msg = f"Error in {json_file.name}: {str(error)}"
         # 콘솔에 오류 메시지 출력
         print(error_msg)
-        # 가능하다면 블렌더 UI에 오류 메시지 표시
+        # 가능하다면 블렌더 UI에 오류 메시지 표시 (블렌더 밖에서는 생략)
         try:
+            import bpy
+            
             def draw(self, context):
                 self.layout.label(text=error_msg)
             
@@ -94,32 +191,72 @@ class LensDatabase:
         return standardized
     
     def parse_throw_ratio(self, ratio_str):
-        """throw ratio 문자열을 파싱하여 (최소값, 최대값) 반환"""
+        """throw ratio 문자열을 파싱하여 (최소값, 최대값) 반환 ("1.45:1", "1.45-1.8:1", "1.2 to 1.8:1" 등)"""
         try:
-            if ' to ' in ratio_str:
-                min_str, max_str = ratio_str.split(' to ')
-                min_ratio = float(min_str.split(':')[0].strip())
-                max_ratio = float(max_str.split(':')[0].strip())
-            else:
-                # "1.45:1" 형식
-                ratio = float(ratio_str.split(':')[0].strip())
-                min_ratio = max_ratio = ratio
-            return min_ratio, max_ratio
-        except:
+            return parse_throw(ratio_str)
+        except ValueError:
             # 파싱 실패 시 기본값 반환
             return 1.0, 1.0
     
     def refresh_database(self):
-        """데이터베이스를 강제로 새로고침"""
-        self.manufacturers = {}
-        self.cache = {}
+        """데이터베이스를 강제로 새로고침 - 로드된 데이터를 버리고 폴더를 다시 스캔"""
+        for journal in self._journals.values():
+            journal.wait()
+            journal.close()
+        self._journals = {}
+        self._files = None
+        self._loaded = {}
         self.last_load_time = {}
-        self.load_all_databases()
-        return len(self.manufacturers) > 0
+        self._touch()
+        return len(self._known()) > 0
+    
+    def reload_changed(self):
+        """바뀐 제조사 파일만 다시 로드 - 폴더의 파일 상태(mtime)만 확인하고 바뀐 파일만 파싱
+        
+        아직 로드되지 않은 제조사는 파일 목록만 갱신합니다 (처음 사용할 때 로드).
+        
+        Returns:
+            tuple: (데이터가 다시 로드되거나 삭제된 제조사 집합, 제조사 목록이 바뀌었는지 여부)
+        """
+        if self._files is None:
+            return set(), False  # 아직 아무것도 사용되지 않음
+        
+        current = {}
+        if self.database_dir.exists():
+            with os.scandir(self.database_dir) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".json") and entry.is_file():
+                        current[entry.name[:-len(".json")].capitalize()] = (Path(entry.path), entry.stat().st_mtime)
+        
+        changed = set()
+        listed = set(current) != set(self._files)
+        
+        # 외부에서 삭제된 파일
+        for manufacturer in set(self._files) - set(current):
+            del self._files[manufacturer]
+            self.last_load_time.pop(manufacturer, None)
+            journal = self._journals.pop(manufacturer, None)
+            if journal:
+                journal.wait()
+                journal.close()
+            if self._loaded.pop(manufacturer, None) is not None:
+                changed.add(manufacturer)
+                self._touch(manufacturer)
+        
+        for manufacturer, (json_file, mtime) in current.items():
+            self._files[manufacturer] = json_file
+            # 로드된 제조사 중 파일이 바뀐 것만 다시 파싱
+            if manufacturer in self._loaded and mtime > self.last_load_time.get(manufacturer, 0):
+                self.load_manufacturer_database(json_file)
+                changed.add(manufacturer)
+        
+        if listed:
+            self._touch(listed=True)
+        return changed, listed
     
     def get_manufacturers(self):
         """사용 가능한 제조사 목록 반환"""
-        manufacturers = sorted(self.manufacturers.keys())
+        manufacturers = sorted(self._known())
         if not manufacturers:
             # 제조사가 없는 경우 기본값 반환
             print("Warning: No manufacturers found in the database")
@@ -127,15 +264,16 @@ class LensDatabase:
     
     def get_models(self, manufacturer):
         """특정 제조사의 렌즈 모델 목록 반환"""
-        if manufacturer in self.manufacturers:
-            return sorted(self.manufacturers[manufacturer].keys())
+        models = self._get(manufacturer)
+        if models is not None:
+            return sorted(models.keys())
         return []
     
     def get_lens_profile(self, manufacturer, model):
         """특정 렌즈의 프로필 데이터 반환"""
-        if manufacturer in self.manufacturers:
-            if model in self.manufacturers[manufacturer]:
-                return self.manufacturers[manufacturer][model]
+        models = self._get(manufacturer)
+        if models is not None:
+            return models.get(model)
         return None
     
     def get_throw_ratio_limits(self, manufacturer, model):
@@ -182,11 +320,12 @@ class LensDatabase:
         Returns:
             bool: 성공 여부
         """
-        if not name or name in self.manufacturers:
+        if not name or name in self._known():
             return False
         
         # 새 제조사 데이터 초기화
-        self.manufacturers[name] = {}
+        self._loaded[name] = {}
+        self._touch(name, listed=True)
         
         # JSON 파일 생성 및 저장
         self._save_manufacturer_data(name)
@@ -203,45 +342,34 @@ class LensDatabase:
         Returns:
             bool: 성공 여부
         """
-        if not old_name or not new_name or old_name not in self.manufacturers:
+        if not old_name or not new_name:
+            return False
+        
+        models = self._get(old_name)
+        if models is None:
             return False
         
-        if new_name in self.manufacturers:
+        if new_name in self._known():
             return False  # 이미 같은 이름의 제조사가 존재
         
         # 데이터 복사
-        self.manufacturers[new_name] = self.manufacturers[old_name]
+        self._loaded[new_name] = models
         
         # 기존 제조사 삭제
-        del self.manufacturers[old_name]
-        
-        # 캐시 업데이트
-        if old_name in self.cache:
-            self.cache[new_name] = self.cache[old_name]
-            del self.cache[old_name]
+        del self._loaded[old_name]
+        self._scan().pop(old_name, None)
+        self._touch(old_name, new_name, listed=True)
         
         if old_name in self.last_load_time:
             self.last_load_time[new_name] = self.last_load_time[old_name]
             del self.last_load_time[old_name]
         
-        # 파일 시스템에서 업데이트
-        database_dir = Path(__file__).parent / "database"
-        old_file = database_dir / f"{old_name.lower()}.json"
-        new_file = database_dir / f"{new_name.lower()}.json"
-        
+        # 파일 시스템에서 업데이트 - 저널의 편집을 포함한 메모리의 데이터를 새 파일로 저장
+        self._save_manufacturer_data(new_name)
+        self._journals.pop(old_name, Journal(self._file(old_name))).discard()
+        old_file = self._file(old_name)
         if old_file.exists():
-            # 기존 파일을 새 이름으로 저장
-            with open(old_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            with open(new_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=4)
-            
-            # 기존 파일 삭제
             old_file.unlink()
-        else:
-            # 기존 파일이 없으면 새로 생성
-            self._save_manufacturer_data(new_name)
         
         return True
 
@@ -254,21 +382,20 @@ class LensDatabase:
         Returns:
             bool: 성공 여부
         """
-        if not name or name not in self.manufacturers:
+        if not name or name not in self._known():
             return False
         
         # 메모리에서 제거
-        del self.manufacturers[name]
-        
-        if name in self.cache:
-            del self.cache[name]
+        self._loaded.pop(name, None)
+        self._scan().pop(name, None)
+        self._touch(name, listed=True)
         
         if name in self.last_load_time:
             del self.last_load_time[name]
         
-        # 파일 삭제
-        database_dir = Path(__file__).parent / "database"
-        json_file = database_dir / f"{name.lower()}.json"
+        # 파일과 저널 삭제
+        self._journals.pop(name, Journal(self._file(name))).discard()
+        json_file = self._file(name)
         
         if json_file.exists():
             json_file.unlink()
@@ -277,36 +404,18 @@ class LensDatabase:
 
     def add_lens_model(self, manufacturer, model_id, specs):
         """새 렌즈 모델 추가"""
-        if not manufacturer or not model_id or manufacturer not in self.manufacturers:
+        models = self._get(manufacturer) if manufacturer and model_id else None
+        if models is None:
             return False
         
-        if model_id in self.manufacturers[manufacturer]:
+        if model_id in models:
             return False  # 이미 존재하는 모델
         
-        # 기본 렌즈 데이터 구조 생성 - 필요한 필드만 유지
-        lens_data = {
-            "specs": {
-                "throw_ratio": {
-                    "min": specs.get("throw_min", 0.8),
-                    "max": specs.get("throw_max", 1.0),
-                    "default": specs.get("throw_min", 0.8)  # default를 min과 동일하게 설정
-                },
-                "lens_shift": {
-                    "h_shift_range": [specs.get("h_shift_min", -30.0), specs.get("h_shift_max", 30.0)],
-                    "v_shift_range": [specs.get("v_shift_min", -50.0), specs.get("v_shift_max", 50.0)]
-                }
-            }
-        }
-        
-        # notes 추가 (있을 경우에만)
-        if "notes" in specs and specs["notes"]:
-            lens_data["specs"]["notes"] = specs["notes"]
-        
         # 모델 데이터 추가
-        self.manufacturers[manufacturer][model_id] = lens_data
+        models[model_id] = new_lens_data(specs)
         
-        # 파일에 저장
-        self._save_manufacturer_data(manufacturer)
+        # 저널에 기록
+        self._record(manufacturer, {"op": "set", "model": model_id, "data": models[model_id]})
         
         return True
     
@@ -324,26 +433,27 @@ class LensDatabase:
         if not manufacturer or not old_model_id or not new_model_id:
             return False
         
-        if manufacturer not in self.manufacturers:
+        models = self._get(manufacturer)
+        if models is None:
             return False  # 제조사가 존재하지 않음
         
-        if old_model_id not in self.manufacturers[manufacturer]:
+        if old_model_id not in models:
             return False  # 모델이 존재하지 않음
         
         if old_model_id == new_model_id:
             return True  # 이름이 같으면 변경 필요 없음
         
-        if new_model_id in self.manufacturers[manufacturer]:
+        if new_model_id in models:
             return False  # 이미 같은 이름의 모델이 존재
         
         # 데이터 복사
-        self.manufacturers[manufacturer][new_model_id] = self.manufacturers[manufacturer][old_model_id]
+        models[new_model_id] = models[old_model_id]
         
         # 기존 모델 데이터 삭제
-        del self.manufacturers[manufacturer][old_model_id]
+        del models[old_model_id]
         
-        # 파일에 저장
-        self._save_manufacturer_data(manufacturer)
+        # 저널에 기록
+        self._record(manufacturer, {"op": "rename", "model": old_model_id, "to": new_model_id})
         
         return True
 
@@ -358,58 +468,20 @@ class LensDatabase:
         Returns:
             bool: 성공 여부
         """
-        if not manufacturer or not model_id or manufacturer not in self.manufacturers:
+        models = self._get(manufacturer) if manufacturer and model_id else None
+        if models is None:
             return False
         
-        if model_id not in self.manufacturers[manufacturer]:
+        if model_id not in models:
             return False  # 모델이 존재하지 않음
         
         # 기존 데이터 가져오기
-        lens_data = self.manufacturers[manufacturer][model_id]
+        lens_data = models[model_id]
         
-        # specs가 없으면 생성
-        if "specs" not in lens_data:
-            lens_data["specs"] = {}
+        update_lens_data(lens_data, specs)
         
-        # throw_ratio 업데이트
-        if "throw_min" in specs or "throw_max" in specs:  # throw_default 제거
-            throw_min = specs.get("throw_min", 0.8)
-            throw_max = specs.get("throw_max", 1.0)
-            
-            lens_data["specs"]["throw_ratio"] = {
-                "min": throw_min,
-                "max": throw_max,
-                "default": throw_min  # 항상 최소값을 기본값으로 사용
-            }
-        
-        # lens_shift 업데이트
-        lens_shift = {}
-        if "h_shift_min" in specs or "h_shift_max" in specs:
-            h_min = specs.get("h_shift_min", -30.0)
-            h_max = specs.get("h_shift_max", 30.0)
-            lens_shift["h_shift_range"] = [h_min, h_max]
-        
-        if "v_shift_min" in specs or "v_shift_max" in specs:
-            v_min = specs.get("v_shift_min", -50.0)
-            v_max = specs.get("v_shift_max", 50.0)
-            lens_shift["v_shift_range"] = [v_min, v_max]
-        
-        if lens_shift:
-            if "lens_shift" not in lens_data["specs"]:
-                lens_data["specs"]["lens_shift"] = {}
-            
-            # 기존 설정 유지하며 업데이트
-            if "h_shift_range" in lens_shift:
-                lens_data["specs"]["lens_shift"]["h_shift_range"] = lens_shift["h_shift_range"]
-            if "v_shift_range" in lens_shift:
-                lens_data["specs"]["lens_shift"]["v_shift_range"] = lens_shift["v_shift_range"]
-        
-        # 메모 업데이트
-        if "notes" in specs:
-            lens_data["specs"]["notes"] = specs["notes"]
-        
-        # 파일에 저장
-        self._save_manufacturer_data(manufacturer)
+        # 저널에 기록
+        self._record(manufacturer, {"op": "set", "model": model_id, "data": lens_data})
         
         return True
 
@@ -423,42 +495,55 @@ class LensDatabase:
         Returns:
             bool: 성공 여부
         """
-        if not manufacturer or not model_id or manufacturer not in self.manufacturers:
+        models = self._get(manufacturer) if manufacturer and model_id else None
+        if models is None:
             return False
         
-        if model_id not in self.manufacturers[manufacturer]:
+        if model_id not in models:
             return False  # 모델이 존재하지 않음
         
         # 모델 삭제
-        del self.manufacturers[manufacturer][model_id]
+        del models[model_id]
         
-        # 파일에 저장
-        self._save_manufacturer_data(manufacturer)
+        # 저널에 기록
+        self._record(manufacturer, {"op": "delete", "model": model_id})
         
         return True
 
+    def add_lens_models(self, manufacturer, models):
+        """여러 렌즈 모델을 한 번에 추가 (같은 이름의 모델은 덮어쓰기, 파일은 한 번만 저장)
+        
+        Args:
+            manufacturer (str): 제조사 이름 (없으면 새로 생성)
+            models (dict): 모델 ID -> 렌즈 데이터
+        """
+        data = self._get(manufacturer)
+        if data is None:
+            data = self._loaded[manufacturer] = {}
+        data.update(models)
+        self._save_manufacturer_data(manufacturer)
+
     def _save_manufacturer_data(self, manufacturer):
-        """제조사 데이터를 JSON 파일로 저장
+        """제조사 데이터 전체를 JSON 파일로 저장 (임시 파일에 쓴 뒤 교체, 저널은 비움)
         
         Args:
             manufacturer (str): 제조사 이름
         """
-        if manufacturer not in self.manufacturers:
+        if manufacturer not in self._loaded:
             return
         
-        database_dir = Path(__file__).parent / "database"
-        if not database_dir.exists():
-            database_dir.mkdir(parents=True, exist_ok=True)
+        self._touch(manufacturer, listed=manufacturer not in self._scan())
+        if not self.database_dir.exists():
+            self.database_dir.mkdir(parents=True, exist_ok=True)
         
-        json_file = database_dir / f"{manufacturer.lower()}.json"
+        json_file = self._file(manufacturer)
         
         try:
-            with open(json_file, 'w', encoding='utf-8') as f:
-                json.dump(self.manufacturers[manufacturer], f, indent=4)
+            self._journal(manufacturer).compact(self._loaded[manufacturer], background=False,
+                                                on_written=self._written)
             
-            # 캐시 업데이트
-            self.cache[manufacturer] = self.manufacturers[manufacturer]
-            self.last_load_time[manufacturer] = os.path.getmtime(json_file)
+            # 파일 목록 업데이트
+            self._scan()[manufacturer] = json_file
         except Exception as e:
             print(f"Error saving manufacturer data: {e}")
 
@@ -485,20 +570,21 @@ class LensDatabase:
             
             # 기존 데이터 백업
             backup = None
-            if manufacturer in self.manufacturers:
-                backup = self.manufacturers[manufacturer].copy()
+            existing = self._get(manufacturer)
+            if existing is not None:
+                backup = existing.copy()
             
             # 데이터 추가
-            self.manufacturers[manufacturer] = data
+            self._loaded[manufacturer] = data
             
             # 데이터 검증
             errors = validate_lens_data(data)
             if errors:
                 # 오류가 있으면 백업 복원
-                if backup:
-                    self.manufacturers[manufacturer] = backup
+                if backup is not None:
+                    self._loaded[manufacturer] = backup
                 else:
-                    del self.manufacturers[manufacturer]
+                    del self._loaded[manufacturer]
                 
                 return False, f"Data validation failed: {', '.join(errors)}"
             
@@ -525,10 +611,9 @@ class LensDatabase:
         try:
             if manufacturer:
                 # 특정 제조사만 내보내기
-                if manufacturer not in self.manufacturers:
+                data = self._get(manufacturer)
+                if data is None:
                     return False, f"Manufacturer '{manufacturer}' not found"
-                
-                data = self.manufacturers[manufacturer]
             else:
                 # 전체 데이터베이스 내보내기
                 data = {}
@@ -546,6 +631,73 @@ class LensDatabase:
         except Exception as e:
             return False, f"Export failed: {str(e)}"
 
+# 렌즈 데이터 생성/수정 유틸리티 함수 (편집 UI의 specs 형식: throw_min, h_shift_min, notes, ...)
+def new_lens_data(specs):
+    """편집 UI의 사양 값으로 새 렌즈 데이터 생성"""
+    # 기본 렌즈 데이터 구조 생성 - 필요한 필드만 유지
+    lens_data = {
+        "specs": {
+            "throw_ratio": {
+                "min": specs.get("throw_min", 0.8),
+                "max": specs.get("throw_max", 1.0),
+                "default": specs.get("throw_min", 0.8)  # default를 min과 동일하게 설정
+            },
+            "lens_shift": {
+                "h_shift_range": [specs.get("h_shift_min", -30.0), specs.get("h_shift_max", 30.0)],
+                "v_shift_range": [specs.get("v_shift_min", -50.0), specs.get("v_shift_max", 50.0)]
+            }
+        }
+    }
+    
+    # notes 추가 (있을 경우에만)
+    if "notes" in specs and specs["notes"]:
+        lens_data["specs"]["notes"] = specs["notes"]
+    
+    return lens_data
+
+def update_lens_data(lens_data, specs):
+    """편집 UI의 사양 값 중 주어진 것만 렌즈 데이터에 반영"""
+    # specs가 없으면 생성
+    if "specs" not in lens_data:
+        lens_data["specs"] = {}
+    
+    # throw_ratio 업데이트
+    if "throw_min" in specs or "throw_max" in specs:  # throw_default 제거
+        throw_min = specs.get("throw_min", 0.8)
+        throw_max = specs.get("throw_max", 1.0)
+        
+        lens_data["specs"]["throw_ratio"] = {
+            "min": throw_min,
+            "max": throw_max,
+            "default": throw_min  # 항상 최소값을 기본값으로 사용
+        }
+    
+    # lens_shift 업데이트
+    lens_shift = {}
+    if "h_shift_min" in specs or "h_shift_max" in specs:
+        h_min = specs.get("h_shift_min", -30.0)
+        h_max = specs.get("h_shift_max", 30.0)
+        lens_shift["h_shift_range"] = [h_min, h_max]
+    
+    if "v_shift_min" in specs or "v_shift_max" in specs:
+        v_min = specs.get("v_shift_min", -50.0)
+        v_max = specs.get("v_shift_max", 50.0)
+        lens_shift["v_shift_range"] = [v_min, v_max]
+    
+    if lens_shift:
+        if "lens_shift" not in lens_data["specs"]:
+            lens_data["specs"]["lens_shift"] = {}
+        
+        # 기존 설정 유지하며 업데이트
+        if "h_shift_range" in lens_shift:
+            lens_data["specs"]["lens_shift"]["h_shift_range"] = lens_shift["h_shift_range"]
+        if "v_shift_range" in lens_shift:
+            lens_data["specs"]["lens_shift"]["v_shift_range"] = lens_shift["v_shift_range"]
+    
+    # 메모 업데이트
+    if "notes" in specs:
+        lens_data["specs"]["notes"] = specs["notes"]
+
 # 렌즈 데이터 검증 유틸리티 함수
 def validate_lens_data(lens_data):
     """렌즈 데이터의 유효성을 검사하고 필수 필드가 있는지 확인"""
@@ -579,8 +731,21 @@ def validate_lens_data(lens_data):
     
     return errors
 
-# 전역 인스턴스 생성
-lens_db = LensDatabase()
+def open_database(path=None):
+    """렌즈 데이터베이스 열기 - SQLite 파일이면 SQLite 백엔드, 아니면 JSON 폴더
+    
+    경로가 없으면 database 폴더를 사용하고, 그 안에 lenses.sqlite가 있으면 그것을 사용합니다.
+    """
+    path = Path(path) if path else Path(__file__).parent / "database"
+    if path.is_dir() and (path / "lenses.sqlite").exists():
+        path = path / "lenses.sqlite"
+    if path.suffix in (".sqlite", ".sqlite3", ".db"):
+        from .sqlite_backend import SQLiteLensDatabase
+        return SQLiteLensDatabase(path)
+    return LensDatabase(path)
+
+# 전역 인스턴스 생성 (파일은 처음 사용할 때 로드)
+lens_db = open_database(os.environ.get("PROJECTORS_LENS_DATABASE"))
 
 def percent_to_blender_shift(percent_value):
     """
@@ -658,38 +823,44 @@ def focal_length_to_throw_ratio(focal_length, sensor_width=35.0):
     """
     초점 거리를 throw ratio로 변환
     throw_ratio = focal_length / sensor_width
+    배열을 받으면 모든 값을 한 번에 변환 (NumPy 브로드캐스팅)
     
     Parameters:
-    focal_length (float): 렌즈의 초점 거리 (mm)
-    sensor_width (float): 카메라 센서의 너비 (mm), 기본값은 35mm
+    focal_length (float 또는 배열): 렌즈의 초점 거리 (mm)
+    sensor_width (float 또는 배열): 카메라 센서의 너비 (mm), 기본값은 35mm
     
     Returns:
-    float: 계산된 throw ratio
+    float 또는 배열: 계산된 throw ratio
     """
-    if focal_length <= 0 or sensor_width <= 0:
-        return 1.0  # 기본값
-    return focal_length / sensor_width
+    focal_length, sensor_width = np.broadcast_arrays(np.asarray(focal_length, dtype=np.float64),
+                                                     np.asarray(sensor_width, dtype=np.float64))
+    valid = (focal_length > 0) & (sensor_width > 0)
+    # 잘못된 값은 기본값 1.0
+    throw_ratio = np.where(valid, focal_length / np.where(valid, sensor_width, 1.0), 1.0)
+    return float(throw_ratio) if throw_ratio.ndim == 0 else throw_ratio
 
 def throw_ratio_to_focal_length(throw_ratio, sensor_width=35.0):
     """
     throw ratio를 초점 거리로 변환
     focal_length = throw_ratio * sensor_width
+    배열을 받으면 모든 값을 한 번에 변환 (NumPy 브로드캐스팅)
     
     Parameters:
-    throw_ratio (float): 렌즈의 throw ratio
-    sensor_width (float): 카메라 센서의 너비 (mm), 기본값은 35mm
+    throw_ratio (float 또는 배열): 렌즈의 throw ratio
+    sensor_width (float 또는 배열): 카메라 센서의 너비 (mm), 기본값은 35mm
     
     Returns:
-    float: 계산된 초점 거리 (mm)
+    float 또는 배열: 계산된 초점 거리 (mm)
     """
-    if throw_ratio <= 0:
-        return 35.0  # 기본값
-    return throw_ratio * sensor_width
+    throw_ratio = np.asarray(throw_ratio, dtype=np.float64)
+    # 잘못된 값은 기본값 35mm
+    focal_length = np.where(throw_ratio > 0, throw_ratio * np.asarray(sensor_width, dtype=np.float64), 35.0)
+    return float(focal_length) if focal_length.ndim == 0 else focal_length
 
 def apply_optical_properties(profile, projector_obj):
     """
     렌즈 프로필의 광학 특성을 프로젝터 객체에 적용
-    현재는 정보 표시만 하고 실제 시뮬레이션에는 미적용
+    왜곡과 비네팅은 Simulate Lens가 켜진 프로젝터에서 렌즈 룩업 텍스처로 시뮬레이션됨
     
     Parameters:
     profile (dict): 렌즈 프로필 데이터
@@ -701,13 +872,10 @@ def apply_optical_properties(profile, projector_obj):
     if not profile or not projector_obj:
         return False
         
-    if 'optical_properties' in profile:
-        opt_props = profile['optical_properties']
-        
-        # 현재는 정보만 저장하고 실제 시뮬레이션에는 미적용
-        # 향후 노드 기반 왜곡 시뮬레이션 등을 위한 준비
-        projector_obj['lens_distortion'] = opt_props.get('distortion', 0.0)
-        projector_obj['lens_chromatic_aberration'] = opt_props.get('chromatic_aberration', 0.0)
-        projector_obj['lens_vignetting'] = opt_props.get('vignetting', 0.0)
+    # 광학 특성이 없는 렌즈는 이상적인 렌즈로 취급 (이전 렌즈의 값이 남지 않도록)
+    opt_props = profile.get('optical_properties', {})
+    projector_obj['lens_distortion'] = opt_props.get('distortion', 0.0)
+    projector_obj['lens_chromatic_aberration'] = opt_props.get('chromatic_aberration', 0.0)
+    projector_obj['lens_vignetting'] = opt_props.get('vignetting', 0.0)
         
     return True
\ No newline at end of file
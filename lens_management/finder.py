@@ -0,0 +1,178 @@
+"""
+Find the lenses that fit an installation: a throw distance, an image width and a lens shift.
+
+The image of a lens at throw distance D is D / throw_ratio wide, so a width W needs the
+throw ratio D / W. A lens fits when that throw ratio lies in its zoom range and the shifts
+lie in its shift ranges.
+
+LensIndex is an interval index over the throw ratio ranges of all lenses of all
+manufacturers. The throw ratio axis is cut into buckets at the quantiles of the range
+ends, and every bucket lists the lenses whose range overlaps it. A query only checks the
+lenses of the bucket of the requested throw ratio, their shift ranges are compared as
+arrays. A throw ratio range [low, high] (with a tolerance) adds the lenses
+starting inside it, a slice of the lenses sorted by their minimum throw ratio.
+"""
+import bisect
+from collections import namedtuple
+
+import numpy as np
+
+# One lens that fits a query.
+#   throw_ratio   throw ratio to set on the lens, the requested one clamped to the zoom range
+#   throw_error   relative distance of the requested throw ratio to the zoom range, 0 inside
+#   shift_usage   largest fraction of a shift range the requested shift needs, 0 to 1
+Match = namedtuple('Match', 'manufacturer model throw_ratio throw_min throw_max throw_error shift_usage')
+
+# Number of buckets of the throw ratio axis. More buckets hold fewer lenses each, but a zoom
+# lens is listed in every bucket its range overlaps.
+BUCKET_COUNT = 64
+
+
+def lens_limits(profile):
+    """(throw_min, throw_max, h_min, h_max, v_min, v_max) of a lens profile, None without a throw ratio."""
+    specs = (profile or {}).get('specs', {})
+    throw_ratio = specs.get('throw_ratio')
+    if isinstance(throw_ratio, dict):
+        if 'min' not in throw_ratio:
+            return None
+        throw_min = float(throw_ratio['min'])
+        throw_max = float(throw_ratio.get('max', throw_min))
+    elif isinstance(throw_ratio, (int, float)):
+        throw_min = throw_max = float(throw_ratio)
+    else:
+        return None
+    # Lenses without shift data can't shift.
+    shift = specs.get('lens_shift', {})
+    h_min, h_max = shift.get('h_shift_range', (0.0, 0.0))
+    v_min, v_max = shift.get('v_shift_range', (0.0, 0.0))
+    return (min(throw_min, throw_max), max(throw_min, throw_max),
+            float(h_min), float(h_max), float(v_min), float(v_max))
+
+
+class LensIndex:
+    """Interval index over the throw ratio and shift ranges of a list of lenses."""
+
+    def __init__(self, names, limits):
+        """names is a list of (manufacturer, model), limits a matching (N, 6) array of lens_limits()."""
+        self.names = list(names)
+        self.limits = limits = np.asarray(limits, dtype=np.float64).reshape(-1, 6)
+        throw_min, throw_max = limits[:, 0], limits[:, 1]
+
+        # Bucket edges at the quantiles of the range ends, so all buckets hold about the same
+        # number of lenses whatever the distribution of the catalogue.
+        ends = np.concatenate((throw_min, throw_max))
+        if len(ends):
+            self.edges = np.unique(np.quantile(ends, np.linspace(0, 1, BUCKET_COUNT + 1)[1:-1]))
+        else:
+            self.edges = np.zeros(0)
+        first = np.searchsorted(self.edges, throw_min, side='right')
+        last = np.searchsorted(self.edges, throw_max, side='right')
+        # Compressed lists of the lenses per bucket: bucket b holds lenses[offsets[b]:offsets[b + 1]].
+        counts = last - first + 1
+        lenses = np.repeat(np.arange(len(self.names)), counts)
+        buckets = np.repeat(first - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        order = np.argsort(buckets, kind='stable')
+        self.lenses = lenses[order]
+        self.offsets = np.searchsorted(buckets[order], np.arange(len(self.edges) + 2))
+        # The limits are stored in the order of both lists as (6, M) arrays, so a query reads
+        # contiguous slices instead of scattered rows.
+        self.bucket_limits = np.ascontiguousarray(limits[self.lenses].T)
+        self.by_min = np.argsort(throw_min, kind='stable')
+        self.min_limits = np.ascontiguousarray(limits[self.by_min].T)
+
+    @classmethod
+    def from_database(cls, lens_db):
+        """Index all lenses of all manufacturers of a LensDatabase."""
+        if hasattr(lens_db, 'lens_rows'):
+            # The SQLite backend has the limits in columns.
+            rows = lens_db.lens_rows()
+            return cls([row[:2] for row in rows], [row[2:] for row in rows])
+        names = []
+        limits = []
+        for manufacturer in lens_db.get_manufacturers():
+            for model in lens_db.get_models(manufacturer):
+                lens = lens_limits(lens_db.get_lens_profile(manufacturer, model))
+                if lens is not None:
+                    names.append((manufacturer, model))
+                    limits.append(lens)
+        return cls(names, limits)
+
+    def __len__(self):
+        return len(self.names)
+
+    def candidates(self, low, high):
+        """Indices and (6, M) limits of the lenses whose throw ratio range overlaps [low, high]."""
+        # The lenses reaching low, from the one bucket around low ...
+        bucket = bisect.bisect_right(self.edges, low)
+        start, stop = self.offsets[bucket], self.offsets[bucket + 1]
+        limits = self.bucket_limits[:, start:stop]
+        reach = (limits[0] <= low) & (limits[1] >= low)
+        index, limits = self.lenses[start:stop][reach], limits[:, reach]
+        if high <= low:
+            return index, limits
+        # ... and the lenses starting above low, a slice of the lenses sorted by throw_min.
+        start = np.searchsorted(self.min_limits[0], low, side='right')
+        stop = np.searchsorted(self.min_limits[0], high, side='right')
+        return (np.concatenate((index, self.by_min[start:stop])),
+                np.concatenate((limits, self.min_limits[:, start:stop]), axis=1))
+
+    def query(self, throw_ratio, h_shift=0.0, v_shift=0.0, tolerance=0.0, limit=None):
+        """
+        Lenses that reach throw_ratio within the relative tolerance and shift by h_shift and
+        v_shift (percent). Returns a list of Match, ranked by the throw ratio error first and
+        the shift usage second: the lenses with the most room to spare come first.
+        """
+        if not len(self.names) or throw_ratio <= 0:
+            return []
+        low, high = throw_ratio * (1 - tolerance), throw_ratio * (1 + tolerance)
+        index, limits = self.candidates(low, high)
+        throw_min, throw_max, h_min, h_max, v_min, v_max = limits
+        fits = (h_min <= h_shift) & (h_shift <= h_max) & (v_min <= v_shift) & (v_shift <= v_max)
+        if not fits.any():
+            return []
+        index, throw_min, throw_max = index[fits], throw_min[fits], throw_max[fits]
+
+        clamped = np.clip(throw_ratio, throw_min, throw_max)
+        throw_error = np.abs(clamped - throw_ratio) / throw_ratio
+        # Shift usage: the requested shift against the end of the range on its side.
+        h_limit = h_max[fits] if h_shift >= 0 else -h_min[fits]
+        v_limit = v_max[fits] if v_shift >= 0 else -v_min[fits]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            h_usage = np.where(h_limit > 0, abs(h_shift) / h_limit, 0.0)
+            v_usage = np.where(v_limit > 0, abs(v_shift) / v_limit, 0.0)
+        shift_usage = np.maximum(h_usage, v_usage)
+
+        # Lenses reaching the throw ratio (error 0) by shift usage, then the others by error.
+        rank = np.where(throw_error > 0, 1 + throw_error, shift_usage)
+        if limit is not None and limit < len(rank):
+            # Only sort the best ones.
+            best = np.argpartition(rank, limit - 1)[:limit]
+            order = best[np.argsort(rank[best], kind='stable')]
+        else:
+            order = np.argsort(rank, kind='stable')
+        return [Match(*self.names[index[i]], float(clamped[i]), float(throw_min[i]), float(throw_max[i]),
+                      float(throw_error[i]), float(shift_usage[i]))
+                for i in order]
+
+
+def required_throw_ratio(distance, width):
+    """Throw ratio that projects an image width wide from distance away."""
+    return distance / width if width > 0 else 0.0
+
+
+_index = None
+_generation = None
+
+
+def get_index(lens_db):
+    """The index of a LensDatabase, rebuilt only after the database changed."""
+    global _index, _generation
+    if _index is None or _generation != (id(lens_db), lens_db.generation):
+        _index = LensIndex.from_database(lens_db)
+        _generation = (id(lens_db), lens_db.generation)
+    return _index
+
+
+def find_lenses(lens_db, distance, width, h_shift=0.0, v_shift=0.0, tolerance=0.0, limit=None):
+    """Lenses of a LensDatabase for an image width wide at a throw distance, see LensIndex.query()."""
+    return get_index(lens_db).query(required_throw_ratio(distance, width), h_shift, v_shift, tolerance, limit)
@@ -0,0 +1,150 @@
+# lens_management/finder_panel.py
+import bpy
+from bpy.types import Panel, Operator, PropertyGroup
+from bpy.props import FloatProperty, IntProperty, StringProperty, PointerProperty
+from .database import lens_db
+from .finder import find_lenses, required_throw_ratio
+from .properties import select_lens
+
+
+class LensFinderProperties(PropertyGroup):
+    distance: FloatProperty(
+        name="Throw Distance",
+        description="Distance from the lens to the screen",
+        default=9.0,
+        min=0.01,
+        subtype='DISTANCE',
+        unit='LENGTH'
+    )
+    width: FloatProperty(
+        name="Image Width",
+        description="Width of the projected image",
+        default=6.0,
+        min=0.01,
+        subtype='DISTANCE',
+        unit='LENGTH'
+    )
+    h_shift: FloatProperty(
+        name="Horizontal Shift",
+        description="Required horizontal lens shift in percent",
+        default=0.0,
+        soft_min=-100.0,
+        soft_max=100.0,
+        subtype='PERCENTAGE'
+    )
+    v_shift: FloatProperty(
+        name="Vertical Shift",
+        description="Required vertical lens shift in percent",
+        default=0.0,
+        soft_min=-100.0,
+        soft_max=100.0,
+        subtype='PERCENTAGE'
+    )
+    tolerance: FloatProperty(
+        name="Tolerance",
+        description="Also list lenses that miss the throw ratio by up to this much",
+        default=0.0,
+        min=0.0,
+        max=50.0,
+        subtype='PERCENTAGE'
+    )
+    max_results: IntProperty(
+        name="Max Results",
+        description="Number of lenses to list",
+        default=10,
+        min=1,
+        max=100
+    )
+
+
+class LENS_OT_apply_found_lens(Operator):
+    """이 렌즈를 활성 프로젝터에 적용하고 throw ratio와 시프트를 설정"""
+    bl_idname = "lens.apply_found_lens"
+    bl_label = "Use Lens"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    manufacturer: StringProperty()
+    model: StringProperty()
+    throw_ratio: FloatProperty()
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return obj and obj.type == 'CAMERA' and obj.get('is_projector', False) and hasattr(obj, "lens_manager")
+
+    def execute(self, context):
+        obj = context.active_object
+        finder = context.scene.lens_finder
+        # 렌즈 선택 시 throw ratio와 시프트가 초기화되므로 그 뒤에 찾은 값을 설정
+        select_lens(obj.lens_manager, self.manufacturer, self.model)
+        obj.proj_settings.throw_ratio = self.throw_ratio
+        obj.proj_settings.h_shift = finder.h_shift
+        obj.proj_settings.v_shift = finder.v_shift
+        self.report({'INFO'}, f"Applied {self.manufacturer} {self.model} at throw ratio {self.throw_ratio:0.2f}:1")
+        return {'FINISHED'}
+
+
+class LENS_PT_finder_panel(Panel):
+    bl_label = "Lens Finder"
+    bl_idname = "LENS_PT_finder_panel"
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_category = "Lens Manager"
+    bl_context = "objectmode"
+
+    def draw(self, context):
+        layout = self.layout
+        finder = context.scene.lens_finder
+
+        col = layout.column(align=True)
+        col.use_property_split = True
+        col.use_property_decorate = False
+        col.prop(finder, "distance")
+        col.prop(finder, "width")
+        col.prop(finder, "h_shift")
+        col.prop(finder, "v_shift")
+        col.prop(finder, "tolerance")
+        col.prop(finder, "max_results")
+
+        throw_ratio = required_throw_ratio(finder.distance, finder.width)
+        box = layout.box()
+        box.label(text=f"Required Throw Ratio: {throw_ratio:0.2f}:1", icon='DRIVER_DISTANCE')
+
+        matches = find_lenses(lens_db, finder.distance, finder.width, finder.h_shift, finder.v_shift,
+                              finder.tolerance / 100.0, finder.max_results)
+        if not matches:
+            box.label(text="No matching lenses", icon='INFO')
+            return
+
+        col = box.column(align=True)
+        for match in matches:
+            row = col.row(align=True)
+            if match.throw_min == match.throw_max:
+                throw_range = f"{match.throw_min:0.2f}"
+            else:
+                throw_range = f"{match.throw_min:0.2f}-{match.throw_max:0.2f}"
+            icon = 'CHECKMARK' if match.throw_error == 0 else 'ERROR'
+            row.label(text=f"{match.manufacturer} {match.model} ({throw_range}:1)", icon=icon)
+            op = row.operator("lens.apply_found_lens", text="", icon='IMPORT')
+            op.manufacturer = match.manufacturer
+            op.model = match.model
+            op.throw_ratio = match.throw_ratio
+
+
+classes = (
+    LensFinderProperties,
+    LENS_OT_apply_found_lens,
+    LENS_PT_finder_panel,
+)
+
+
+def register():
+    for cls in classes:
+        bpy.utils.register_class(cls)
+    bpy.types.Scene.lens_finder = PointerProperty(type=LensFinderProperties)
+
+
+def unregister():
+    del bpy.types.Scene.lens_finder
+    for cls in reversed(classes):
+        bpy.utils.unregister_class(cls)
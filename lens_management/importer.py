@@ -0,0 +1,343 @@
+"""
+Bulk import of lens data from folders of JSON and CSV files.
+
+JSON files have the format of the database files, {model: profile}, named after the
+manufacturer, or the format of a full export, {manufacturer: {model: profile}}. CSV files
+are vendor spec sheets with one lens per row. Their header is matched against the known
+column names once per file, so a row is read by column index, and throw ratios and lens
+shifts are given as text the way spec sheets write them:
+
+    manufacturer, model,  throw ratio,    h shift,  v shift,  notes
+    Acme,         ZL-1,   1.45-1.8:1,     ±10%,     -5 to +60%, Zoom
+
+The files are read by a thread pool. Every row is validated on its own: the valid rows are
+imported, the others end up in the error report with their file, line and the reason.
+All lenses of a manufacturer are written with one save, not one per lens.
+"""
+import csv
+import json
+import logging
+import os
+import re
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+log = logging.getLogger(name=__file__)
+
+EXTENSIONS = ('.json', '.csv')
+
+# Files read at the same time. Reading is mostly waiting for the disk.
+MAX_WORKERS = 8
+
+# A row that couldn't be imported. line is None for errors of a whole file or of a JSON model.
+RowError = namedtuple('RowError', 'file line model message')
+
+# Accepted header names of the CSV columns, compared in lower case without spaces,
+# underscores, dashes and dots.
+COLUMNS = {
+    'manufacturer': ('manufacturer', 'brand', 'vendor', 'make'),
+    'model': ('model', 'modelid', 'lens', 'lensmodel', 'partnumber', 'name'),
+    'throw': ('throwratio', 'throw', 'throwratiorange'),
+    'throw_min': ('throwmin', 'throwratiomin', 'minthrow', 'minthrowratio'),
+    'throw_max': ('throwmax', 'throwratiomax', 'maxthrow', 'maxthrowratio'),
+    'h_shift': ('hshift', 'horizontalshift', 'lensshifth', 'hshiftrange', 'shifth'),
+    'h_shift_min': ('hshiftmin', 'minhshift', 'horizontalshiftmin'),
+    'h_shift_max': ('hshiftmax', 'maxhshift', 'horizontalshiftmax'),
+    'v_shift': ('vshift', 'verticalshift', 'lensshiftv', 'vshiftrange', 'shiftv'),
+    'v_shift_min': ('vshiftmin', 'minvshift', 'verticalshiftmin'),
+    'v_shift_max': ('vshiftmax', 'maxvshift', 'verticalshiftmax'),
+    'notes': ('notes', 'note', 'description', 'comment', 'comments'),
+}
+_HEADER_NAMES = {name: field for field, names in COLUMNS.items() for name in names}
+_HEADER_JUNK = re.compile(r'[\s_\-.()%]+')
+
+_NUMBER = r'[-+]?(?:\d+(?:[.,]\d*)?|[.,]\d+)'
+_RANGE = re.compile(rf'^({_NUMBER})(?:(?:-|–|—|~|to|\.\.)({_NUMBER}))?$', re.IGNORECASE)
+# ":1" after a throw ratio, but not the ":1" of a ratio like "1:1.5".
+_RATIO_SUFFIX = re.compile(r':\s*1(?![\d.,])')
+_PLUS_MINUS = re.compile(rf'^(?:±|\+/-|\+-)({_NUMBER})$')
+
+
+def _number(text):
+    return float(text.replace(',', '.'))
+
+
+def parse_range(text):
+    """(low, high) of a number or a range like "1.2-1.8", "-30 to +30" or "±50"."""
+    text = re.sub(r'\s+', '', str(text)).replace('%', '')
+    match = _PLUS_MINUS.match(text)
+    if match:
+        value = abs(_number(match.group(1)))
+        return -value, value
+    match = _RANGE.match(text)
+    if not match:
+        raise ValueError(f"can't read '{text}' as a number or range")
+    low = _number(match.group(1))
+    high = _number(match.group(2)) if match.group(2) else low
+    return min(low, high), max(low, high)
+
+
+def parse_throw(value):
+    """(min, max) of a throw ratio like 1.5, "1.45:1", "1.45-1.8:1" or "1.45:1 to 1.8:1"."""
+    if isinstance(value, (int, float)):
+        low = high = float(value)
+    elif isinstance(value, (list, tuple)):
+        low, high = sorted(map(float, value))
+    elif isinstance(value, dict):
+        if 'min' not in value:
+            raise ValueError("throw ratio has no min")
+        low = float(value['min'])
+        high = float(value.get('max', low))
+        low, high = min(low, high), max(low, high)
+    else:
+        low, high = parse_range(_RATIO_SUFFIX.sub('', str(value)))
+    if low <= 0:
+        raise ValueError(f"throw ratio {low} is not positive")
+    return low, high
+
+
+def parse_shift(value):
+    """
+    (min, max) of a lens shift in percent, like [-30, 30], "±30%", "-5 to +60%" or "0".
+    A single value other than 0 is a shift range symmetric around 0, as spec sheets write it.
+    """
+    if isinstance(value, (list, tuple)):
+        if len(value) != 2:
+            raise ValueError("shift range needs a min and a max")
+        low, high = float(value[0]), float(value[1])
+        return min(low, high), max(low, high)
+    if isinstance(value, (int, float)):
+        low = high = float(value)
+    else:
+        low, high = parse_range(value)
+    if low == high:
+        return (-abs(low), abs(low)) if low else (0.0, 0.0)
+    return low, high
+
+
+def make_profile(throw, h_shift, v_shift, notes="", extra=None):
+    """Lens profile in the database format from parsed ranges."""
+    specs = dict(extra or {})
+    specs['throw_ratio'] = {"min": throw[0], "max": throw[1], "default": throw[0]}
+    specs['lens_shift'] = {"h_shift_range": list(h_shift), "v_shift_range": list(v_shift)}
+    if notes:
+        specs['notes'] = notes
+    return {"specs": specs}
+
+
+def validate_profile(profile):
+    """A JSON lens profile converted to the database format. Raises ValueError if it isn't valid."""
+    if not isinstance(profile, dict) or not isinstance(profile.get('specs'), dict):
+        raise ValueError("missing required field 'specs'")
+    specs = profile['specs']
+    if 'throw_ratio' not in specs:
+        raise ValueError("missing required field 'throw_ratio'")
+    throw = parse_throw(specs['throw_ratio'])
+    lens_shift = specs.get('lens_shift')
+    if not isinstance(lens_shift, dict):
+        raise ValueError("missing required field 'lens_shift'")
+    for key in ('h_shift_range', 'v_shift_range'):
+        if key not in lens_shift:
+            raise ValueError(f"lens_shift missing {key}")
+    h_shift = parse_shift(lens_shift['h_shift_range'])
+    v_shift = parse_shift(lens_shift['v_shift_range'])
+    extra = {key: value for key, value in specs.items() if key not in ('throw_ratio', 'lens_shift', 'notes')}
+    result = dict(profile)
+    result.update(make_profile(throw, h_shift, v_shift, specs.get('notes', ""), extra))
+    if isinstance(specs['throw_ratio'], dict) and 'default' in specs['throw_ratio']:
+        result['specs']['throw_ratio']['default'] = float(specs['throw_ratio']['default'])
+    return result
+
+
+class RowSchema:
+    """The columns of a CSV file, matched once against the header and read by index for every row."""
+
+    def __init__(self, header):
+        self.columns = {}
+        for index, name in enumerate(header):
+            field = _HEADER_NAMES.get(_HEADER_JUNK.sub('', name.lower()))
+            if field is not None and field not in self.columns:
+                self.columns[field] = index
+        if 'model' not in self.columns:
+            raise ValueError("no model column")
+        if not {'throw', 'throw_min', 'throw_max'} & set(self.columns):
+            raise ValueError("no throw ratio column")
+
+    def value(self, row, field):
+        index = self.columns.get(field)
+        if index is None or index >= len(row):
+            return ""
+        return row[index].strip()
+
+    def range(self, row, field, parse):
+        """The range of the column pair field_min and field_max or of the single column field."""
+        low, high = self.value(row, field + '_min'), self.value(row, field + '_max')
+        if low or high:
+            low = parse_range(_RATIO_SUFFIX.sub('', low or high))[0]
+            high = parse_range(_RATIO_SUFFIX.sub('', high or low))[1]
+            return parse((low, high))
+        text = self.value(row, field)
+        if not text:
+            return None
+        return parse(text)
+
+    def parse(self, row):
+        """(manufacturer, model, profile) of a row. Raises ValueError if the row isn't valid."""
+        model = self.value(row, 'model')
+        if not model:
+            raise ValueError("no model")
+        throw = self.range(row, 'throw', parse_throw)
+        if throw is None:
+            raise ValueError("no throw ratio")
+        # Lenses without shift data can't shift.
+        h_shift = self.range(row, 'h_shift', parse_shift) or (0.0, 0.0)
+        v_shift = self.range(row, 'v_shift', parse_shift) or (0.0, 0.0)
+        return self.value(row, 'manufacturer'), model, make_profile(throw, h_shift, v_shift, self.value(row, 'notes'))
+
+
+def read_csv(path, manufacturer):
+    """Yields (manufacturer, model, profile) or a RowError for every row of a CSV file."""
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        sample = f.read(8192)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+        except csv.Error:
+            dialect = csv.excel
+        reader = csv.reader(f, dialect)
+        header = next(reader, None)
+        if header is None:
+            return
+        schema = RowSchema(header)
+        for row in reader:
+            if not any(cell.strip() for cell in row):
+                continue
+            try:
+                row_manufacturer, model, profile = schema.parse(row)
+            except ValueError as e:
+                yield RowError(path.name, reader.line_num, schema.value(row, 'model'), str(e))
+                continue
+            yield row_manufacturer or manufacturer, model, profile
+
+
+def read_json(path, manufacturer):
+    """Yields (manufacturer, model, profile) or a RowError for every model of a JSON file."""
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError("root element must be a dictionary")
+    # A full export has the manufacturers on the first level.
+    exported = data and all(isinstance(models, dict) and not isinstance(models.get('specs'), dict)
+                            and all(isinstance(profile, dict) for profile in models.values())
+                            for models in data.values())
+    catalogue = data if exported else {manufacturer: data}
+    for manufacturer, models in catalogue.items():
+        for model, profile in models.items():
+            try:
+                yield manufacturer, model, validate_profile(profile)
+            except (ValueError, TypeError) as e:
+                yield RowError(path.name, None, model, str(e))
+
+
+# Lenses and errors read from one file.
+FileResult = namedtuple('FileResult', 'path lenses errors')
+
+
+def read_file(path):
+    """Read and validate all lenses of a file, see read_csv() and read_json()."""
+    path = Path(path)
+    manufacturer = path.stem.capitalize()
+    read = read_csv if path.suffix.lower() == '.csv' else read_json
+    lenses = []
+    errors = []
+    try:
+        for item in read(path, manufacturer):
+            if isinstance(item, RowError):
+                errors.append(item)
+            else:
+                lenses.append(item)
+    except (OSError, ValueError, csv.Error) as e:
+        # Unreadable file; the rows read before the error are still imported.
+        errors.append(RowError(path.name, None, "", str(e)))
+    return FileResult(path, lenses, errors)
+
+
+def collect_files(paths):
+    """The JSON and CSV files of a list of files and folders, folders searched recursively."""
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(sorted(p for p in path.rglob('*') if p.suffix.lower() in EXTENSIONS and p.is_file()))
+        elif path.suffix.lower() in EXTENSIONS:
+            files.append(path)
+    return files
+
+
+class ImportReport:
+    """Outcome of a bulk import: the number of imported lenses per manufacturer and the rejected rows."""
+
+    def __init__(self):
+        self.files = 0
+        self.rows = 0
+        self.imported = {}
+        self.errors = []
+
+    @property
+    def imported_count(self):
+        return sum(self.imported.values())
+
+    def summary(self):
+        text = (f"Imported {self.imported_count} lenses of {len(self.imported)} manufacturers "
+                f"from {self.files} files")
+        if self.errors:
+            text += f", {len(self.errors)} rows rejected"
+        return text
+
+    def lines(self):
+        """One line per rejected row: file:line model: reason."""
+        lines = []
+        for error in self.errors:
+            where = error.file if error.line is None else f"{error.file}:{error.line}"
+            model = f" {error.model}" if error.model else ""
+            lines.append(f"{where}{model}: {error.message}")
+        return lines
+
+
+def import_paths(lens_db, paths, max_workers=MAX_WORKERS):
+    """
+    Import the lenses of JSON and CSV files and folders into a LensDatabase. Valid rows are
+    imported even if other rows of the same file aren't. Returns an ImportReport.
+    """
+    report = ImportReport()
+    files = collect_files(paths)
+    report.files = len(files)
+    if not files:
+        return report
+
+    workers = max(1, min(max_workers, len(files), (os.cpu_count() or 1) * 2))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(read_file, files))
+
+    # Merge in file order, so a later file overrides a model of an earlier one.
+    # Manufacturers are matched regardless of case: the JSON backend keys them by the
+    # capitalized file name, so "EPSON" would replace epson.json instead of adding to "Epson".
+    known = {name.lower(): name for name in lens_db.get_manufacturers()}
+    catalogue = {}
+    for result in results:
+        report.rows += len(result.lenses) + len(result.errors)
+        report.errors.extend(result.errors)
+        for manufacturer, model, profile in result.lenses:
+            manufacturer = known.setdefault(manufacturer.lower(), manufacturer.capitalize())
+            catalogue.setdefault(manufacturer, {})[model] = profile
+
+    for manufacturer, models in catalogue.items():
+        try:
+            lens_db.add_lens_models(manufacturer, models)
+        except Exception as e:
+            log.error(f"Error importing lenses of {manufacturer}: {e}")
+            report.errors.append(RowError(manufacturer, None, "", f"not saved: {e}"))
+            continue
+        report.imported[manufacturer] = len(models)
+    log.info(report.summary())
+    return report
@@ -0,0 +1,156 @@
+"""
+Append-only edit journal of one manufacturer file of the lens database.
+
+Editing a lens appends one line to <manufacturer>.json.journal instead of rewriting the
+whole manufacturer file. Loading replays the journal on top of the file. A line cut off by
+a crash is skipped.
+
+Once enough edits are journaled, the journal is compacted: the current data is written to
+the manufacturer file and the journal is emptied. The file is written to a temporary file
+next to it and renamed over it, so it is always either the old or the new file. The write
+runs in a background thread; the journal is first renamed to <...>.journal.pending, which
+is deleted once the new file is in place. Until then the pending journal is replayed too.
+
+Journal entries set, delete or rename one model. They are absolute, so replaying an entry
+that is already in the file is harmless.
+"""
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+log = logging.getLogger(name=__file__)
+
+# Compact a journal after this many edits.
+COMPACT_EVERY = 200
+
+
+def write_atomic(path, text):
+    """Replace a file with text, so that a crash leaves either the old or the new file."""
+    path = Path(path)
+    temporary = path.with_name(path.name + '.tmp')
+    with open(temporary, 'w', encoding='utf-8') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+
+def remove(path):
+    """Delete a file if it exists."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def apply(models, entry):
+    """Apply one journal entry to the models ({model: profile}) of a manufacturer."""
+    op = entry.get('op')
+    model = entry.get('model')
+    if op == 'set':
+        models[model] = entry['data']
+    elif op == 'delete':
+        models.pop(model, None)
+    elif op == 'rename':
+        if model in models:
+            models[entry['to']] = models.pop(model)
+    else:
+        log.warning(f"Unknown journal entry {entry}")
+
+
+class Journal:
+    """Edit journal of one manufacturer file."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.journal_path = self.path.with_name(self.path.name + '.journal')
+        self.pending_path = self.path.with_name(self.path.name + '.journal.pending')
+        self.entries = 0
+        self._file = None
+        self._thread = None
+
+    def append(self, entry):
+        """Record one edit; written and flushed right away."""
+        if self._file is None:
+            self._file = open(self.journal_path, 'a', encoding='utf-8')
+            # Don't continue a line that was cut off by a crash.
+            if self._file.tell() and not self.journal_path.read_bytes().endswith(b'\n'):
+                self._file.write('\n')
+        self._file.write(json.dumps(entry) + '\n')
+        self._file.flush()
+        self.entries += 1
+
+    def replay(self, models):
+        """Apply the journaled edits to models. Returns True if a pending journal was found."""
+        self.wait()
+        pending = self.pending_path.exists()
+        self.entries = 0
+        for path in (self.pending_path, self.journal_path):
+            if not path.exists():
+                continue
+            with open(path, 'r', encoding='utf-8') as f:
+                for number, line in enumerate(f, 1):
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Cut off by a crash.
+                        log.warning(f"Skipping broken line {number} of {path.name}")
+                        continue
+                    apply(models, entry)
+                    if path == self.journal_path:
+                        self.entries += 1
+        return pending
+
+    def compact(self, models, background=True, on_written=None):
+        """
+        Write models to the manufacturer file and empty the journal. on_written is called
+        with the path once the file is in place.
+        """
+        self.wait()
+        text = json.dumps(models, indent=4)
+        self.close()
+        self.entries = 0
+        if self.pending_path.exists():
+            # An earlier compaction didn't finish. The data includes its edits, write it now.
+            background = False
+        elif self.journal_path.exists():
+            os.replace(self.journal_path, self.pending_path)
+
+        def write():
+            try:
+                write_atomic(self.path, text)
+                remove(self.pending_path)
+                if not background:
+                    remove(self.journal_path)
+                if on_written:
+                    on_written(self.path)
+            except OSError as e:
+                # The pending journal is kept and replayed on the next load.
+                log.error(f"Error writing {self.path}: {e}")
+
+        if background:
+            self._thread = threading.Thread(target=write, name=f"Compact {self.path.name}", daemon=True)
+            self._thread.start()
+        else:
+            write()
+
+    def wait(self):
+        """Wait for a compaction running in the background."""
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def discard(self):
+        """Delete the journal files, after the manufacturer was deleted or renamed."""
+        self.wait()
+        self.close()
+        self.entries = 0
+        remove(self.journal_path)
+        remove(self.pending_path)
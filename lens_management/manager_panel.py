@@ -71,6 +71,7 @@ class LENS_PT_management_panel(Panel):
         row.operator("lens.import_database", icon='IMPORT')
         row.operator("lens.export_database", icon='EXPORT')
         row.operator("lens.refresh_database", icon='FILE_REFRESH')
+        box.operator("lens.bulk_import", icon='FILEBROWSER')
 
 # 제조사 선택용 Enum 속성을 위한 함수
 def get_manufacturer_items(self, context):
@@ -1,8 +1,12 @@
 # lens_management/operators.py 새로 생성:
 
+import os
+
 import bpy
 from bpy.types import Operator
 
+from .properties import select_lens
+
 class LENS_OT_apply_settings(Operator):
     """선택한 렌즈 설정을 현재 프로젝터에 적용"""
     bl_idname = "lens.apply_settings"
@@ -40,6 +44,27 @@ class LENS_OT_apply_settings(Operator):
             self.report({'ERROR'}, "Failed to apply lens settings")
             return {'CANCELLED'}
 
+class LENS_OT_select_lens(Operator):
+    """검색 결과의 렌즈 선택 - 제조사와 모델을 한 번에 설정"""
+    bl_idname = "lens.select_lens"
+    bl_label = "Select Lens"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    manufacturer: bpy.props.StringProperty()
+    model: bpy.props.StringProperty()
+    
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return obj and obj.type == 'CAMERA' and obj.get('is_projector', False) and hasattr(obj, "lens_manager")
+    
+    def execute(self, context):
+        lens_props = context.active_object.lens_manager
+        select_lens(lens_props, self.manufacturer, self.model)
+        lens_props.search = ""
+        self.report({'INFO'}, f"Selected {self.manufacturer} {self.model}")
+        return {'FINISHED'}
+
 class LENS_OT_force_within_limits(Operator):
     """렌즈 제한 범위 내로 프로젝터 설정 강제 조정"""
     bl_idname = "lens.force_within_limits"
@@ -52,50 +77,19 @@ class LENS_OT_force_within_limits(Operator):
         return obj and obj.type == 'CAMERA' and obj.get('is_projector', False)
     
     def execute(self, context):
-        obj = context.active_object
-        proj_settings = obj.proj_settings
-        
-        # 제한 값 가져오기
-        throw_min = obj.get("throw_ratio_min", None)
-        throw_max = obj.get("throw_ratio_max", None)
-        h_min = obj.get("h_shift_min", None)
-        h_max = obj.get("h_shift_max", None)
-        v_min = obj.get("v_shift_min", None)
-        v_max = obj.get("v_shift_max", None)
-        
-        changes_made = False
-        
-        # Throw Ratio 조정
-        if throw_min is not None and throw_max is not None:
-            if proj_settings.throw_ratio < throw_min:
-                proj_settings.throw_ratio = throw_min
-                changes_made = True
-            elif proj_settings.throw_ratio > throw_max:
-                proj_settings.throw_ratio = throw_max
-                changes_made = True
-        
-        # 수평 시프트 조정
-        if h_min is not None and h_max is not None:
-            if proj_settings.h_shift < h_min:
-                proj_settings.h_shift = h_min
-                changes_made = True
-            elif proj_settings.h_shift > h_max:
-                proj_settings.h_shift = h_max
-                changes_made = True
-        
-        # 수직 시프트 조정
-        if v_min is not None and v_max is not None:
-            if proj_settings.v_shift < v_min:
-                proj_settings.v_shift = v_min
-                changes_made = True
-            elif proj_settings.v_shift > v_max:
-                proj_settings.v_shift = v_max
-                changes_made = True
-        
-        # 설정 업데이트
         from .. import projector
-        projector.update_throw_ratio(proj_settings, context)
-        projector.update_lens_shift(proj_settings, context)
+        from ..helper import get_projectors
+        
+        # 선택된 모든 프로젝터를 한 번에 조정 (각 프로젝터의 렌즈 제한 적용)
+        projectors = get_projectors(context, only_selected=True) or [context.active_object]
+        
+        def current_values():
+            return [tuple(getattr(p.proj_settings, prop) for prop in projector.LIMITED_SETTINGS)
+                    for p in projectors]
+        
+        before = current_values()
+        projector.apply_optics(projectors)
+        changes_made = current_values() != before
         
         if changes_made:
             self.report({'INFO'}, "Settings adjusted to lens limits")
@@ -664,6 +658,53 @@ class LENS_OT_import_database(Operator):
         context.window_manager.fileselect_add(self)
         return {'RUNNING_MODAL'}
     
+class LENS_OT_bulk_import(Operator):
+    """폴더나 여러 JSON/CSV 파일에서 렌즈 데이터를 한 번에 가져오기 (잘못된 행은 보고서에 기록)"""
+    bl_idname = "lens.bulk_import"
+    bl_label = "Bulk Import Lenses"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    directory: bpy.props.StringProperty(
+        name="Directory",
+        subtype='DIR_PATH'
+    )
+    
+    files: bpy.props.CollectionProperty(
+        type=bpy.types.OperatorFileListElement,
+        options={'HIDDEN', 'SKIP_SAVE'}
+    )
+    
+    filter_glob: bpy.props.StringProperty(
+        default="*.json;*.csv",
+        options={'HIDDEN'}
+    )
+    
+    def execute(self, context):
+        from .database import lens_db
+        from .importer import import_paths
+        
+        # 선택한 파일이 없으면 폴더 전체 가져오기
+        paths = [os.path.join(self.directory, f.name) for f in self.files if f.name]
+        if not paths:
+            paths = [self.directory]
+        
+        report = import_paths(lens_db, paths)
+        
+        # 거부된 행은 텍스트 에디터에서 볼 수 있도록 텍스트 블록에 기록
+        if report.errors:
+            text = bpy.data.texts.get("Lens Import Report") or bpy.data.texts.new("Lens Import Report")
+            text.from_string("\n".join([report.summary(), ""] + report.lines()))
+        
+        if not report.imported:
+            self.report({'ERROR'}, report.summary())
+            return {'CANCELLED'}
+        self.report({'WARNING'} if report.errors else {'INFO'}, report.summary())
+        return {'FINISHED'}
+    
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+    
 class LENS_OT_export_database(Operator):
     """렌즈 데이터를 JSON 파일로 내보내기"""
     bl_idname = "lens.export_database"
@@ -720,17 +761,18 @@ class LENS_OT_export_database(Operator):
         layout.prop(self, "export_all")
         
 class LENS_OT_refresh_database(Operator):
-    """렌즈 데이터베이스 새로고침"""
+    """렌즈 데이터베이스 새로고침 (바뀐 파일만 다시 로드)"""
     bl_idname = "lens.refresh_database"
     bl_label = "Refresh Lens Database"
     bl_options = {'REGISTER', 'UNDO'}
     
     def execute(self, context):
         from .database import lens_db
-        success = lens_db.refresh_database()
+        from . import watcher
+        changed = watcher.check()
         
-        if success:
-            self.report({'INFO'}, "Lens database refreshed successfully")
+        if lens_db.get_manufacturers():
+            self.report({'INFO'}, f"Lens database refreshed, {len(changed)} manufacturers reloaded")
         else:
             self.report({'ERROR'}, "Failed to refresh lens database")
         
@@ -739,6 +781,7 @@ class LENS_OT_refresh_database(Operator):
 def register():
     bpy.utils.register_class(LENS_OT_apply_settings)
     bpy.utils.register_class(LENS_OT_force_within_limits)  # 이 줄을 추가해야 함
+    bpy.utils.register_class(LENS_OT_select_lens)
     
     # 새 오퍼레이터들 등록
     bpy.utils.register_class(LENS_OT_add_manufacturer)
@@ -748,6 +791,7 @@ def register():
     bpy.utils.register_class(LENS_OT_edit_model)
     bpy.utils.register_class(LENS_OT_delete_model)
     bpy.utils.register_class(LENS_OT_import_database)
+    bpy.utils.register_class(LENS_OT_bulk_import)
     bpy.utils.register_class(LENS_OT_export_database)
     bpy.utils.register_class(LENS_OT_refresh_database)
 
@@ -755,6 +799,7 @@ def unregister():
     # 새 오퍼레이터들 등록 해제
     bpy.utils.unregister_class(LENS_OT_refresh_database)
     bpy.utils.unregister_class(LENS_OT_export_database)
+    bpy.utils.unregister_class(LENS_OT_bulk_import)
     bpy.utils.unregister_class(LENS_OT_import_database)
     bpy.utils.unregister_class(LENS_OT_delete_model)
     bpy.utils.unregister_class(LENS_OT_edit_model)
@@ -762,5 +807,6 @@ def unregister():
     bpy.utils.unregister_class(LENS_OT_delete_manufacturer)
     bpy.utils.unregister_class(LENS_OT_edit_manufacturer)
     bpy.utils.unregister_class(LENS_OT_add_manufacturer)
+    bpy.utils.unregister_class(LENS_OT_select_lens)
     bpy.utils.unregister_class(LENS_OT_force_within_limits)  # 이 줄을 추가해야 함
     bpy.utils.unregister_class(LENS_OT_apply_settings)
\ No newline at end of file
@@ -1,7 +1,12 @@
 import bpy
 from bpy.types import Panel
 from .database import lens_db
+from .bodies import body_catalogue
 from . import properties
+from .search import search
+
+# 검색 결과로 표시할 렌즈 수
+SEARCH_RESULTS = 8
 
 class LENS_PT_main_panel(Panel):
     bl_label = "Lens Management"
@@ -42,6 +47,23 @@ class LENS_PT_main_panel(Panel):
         box = layout.box()
         box.label(text="Lens Information", icon='CAMERA_DATA')
         
+        # 모든 제조사에서 렌즈 검색 - 결과를 누르면 제조사와 모델을 한 번에 선택
+        box.prop(lens_props, "search", text="", icon='VIEWZOOM')
+        if lens_props.search.strip():
+            results = search(lens_db, lens_props.search, SEARCH_RESULTS)
+            col = box.column(align=True)
+            if not results:
+                col.label(text="No matching lenses", icon='INFO')
+            for result in results:
+                op = col.operator("lens.select_lens", text=f"{result.manufacturer} {result.model}", icon='CAMERA_DATA')
+                op.manufacturer = result.manufacturer
+                op.model = result.model
+            box.separator()
+        
+        # 프로젝터 본체 선택 - 맞는 렌즈만 표시하고 밝기와 해상도 적용
+        if body_catalogue.get_bodies():
+            box.prop(lens_props, "body", text="Projector")
+        
         # Manufacturer selection
         row = box.row()
         manufacturers = lens_db.get_manufacturers()
@@ -133,6 +155,12 @@ class LENS_PT_main_panel(Panel):
                     col.separator()
                     row = col.row()
                     row.label(text=f"Notes: {specs['notes']}")
+                
+                # 이 렌즈가 맞는 프로젝터 본체
+                bodies = body_catalogue.bodies_for_lens(lens_props.manufacturer, lens_props.model)
+                if bodies:
+                    col.separator()
+                    col.label(text="Fits: " + ", ".join(f"{body.manufacturer} {body.model}" for body in bodies))
                     
         # 렌즈 컨트롤 부분 수정
         if lens_props.manufacturer and lens_props.model:
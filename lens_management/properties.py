@@ -1,11 +1,73 @@
 import bpy
 from bpy.props import EnumProperty, PointerProperty, BoolProperty, StringProperty
 from .database import lens_db
+from .bodies import body_catalogue, body_id, parse_resolution
 
-# 캐싱을 위한 전역 변수
-_cached_manufacturers = None
-_cached_models = {}
-_last_update_time = 0
+# Enum 항목 캐시 - 데이터베이스의 generation과 함께 저장하고, 데이터가 바뀌었을 때만 다시 만듦
+_cached_manufacturers = (None, None)  # ((list_generation, 본체, 본체 generation), 항목)
+_cached_models = {}  # (제조사, 본체) -> ((generation, 본체 generation), 항목)
+_cached_bodies = (None, None)  # (본체 generation, 항목)
+
+# Blender는 enum 항목의 문자열을 복사하지 않으므로 돌려준 항목은 계속 참조되어 있어야 함.
+# 만든 항목 튜플을 모두 여기에 보관하고, 같은 항목은 다시 만들지 않고 재사용
+_item_pool = {}
+_NO_MODELS = [("NONE", "None", "No lens selected", 0)]
+_NO_BODY = ("NONE", "Any Projector", "Show all lenses", 0)
+
+def _pooled(items):
+    """항목 튜플을 보관소의 같은 튜플로 바꿈 - 캐시가 다시 만들어져도 이전 문자열이 해제되지 않음"""
+    return [_item_pool.setdefault(item, item) for item in items]
+
+def available_models(lens_props, manufacturer):
+    """제조사의 모델 목록 - 프로젝터 본체가 선택되어 있으면 그 본체에 맞는 렌즈만"""
+    models = lens_db.get_models(manufacturer)
+    compatible = body_catalogue.compatible_models(lens_props.body, manufacturer)
+    if compatible is None:
+        return models
+    return [m for m in models if m in compatible]
+
+def select_lens(lens_props, manufacturer, model):
+    """렌즈 선택 (검색, 렌즈 찾기, 배치 결과) - 선택된 본체에 맞지 않는 렌즈면 본체 선택을 먼저 해제
+    (제조사와 모델 enum이 본체로 걸러지므로 맞지 않는 렌즈는 그대로 설정할 수 없음)"""
+    if not body_catalogue.fits(lens_props.body, manufacturer, model):
+        lens_props.body = 'NONE'
+    # 제조사를 바꾸면 첫 번째 모델이 선택되므로 그 뒤에 모델 설정
+    lens_props.manufacturer = manufacturer
+    if lens_props.model != model:
+        lens_props.model = model
+
+def update_body(self, context):
+    """프로젝터 본체 선택 시 밝기와 해상도 설정, 맞지 않는 렌즈는 맞는 렌즈로 교체"""
+    obj = context.active_object
+    if not obj or not hasattr(obj, "proj_settings"):
+        return
+    
+    body = body_catalogue.get_body(self.body)
+    if body is None:
+        if "projector_body" in obj: del obj["projector_body"]
+        return
+    obj["projector_body"] = self.body
+    
+    # 본체의 밝기와 해상도 적용
+    proj_settings = obj.proj_settings
+    if body.lumens:
+        proj_settings.lumens = body.lumens
+    resolution = parse_resolution(body.resolution)
+    if resolution:
+        from ..projector import RESOLUTIONS
+        name = f"{resolution[0]}x{resolution[1]}"
+        if name in {item[0] for item in RESOLUTIONS}:
+            proj_settings.resolution = name
+        else:
+            proj_settings.custom_width, proj_settings.custom_height = resolution
+            proj_settings.resolution = 'custom'
+    
+    # 선택된 렌즈가 본체에 맞지 않으면 첫 번째로 맞는 렌즈 선택
+    if not body_catalogue.fits(self.body, self.manufacturer, self.model):
+        for manufacturer in lens_db.get_manufacturers():
+            if available_models(self, manufacturer):
+                self.manufacturer = manufacturer  # update_manufacturer가 첫 번째 모델 선택
+                break
 
 def update_lens_settings(self, context):
     """렌즈 선택시 프로젝터 설정 자동 업데이트"""
@@ -87,8 +149,8 @@ def update_manufacturer(self, context):
         self.has_lens_selected = False
         return
         
-    # 선택된 제조사의 모델 목록 가져오기
-    models = lens_db.get_models(self.manufacturer)
+    # 선택된 제조사의 모델 목록 가져오기 (선택된 본체에 맞는 모델만)
+    models = available_models(self, self.manufacturer)
     if models:
         # 첫 번째 모델 선택 (현재 모델 저장)
         current_model = self.model  # 현재 모델 저장
@@ -113,15 +175,19 @@ def update_manufacturer(self, context):
 
 def get_manufacturers(self, context):
     """제조사 목록을 가져오는 함수 (캐싱 기능 포함)"""
-    global _cached_manufacturers, _last_update_time
-    
-    import time
-    current_time = time.time()
+    global _cached_manufacturers
     
-    # 캐시 업데이트 간격 (1초)
-    if _cached_manufacturers is None or current_time - _last_update_time > 1.0:
+    # 제조사 목록과 선택된 본체가 바뀌지 않았으면 캐시 사용
+    key = (lens_db.list_generation, self.body, body_catalogue.generation)
+    generation, items = _cached_manufacturers
+    if generation != key:
         manufacturers = lens_db.get_manufacturers()
         
+        # 본체가 선택되어 있으면 그 본체에 맞는 렌즈가 있는 제조사만
+        compatible = body_catalogue.compatible_manufacturers(self.body)
+        if compatible is not None:
+            manufacturers = [m for m in manufacturers if m in compatible]
+        
         # "None" 옵션을 첫번째로 추가
         result = [("none", "None", "No lens selected", 0)]
         
@@ -129,24 +195,24 @@ def get_manufacturers(self, context):
         for i, m in enumerate(manufacturers):
             result.append((m, m, "", i+1))
         
-        _cached_manufacturers = result
-        _last_update_time = current_time
+        items = _pooled(result)
+        _cached_manufacturers = (key, items)
         
-    return _cached_manufacturers
+    return items
 
 def get_models(self, context):
     """선택된 제조사의 모델 목록을 가져오는 함수 (캐싱 기능 포함)"""
-    global _cached_models
-    
     manufacturer = self.manufacturer
     
     # 제조사 선택되지 않았을 때 기본 항목 제공
     if not manufacturer or manufacturer == "none":
-        return [("NONE", "None", "No lens selected", 0)]
+        return _NO_MODELS
     
-    # 캐시에 없거나 캐시 업데이트가 필요한 경우
-    if manufacturer not in _cached_models:
-        models = lens_db.get_models(manufacturer)
+    # 캐시에 없거나 제조사의 데이터 또는 본체 목록이 바뀐 경우
+    cache_key = (manufacturer, self.body)
+    generation, items = _cached_models.get(cache_key, (None, None))
+    if generation != (lens_db.manufacturer_generation(manufacturer), body_catalogue.generation):
+        models = available_models(self, manufacturer)
         
         if not models:
             result = [("NONE", "No models available", "", 0)]
@@ -154,18 +220,50 @@ def get_models(self, context):
             # 항목에 인덱스 부여 (0부터 시작)
             result = [(m, m, "", i) for i, m in enumerate(models)]
         
-        _cached_models[manufacturer] = result
+        # 모델 목록을 읽으면서 제조사가 로드될 수 있으므로 generation은 그 뒤에 기록
+        items = _pooled(result)
+        _cached_models[cache_key] = ((lens_db.manufacturer_generation(manufacturer), body_catalogue.generation), items)
     
-    return _cached_models[manufacturer]
+    return items
 
-def clear_cache():
-    """캐시 초기화 함수 - 데이터베이스 갱신 시 호출"""
-    global _cached_manufacturers, _cached_models, _last_update_time
-    _cached_manufacturers = None
+def get_bodies(self, context):
+    """프로젝터 본체 목록을 가져오는 함수 (캐싱 기능 포함)"""
+    global _cached_bodies
+    
+    bodies = body_catalogue.get_bodies()
+    generation, items = _cached_bodies
+    if generation != body_catalogue.generation:
+        result = [_NO_BODY]
+        for i, body in enumerate(bodies):
+            description = f"{body.lumens or 0:.0f} lm, {body.resolution or 'unknown resolution'}"
+            result.append((body_id(body.manufacturer, body.model), f"{body.manufacturer} {body.model}", description, i+1))
+        items = _pooled(result)
+        _cached_bodies = (body_catalogue.generation, items)
+    
+    return items
+
+def clear_cache(manufacturers=None):
+    """캐시 초기화 함수 - 캐시는 generation으로 무효화되므로 보통은 필요 없음
+    
+    manufacturers가 주어지면 그 제조사들의 모델 목록만 지웁니다.
+    """
+    global _cached_manufacturers, _cached_models
+    if manufacturers is not None:
+        for key in [key for key in _cached_models if key[0] in manufacturers]:
+            del _cached_models[key]
+        return
+    _cached_manufacturers = (None, None)
     _cached_models = {}
-    _last_update_time = 0
 
 class LensManagerProperties(bpy.types.PropertyGroup):
+    body: EnumProperty(
+        name="Projector",
+        description="Projector model; only lenses that fit it are listed, and its brightness and resolution are applied",
+        items=get_bodies,
+        update=update_body,
+        default=0
+    )
+    
     manufacturer: EnumProperty(
         name="Manufacturer",
         description="Lens manufacturer",
@@ -182,6 +280,14 @@ class LensManagerProperties(bpy.types.PropertyGroup):
         default=0  # 인덱스 0(첫 번째 항목)을 기본값으로 설정
     )
     
+    # 모든 제조사의 모델 ID와 메모에서 검색 (입력할 때마다 결과 갱신)
+    search: StringProperty(
+        name="Search",
+        description="Search lenses of all manufacturers by model, manufacturer or notes",
+        default="",
+        options={'TEXTEDIT_UPDATE'}
+    )
+    
     has_lens_selected: BoolProperty(
         name="Has Lens Selected",
         description="Whether a lens has been selected",
@@ -205,9 +311,6 @@ class LensManagerProperties(bpy.types.PropertyGroup):
         saved_model = obj.get("lens_model", "")
         
         if saved_manufacturer and saved_model:
-            # 캐시 초기화 (복원 시 최신 데이터 사용)
-            clear_cache()
-            
             # 제조사 목록 먼저 업데이트
             manufacturers = get_manufacturers(self, context)
             valid_manufacturers = [m[0] for m in manufacturers if m[0] != "NONE"]
@@ -237,9 +340,6 @@ class LensManagerProperties(bpy.types.PropertyGroup):
         self.manufacturer = 0  # 첫 번째 항목 선택
         self.model = 0  # 첫 번째 항목 선택
         self.has_lens_selected = False
-        
-        # 캐시 초기화
-        clear_cache()
 
 def register():
     try:
@@ -0,0 +1,178 @@
+"""
+Typo tolerant search of lenses by model ID, manufacturer and notes, across all manufacturers.
+
+SearchIndex is a trigram index: every word of a lens is padded as "  word " and cut into
+its three letter pieces, and every piece lists the lenses containing it. A query is cut
+the same way, but without the padding at the end, so a word that is still being typed
+matches as a prefix from its first letter on. A lens is a result when it has at least half
+of the pieces of the query, so a typo or a missing letter only costs a few pieces.
+
+Model IDs like "EB-L1500" are indexed as "eb", "l1500" and "ebl1500", to be found with
+and without the dash.
+
+The index is updated per manufacturer: get_index() compares the generation of every
+manufacturer of the database with the one it was indexed at, and only indexes the lenses
+of manufacturers that were edited or reloaded since.
+"""
+import heapq
+import math
+import re
+from collections import Counter, namedtuple
+from operator import itemgetter
+
+# One search result. score is the fraction of the query found, plus a bonus for a model
+# ID containing the query as it was typed.
+Result = namedtuple('Result', 'manufacturer model score')
+
+# Fraction of the pieces of the query a lens needs to be a result.
+MIN_SCORE = 0.5
+
+# Lenses with the most pieces ranked per result, the bonus can only reorder those.
+CANDIDATES = 5
+
+_WORD = re.compile(r'[a-z0-9]+')
+
+
+def words(text):
+    """The lower case words of a text, plus the words joined at dashes, dots and slashes."""
+    text = text.lower()
+    result = set(_WORD.findall(text))
+    for part in text.split():
+        joined = ''.join(_WORD.findall(part))
+        if joined:
+            result.add(joined)
+    return result
+
+
+def trigrams(word, end=True):
+    """Three letter pieces of a word padded with two spaces in front and one at the end."""
+    padded = '  ' + word + (' ' if end else '')
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+_trigram_cache = {}
+
+
+def _word_trigrams(word):
+    """trigrams() of an indexed word; manufacturer names and words of notes repeat a lot."""
+    grams = _trigram_cache.get(word)
+    if grams is None:
+        grams = _trigram_cache[word] = frozenset(trigrams(word))
+    return grams
+
+
+class SearchIndex:
+    """Trigram index of the lenses of a LensDatabase."""
+
+    def __init__(self):
+        self.lenses = []  # lens id -> (manufacturer, model), None after it was removed
+        self.models = []  # lens id -> model ID in lower case
+        self.postings = {}  # trigram -> set of lens ids
+        self.by_manufacturer = {}  # manufacturer -> [(lens id, trigrams)]
+        self.generations = {}  # manufacturer -> generation it was indexed at
+        self.generation = None
+        self.database = None
+
+    def __len__(self):
+        return sum(len(lenses) for lenses in self.by_manufacturer.values())
+
+    def add(self, manufacturer, model, notes=""):
+        lens = len(self.lenses)
+        self.lenses.append((manufacturer, model))
+        self.models.append(model.lower())
+        grams = set()
+        for word in words(f"{manufacturer} {model} {notes}"):
+            grams |= _word_trigrams(word)
+        postings = self.postings
+        for gram in grams:
+            posting = postings.get(gram)
+            if posting is None:
+                posting = postings[gram] = set()
+            posting.add(lens)
+        self.by_manufacturer.setdefault(manufacturer, []).append((lens, grams))
+
+    def remove_manufacturer(self, manufacturer):
+        for lens, grams in self.by_manufacturer.pop(manufacturer, ()):
+            for gram in grams:
+                self.postings[gram].discard(lens)
+            self.lenses[lens] = None
+        self.generations.pop(manufacturer, None)
+
+    def index_manufacturer(self, lens_db, manufacturer):
+        """(Re)index all lenses of a manufacturer."""
+        self.remove_manufacturer(manufacturer)
+        for model in lens_db.get_models(manufacturer):
+            profile = lens_db.get_lens_profile(manufacturer, model) or {}
+            self.add(manufacturer, model, str(profile.get('specs', {}).get('notes', "")))
+        self.by_manufacturer.setdefault(manufacturer, [])
+        # Reading the models loads the manufacturer, which counts as a change.
+        self.generations[manufacturer] = lens_db.manufacturer_generation(manufacturer)
+
+    def sync(self, lens_db):
+        """Index the manufacturers that changed since the last sync."""
+        if self.database == id(lens_db) and self.generation == lens_db.generation:
+            return
+        manufacturers = set(lens_db.get_manufacturers())
+        for manufacturer in set(self.by_manufacturer) - manufacturers:
+            self.remove_manufacturer(manufacturer)
+        for manufacturer in manufacturers:
+            if self.generations.get(manufacturer) != lens_db.manufacturer_generation(manufacturer):
+                self.index_manufacturer(lens_db, manufacturer)
+        self.database = id(lens_db)
+        self.generation = lens_db.generation
+
+    def search(self, query, limit=20):
+        """The best lenses for a query as a list of Result, best first."""
+        query_words = words(query)
+        grams = set()
+        for word in query_words:
+            grams |= trigrams(word, end=False)
+        if not grams:
+            return []
+        # A result has at least `needed` pieces, so it has one of the len - needed + 1 rarest.
+        # Only those are counted in full; the common ones are only looked up for the lenses found.
+        postings = sorted((self.postings.get(gram, set()) for gram in grams), key=len)
+        needed = max(1, math.ceil(MIN_SCORE * len(grams)))
+        rare = len(grams) - needed + 1
+        counts = Counter()
+        for posting in postings[:rare]:
+            counts.update(posting)
+        found = counts.keys()
+        for posting in postings[rare:]:
+            counts.update(found & posting)
+        # The lenses with the most pieces, then ranked with the bonus for the typed text.
+        typed = query.strip().lower()
+        results = []
+        for lens, count in heapq.nlargest(limit * CANDIDATES, counts.items(), key=itemgetter(1)):
+            if count < needed:
+                break
+            score = count / len(grams)
+            if typed in self.models[lens]:
+                score += 0.5
+            results.append((-score, len(self.models[lens]), self.lenses[lens], score))
+        results.sort()
+        return [Result(manufacturer, model, score) for _, _, (manufacturer, model), score in results[:limit]]
+
+
+_index = SearchIndex()
+_last = (None, None, None)  # (query, limit, generation) of the last search
+_last_results = []
+
+
+def get_index(lens_db):
+    """The search index of a LensDatabase, brought up to date with its edits."""
+    global _index
+    if _index.database not in (None, id(lens_db)):
+        _index = SearchIndex()
+    _index.sync(lens_db)
+    return _index
+
+
+def search(lens_db, query, limit=20):
+    """Search the lenses of a LensDatabase. Repeating the last search, as every redraw does, is free."""
+    global _last, _last_results
+    key = (query, limit, (id(lens_db), lens_db.generation))
+    if key != _last:
+        _last_results = get_index(lens_db).search(query, limit)
+        _last = (query, limit, (id(lens_db), lens_db.generation))
+    return _last_results
@@ -0,0 +1,314 @@
+"""
+SQLite backend of the lens database, for catalogues of thousands of lenses.
+
+SQLiteLensDatabase has the API of LensDatabase, so panels, operators and the finder work
+with either. Instead of one JSON file per manufacturer that is rewritten on every edit,
+every lens is one row of a table and every edit is one small transaction.
+
+The full lens profile is kept as JSON in the row, next to indexed columns for the throw
+ratio and shift ranges that are derived from it. Model IDs and notes are in a full-text
+index (FTS5) when the SQLite build has it; search() falls back to LIKE otherwise.
+
+open_database() in the database module picks this backend for .sqlite files. JSON files
+are imported and exported with import_database() and export_database() as before;
+import_lens_database() copies a whole JSON catalogue.
+"""
+import json
+import logging
+import sqlite3
+from pathlib import Path
+
+from .database import LensDatabase, new_lens_data, update_lens_data, validate_lens_data
+from .finder import lens_limits
+
+log = logging.getLogger(name=__file__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS manufacturers (
+    name TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS lenses (
+    id INTEGER PRIMARY KEY,
+    manufacturer TEXT NOT NULL REFERENCES manufacturers (name) ON UPDATE CASCADE ON DELETE CASCADE,
+    model TEXT NOT NULL,
+    throw_min REAL,
+    throw_max REAL,
+    h_min REAL,
+    h_max REAL,
+    v_min REAL,
+    v_max REAL,
+    notes TEXT NOT NULL DEFAULT '',
+    profile TEXT NOT NULL,
+    UNIQUE (manufacturer, model)
+);
+CREATE INDEX IF NOT EXISTS lenses_throw ON lenses (throw_min, throw_max);
+CREATE INDEX IF NOT EXISTS lenses_shift ON lenses (v_min, v_max, h_min, h_max);
+"""
+
+# External content FTS table, kept in sync with the lenses table by triggers.
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS lens_text USING fts5 (model, notes, content='lenses', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS lenses_insert AFTER INSERT ON lenses BEGIN
+    INSERT INTO lens_text (rowid, model, notes) VALUES (new.id, new.model, new.notes);
+END;
+CREATE TRIGGER IF NOT EXISTS lenses_delete AFTER DELETE ON lenses BEGIN
+    INSERT INTO lens_text (lens_text, rowid, model, notes) VALUES ('delete', old.id, old.model, old.notes);
+END;
+CREATE TRIGGER IF NOT EXISTS lenses_update AFTER UPDATE OF model, notes ON lenses BEGIN
+    INSERT INTO lens_text (lens_text, rowid, model, notes) VALUES ('delete', old.id, old.model, old.notes);
+    INSERT INTO lens_text (rowid, model, notes) VALUES (new.id, new.model, new.notes);
+END;
+"""
+
+
+def lens_columns(profile):
+    """Values of the indexed columns (throw_min ... v_max, notes) of a lens profile."""
+    limits = lens_limits(profile) or (None,) * 6
+    notes = (profile or {}).get('specs', {}).get('notes', '')
+    return tuple(limits) + (notes if isinstance(notes, str) else str(notes),)
+
+
+class SQLiteLensDatabase(LensDatabase):
+    """LensDatabase stored in one SQLite file. The file is opened on first use."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.database_dir = self.path.parent
+        self.last_load_time = {}
+        self.generation = 0
+        self.list_generation = 0
+        self._generations = {}
+        self._base_generation = 0
+        self.has_fts = False
+        self._connection = None
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(str(self.path))
+            self._connection.execute("PRAGMA foreign_keys = ON")
+            self._connection.execute("PRAGMA journal_mode = WAL")
+            self._connection.executescript(SCHEMA)
+            try:
+                self._connection.executescript(FTS_SCHEMA)
+                self.has_fts = True
+            except sqlite3.OperationalError as e:
+                log.info(f"No full-text search for lenses, {e}")
+        return self._connection
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    # Reading
+
+    def _known(self):
+        return {name for name, in self.connection.execute("SELECT name FROM manufacturers")}
+
+    def _get(self, manufacturer):
+        """Models of a manufacturer as {model: profile}, None for an unknown manufacturer."""
+        if not self.connection.execute("SELECT 1 FROM manufacturers WHERE name = ?", (manufacturer,)).fetchone():
+            return None
+        rows = self.connection.execute(
+            "SELECT model, profile FROM lenses WHERE manufacturer = ? ORDER BY model", (manufacturer,))
+        return {model: json.loads(profile) for model, profile in rows}
+
+    @property
+    def manufacturers(self):
+        result = {name: {} for name in self.get_manufacturers()}
+        for manufacturer, model, profile in self.connection.execute(
+                "SELECT manufacturer, model, profile FROM lenses ORDER BY manufacturer, model"):
+            result[manufacturer][model] = json.loads(profile)
+        return result
+
+    def load_all_databases(self):
+        pass
+
+    def get_models(self, manufacturer):
+        rows = self.connection.execute("SELECT model FROM lenses WHERE manufacturer = ? ORDER BY model",
+                                       (manufacturer,))
+        return [model for model, in rows]
+
+    def get_lens_profile(self, manufacturer, model):
+        row = self.connection.execute("SELECT profile FROM lenses WHERE manufacturer = ? AND model = ?",
+                                      (manufacturer, model)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def lens_rows(self):
+        """(manufacturer, model, throw_min, throw_max, h_min, h_max, v_min, v_max) of all lenses with a throw ratio."""
+        return self.connection.execute(
+            "SELECT manufacturer, model, throw_min, throw_max, h_min, h_max, v_min, v_max FROM lenses "
+            "WHERE throw_min IS NOT NULL").fetchall()
+
+    def find_lenses(self, throw_ratio, h_shift=0.0, v_shift=0.0):
+        """(manufacturer, model) of the lenses reaching a throw ratio and shift, from the column indices."""
+        return self.connection.execute(
+            "SELECT manufacturer, model FROM lenses WHERE throw_min <= ? AND throw_max >= ? "
+            "AND v_min <= ? AND v_max >= ? AND h_min <= ? AND h_max >= ? ORDER BY manufacturer, model",
+            (throw_ratio, throw_ratio, v_shift, v_shift, h_shift, h_shift)).fetchall()
+
+    def search(self, text, limit=50):
+        """(manufacturer, model) of the lenses whose model ID or notes contain the words of text."""
+        words = text.split()
+        if not words:
+            return []
+        connection = self.connection
+        if self.has_fts:
+            # Every word as a quoted prefix, so punctuation in model IDs doesn't break the query.
+            query = ' '.join('"{}"*'.format(word.replace('"', '""')) for word in words)
+            try:
+                return connection.execute(
+                    "SELECT lenses.manufacturer, lenses.model FROM lens_text "
+                    "JOIN lenses ON lenses.id = lens_text.rowid WHERE lens_text MATCH ? "
+                    "ORDER BY bm25(lens_text) LIMIT ?", (query, limit)).fetchall()
+            except sqlite3.OperationalError as e:
+                log.warning(f"Full-text search for {text!r} failed: {e}")
+        conditions = ' AND '.join("(model LIKE ? OR notes LIKE ?)" for _ in words)
+        parameters = [f"%{word}%" for word in words for _ in range(2)]
+        return connection.execute(
+            f"SELECT manufacturer, model FROM lenses WHERE {conditions} ORDER BY manufacturer, model LIMIT ?",
+            parameters + [limit]).fetchall()
+
+    # Writing, one transaction per edit
+
+    def _write_lens(self, manufacturer, model, profile):
+        self.connection.execute(
+            "INSERT INTO lenses (manufacturer, model, throw_min, throw_max, h_min, h_max, v_min, v_max, notes, profile) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (manufacturer, model) DO UPDATE SET "
+            "throw_min = excluded.throw_min, throw_max = excluded.throw_max, h_min = excluded.h_min, "
+            "h_max = excluded.h_max, v_min = excluded.v_min, v_max = excluded.v_max, "
+            "notes = excluded.notes, profile = excluded.profile",
+            (manufacturer, model) + lens_columns(profile) + (json.dumps(profile),))
+
+    def refresh_database(self):
+        self.close()
+        self._touch()
+        return len(self._known()) > 0
+
+    def add_manufacturer(self, name):
+        if not name:
+            return False
+        with self.connection:
+            added = self.connection.execute("INSERT OR IGNORE INTO manufacturers (name) VALUES (?)", (name,)).rowcount
+        if added:
+            self._touch(name, listed=True)
+        return bool(added)
+
+    def rename_manufacturer(self, old_name, new_name):
+        if not old_name or not new_name or new_name in self._known():
+            return False
+        with self.connection:
+            # The lenses follow through ON UPDATE CASCADE.
+            renamed = self.connection.execute("UPDATE manufacturers SET name = ? WHERE name = ?",
+                                              (new_name, old_name)).rowcount
+        if renamed:
+            self._touch(old_name, new_name, listed=True)
+        return bool(renamed)
+
+    def delete_manufacturer(self, name):
+        if not name:
+            return False
+        with self.connection:
+            deleted = self.connection.execute("DELETE FROM manufacturers WHERE name = ?", (name,)).rowcount
+        if deleted:
+            self._touch(name, listed=True)
+        return bool(deleted)
+
+    def add_lens_model(self, manufacturer, model_id, specs):
+        if not manufacturer or not model_id or manufacturer not in self._known():
+            return False
+        if self.get_lens_profile(manufacturer, model_id) is not None:
+            return False
+        with self.connection:
+            self._write_lens(manufacturer, model_id, new_lens_data(specs))
+        self._touch(manufacturer)
+        return True
+
+    def rename_lens_model(self, manufacturer, old_model_id, new_model_id):
+        if not manufacturer or not old_model_id or not new_model_id:
+            return False
+        if self.get_lens_profile(manufacturer, old_model_id) is None:
+            return False
+        if old_model_id == new_model_id:
+            return True
+        try:
+            with self.connection:
+                self.connection.execute("UPDATE lenses SET model = ? WHERE manufacturer = ? AND model = ?",
+                                        (new_model_id, manufacturer, old_model_id))
+        except sqlite3.IntegrityError:
+            return False  # A model of that name exists
+        self._touch(manufacturer)
+        return True
+
+    def update_lens_model(self, manufacturer, model_id, specs):
+        if not manufacturer or not model_id:
+            return False
+        with self.connection:
+            lens_data = self.get_lens_profile(manufacturer, model_id)
+            if lens_data is None:
+                return False
+            update_lens_data(lens_data, specs)
+            self._write_lens(manufacturer, model_id, lens_data)
+        self._touch(manufacturer)
+        return True
+
+    def delete_lens_model(self, manufacturer, model_id):
+        if not manufacturer or not model_id:
+            return False
+        with self.connection:
+            deleted = self.connection.execute("DELETE FROM lenses WHERE manufacturer = ? AND model = ?",
+                                              (manufacturer, model_id)).rowcount
+        if deleted:
+            self._touch(manufacturer)
+        return bool(deleted)
+
+    def replace_manufacturer(self, manufacturer, models):
+        """Replace all lenses of a manufacturer by models ({model: profile}) in one transaction."""
+        with self.connection:
+            self.connection.execute("INSERT OR IGNORE INTO manufacturers (name) VALUES (?)", (manufacturer,))
+            self.connection.execute("DELETE FROM lenses WHERE manufacturer = ?", (manufacturer,))
+            for model, profile in models.items():
+                self._write_lens(manufacturer, model, profile)
+        self._touch(manufacturer, listed=True)
+
+    def add_lens_models(self, manufacturer, models):
+        with self.connection:
+            self.connection.execute("INSERT OR IGNORE INTO manufacturers (name) VALUES (?)", (manufacturer,))
+            for model, profile in models.items():
+                self._write_lens(manufacturer, model, profile)
+        self._touch(manufacturer, listed=True)
+
+    def _save_manufacturer_data(self, manufacturer):
+        # Every edit is written by its own transaction.
+        pass
+
+    def flush(self):
+        pass
+
+    def reload_changed(self):
+        # Every query reads the committed state of the file.
+        return set(), False
+
+    def import_database(self, filepath):
+        try:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if not isinstance(data, dict):
+                return False, "Invalid data format: Root element must be a dictionary"
+            errors = validate_lens_data(data)
+            if errors:
+                return False, f"Data validation failed: {', '.join(errors)}"
+            manufacturer = Path(filepath).stem.capitalize()
+            self.replace_manufacturer(manufacturer, self.standardize_lens_data(data))
+            return True, f"Successfully imported {len(data)} lens models for {manufacturer}"
+        except json.JSONDecodeError as e:
+            return False, f"JSON parsing error: {str(e)}"
+        except Exception as e:
+            return False, f"Import failed: {str(e)}"
+
+    def import_lens_database(self, source):
+        """Copy all manufacturers of another LensDatabase, e.g. the JSON catalogue, into this one."""
+        for manufacturer, models in source.manufacturers.items():
+            self.replace_manufacturer(manufacturer, models)
@@ -0,0 +1,69 @@
+"""
+Hot reload of lens database files edited outside of Blender.
+
+A timer checks the modification times of the database files every few seconds. That is one
+directory listing, no file is read. Only the files of manufacturers that were loaded and
+changed since are parsed again. Reloading bumps the generations of those manufacturers, so
+their enum items are rebuilt the next time they are drawn, and projectors using a lens of a
+changed manufacturer get the limits of the new profile. The projector bodies are reloaded
+when one of their files changed.
+"""
+import logging
+
+import bpy
+
+from .. import projector, registry, scheduler
+from .database import lens_db
+from .bodies import body_catalogue
+
+log = logging.getLogger(name=__file__)
+
+# Seconds between two checks of the database files.
+POLL_INTERVAL = 2.0
+
+
+def apply_changes(changed):
+    """Update the projectors and panels after manufacturers were reloaded."""
+    with scheduler.batch():
+        for obj in registry.projectors():
+            manufacturer = obj.get("lens_manufacturer")
+            if manufacturer not in changed:
+                continue
+            profile = lens_db.get_lens_profile(manufacturer, obj.get("lens_model"))
+            if profile:
+                projector.update_from_lens_profile(obj, profile)
+
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == 'VIEW_3D':
+                area.tag_redraw()
+
+
+def check():
+    """Reload the changed database files. Returns the reloaded manufacturers."""
+    changed, listed = lens_db.reload_changed()
+    bodies = body_catalogue.reload_changed()
+    if changed or listed:
+        log.info(f"Reloaded lenses of {', '.join(sorted(changed)) or 'no manufacturer'}")
+        apply_changes(changed)
+    elif bodies:
+        log.info("Reloaded projector bodies")
+        apply_changes(set())
+    return changed
+
+
+def _on_timer():
+    try:
+        check()
+    except Exception as e:
+        log.error(f"Error checking the lens database: {e}")
+    return POLL_INTERVAL
+
+
+def register():
+    bpy.app.timers.register(_on_timer, first_interval=POLL_INTERVAL, persistent=True)
+
+
+def unregister():
+    if bpy.app.timers.is_registered(_on_timer):
+        bpy.app.timers.unregister(_on_timer)
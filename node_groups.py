@@ -0,0 +1,484 @@
+"""
+Shared node groups used by every projector.
+
+Each group exists once per blend file. A version number is stored on the group; when the
+addon ships a changed group layout the version is bumped and the group is rebuilt in place
+the next time it is requested, so all projectors pick up the new layout at once.
+Per-projector values (texture scale, lens shift, pixel grid resolution, ...) are passed in
+as inputs of the group node, never written into the shared group itself.
+"""
+import logging
+import re
+
+import bpy
+
+from .helper import ADDON_ID, auto_offset
+
+log = logging.getLogger(name=__file__)
+
+PROJECTOR_GROUP = '_Projectors-Addon_NodeGroup'
+PIXEL_GRID_GROUP = '_Projectors-Addon_PixelGrid'
+BLEND_GROUP = '_Projectors-Addon_Blend'
+LENS_GROUP = '_Projectors-Addon_Lens'
+# Older versions of the addon created this group without a version, it keeps its name.
+CORNER_PIN_GROUP = 'CornerPinCorrection'
+
+VERSION_KEY = 'projectors_version'
+
+
+def new_socket(node_group, name, in_out, socket_type):
+    """ Add an input or output socket to a node group in a Blender version independent way. """
+    if bpy.app.version >= (4, 0):
+        return node_group.interface.new_socket(name, in_out=in_out, socket_type=socket_type)
+    sockets = node_group.inputs if in_out == 'INPUT' else node_group.outputs
+    return sockets.new(socket_type, name)
+
+
+def clear_node_group(node_group):
+    """ Remove all nodes and sockets of a node group. """
+    node_group.nodes.clear()
+    if bpy.app.version >= (4, 0):
+        node_group.interface.clear()
+    else:
+        node_group.inputs.clear()
+        node_group.outputs.clear()
+
+
+def find_duplicates(name):
+    """ The '.001', '.002', ... copies of the node group called name. """
+    pattern = re.compile(re.escape(name) + r'\.\d{3,}$')
+    return [ng for ng in bpy.data.node_groups if pattern.match(ng.name)]
+
+
+def merge_duplicates(node_group):
+    """
+    Older versions of the addon created a new node group for every projector.
+    Remap all users of those '.001', '.002', ... copies to the canonical group and remove the copies.
+    """
+    duplicates = find_duplicates(node_group.name)
+    for duplicate in duplicates:
+        duplicate.user_remap(node_group)
+        bpy.data.node_groups.remove(duplicate)
+    return len(duplicates)
+
+
+def ensure_node_group(name, version, build):
+    """
+    Return the shared node group called name. It is created with build(node_group) when it
+    doesn't exist yet and rebuilt in place when its stored version differs from version.
+    The second return value tells if the group was (re)built.
+    """
+    node_group = bpy.data.node_groups.get(name)
+    if node_group and node_group.get(VERSION_KEY) == version:
+        return node_group, False
+
+    if node_group:
+        log.debug(f'Rebuild node group {name} (version {node_group.get(VERSION_KEY)} -> {version})')
+        clear_node_group(node_group)
+    else:
+        node_group = bpy.data.node_groups.new(name, 'ShaderNodeTree')
+    build(node_group)
+    node_group[VERSION_KEY] = version
+    return node_group, True
+
+
+def build_projector_group(node_group):
+    """ Fill the projector node group. It turns the incoming light direction into texture coordinates. """
+    new_socket(node_group, 'Scale', 'INPUT', 'NodeSocketVector')
+    new_socket(node_group, 'Offset', 'INPUT', 'NodeSocketVector')
+    new_socket(node_group, 'Checker Color', 'INPUT', 'NodeSocketColor')
+    new_socket(node_group, 'texture vector', 'OUTPUT', 'NodeSocketVector')
+    new_socket(node_group, 'color', 'OUTPUT', 'NodeSocketColor')
+
+    nodes = node_group.nodes
+    tree = node_group
+
+    auto_pos = auto_offset()
+
+    group_input = nodes.new('NodeGroupInput')
+    group_input.location = auto_pos(200, y=-500)
+
+    tex = nodes.new('ShaderNodeTexCoord')
+    tex.location = auto_pos(200)
+
+    geo = nodes.new('ShaderNodeNewGeometry')
+    geo.location = auto_pos(0, -300)
+    vec_transform = nodes.new('ShaderNodeVectorTransform')
+    vec_transform.location = auto_pos(200)
+    vec_transform.vector_type = 'NORMAL'
+
+    map_1 = nodes.new('ShaderNodeMapping')
+    map_1.vector_type = 'TEXTURE'
+    # Flip the image horizontally and vertically to display it the intended way.
+    map_1.inputs[3].default_value[0] = -1
+    map_1.inputs[3].default_value[1] = -1
+    map_1.location = auto_pos(200)
+
+    sep = nodes.new('ShaderNodeSeparateXYZ')
+    sep.location = auto_pos(350)
+
+    div_1 = nodes.new('ShaderNodeMath')
+    div_1.operation = 'DIVIDE'
+    div_1.name = ADDON_ID + 'div_01'
+    div_1.location = auto_pos(200)
+
+    div_2 = nodes.new('ShaderNodeMath')
+    div_2.operation = 'DIVIDE'
+    div_2.name = ADDON_ID + 'div_02'
+    div_2.location = auto_pos(y=-200)
+
+    com = nodes.new('ShaderNodeCombineXYZ')
+    com.inputs['Z'].default_value = 1.0
+    com.location = auto_pos(200)
+
+    # Scale and offset come from the group inputs, so every projector has its own values.
+    map_2 = nodes.new('ShaderNodeMapping')
+    map_2.name = 'Mapping.001'
+    map_2.location = auto_pos(200)
+    map_2.vector_type = 'TEXTURE'
+
+    add = nodes.new('ShaderNodeMixRGB')
+    add.blend_type = 'ADD'
+    add.inputs[0].default_value = 1
+    add.location = auto_pos(350)
+
+    # Texture
+    # a) Image
+    img = nodes.new('ShaderNodeTexImage')
+    img.extension = 'CLIP'
+    img.location = auto_pos(200)
+
+    # b) Generated checker texture.
+    checker_tex = nodes.new('ShaderNodeTexChecker')
+    checker_tex.name = 'Checker Texture'
+    checker_tex.inputs[3].default_value = 8
+    checker_tex.inputs[1].default_value = (1, 1, 1, 1)
+    checker_tex.location = auto_pos(y=-300)
+
+    mix_rgb = nodes.new('ShaderNodeMixRGB')
+    mix_rgb.name = 'Mix.001'
+    mix_rgb.inputs[1].default_value = (0, 0, 0, 0)
+    mix_rgb.location = auto_pos(200, y=-300)
+
+    group_output_node = nodes.new('NodeGroupOutput')
+    group_output_node.location = auto_pos(200)
+
+    # Link inside group node
+    if bpy.app.version >= (4, 0):
+        tree.links.new(geo.outputs['Incoming'], vec_transform.inputs['Vector'])
+        tree.links.new(vec_transform.outputs['Vector'], map_1.inputs['Vector'])
+    else:
+        tree.links.new(tex.outputs['Normal'], map_1.inputs['Vector'])
+    tree.links.new(map_1.outputs['Vector'], sep.inputs['Vector'])
+
+    tree.links.new(sep.outputs[0], div_1.inputs[0])  # X -> value0
+    tree.links.new(sep.outputs[2], div_1.inputs[1])  # Z -> value1
+    tree.links.new(sep.outputs[1], div_2.inputs[0])  # Y -> value0
+    tree.links.new(sep.outputs[2], div_2.inputs[1])  # Z -> value1
+
+    tree.links.new(div_1.outputs[0], com.inputs[0])
+    tree.links.new(div_2.outputs[0], com.inputs[1])
+
+    tree.links.new(com.outputs['Vector'], map_2.inputs['Vector'])
+    tree.links.new(group_input.outputs['Offset'], map_2.inputs['Location'])
+    tree.links.new(group_input.outputs['Scale'], map_2.inputs['Scale'])
+
+    # Textures
+    # a) generated texture
+    tree.links.new(map_2.outputs['Vector'], add.inputs['Color1'])
+    tree.links.new(add.outputs['Color'], img.inputs['Vector'])
+    tree.links.new(add.outputs['Color'], group_output_node.inputs['texture vector'])
+    # b) checker texture
+    tree.links.new(add.outputs['Color'], checker_tex.inputs['Vector'])
+    tree.links.new(group_input.outputs['Checker Color'], checker_tex.inputs['Color2'])
+    tree.links.new(img.outputs['Alpha'], mix_rgb.inputs[0])
+    tree.links.new(checker_tex.outputs['Color'], mix_rgb.inputs[2])
+    tree.links.new(mix_rgb.outputs['Color'], group_output_node.inputs['color'])
+
+
+def build_pixel_grid_group(node_group):
+    """ Fill the pixel grid node group. Width and Height are inputs set per projector. """
+    new_socket(node_group, 'Shader', 'INPUT', 'NodeSocketShader')
+    new_socket(node_group, 'Vector', 'INPUT', 'NodeSocketVector')
+    new_socket(node_group, 'Width', 'INPUT', 'NodeSocketFloat')
+    new_socket(node_group, 'Height', 'INPUT', 'NodeSocketFloat')
+    new_socket(node_group, 'Shader', 'OUTPUT', 'NodeSocketShader')
+
+    nodes = node_group.nodes
+
+    auto_pos = auto_offset()
+
+    group_input = nodes.new('NodeGroupInput')
+    group_input.location = auto_pos(200)
+
+    sepXYZ = nodes.new('ShaderNodeSeparateXYZ')
+    sepXYZ.location = auto_pos(200)
+
+    mul1 = nodes.new('ShaderNodeMath')
+    mul1.operation = 'MULTIPLY'
+    mul1.location = auto_pos(100)
+
+    mul2 = nodes.new('ShaderNodeMath')
+    mul2.operation = 'MULTIPLY'
+    mul2.location = auto_pos(y=-200)
+
+    mod1 = nodes.new('ShaderNodeMath')
+    mod1.operation = 'MODULO'
+    mod1.inputs[1].default_value = 1
+    mod1.location = auto_pos(100)
+
+    mod2 = nodes.new('ShaderNodeMath')
+    mod2.operation = 'MODULO'
+    mod2.inputs[1].default_value = 1
+    mod2.location = auto_pos(y=-200)
+
+    col_ramp1 = nodes.new('ShaderNodeValToRGB')
+    col_ramp1.color_ramp.elements[1].position = 0.025
+    col_ramp1.color_ramp.interpolation = 'CONSTANT'
+    col_ramp1.location = auto_pos(100)
+
+    col_ramp2 = nodes.new('ShaderNodeValToRGB')
+    col_ramp2.color_ramp.elements[1].position = 0.025
+    col_ramp2.color_ramp.interpolation = 'CONSTANT'
+    col_ramp2.location = auto_pos(y=-200)
+
+    mix_rgb = nodes.new('ShaderNodeMixRGB')
+    mix_rgb.use_clamp = True
+    mix_rgb.blend_type = 'MULTIPLY'
+    mix_rgb.inputs[0].default_value = 1
+    mix_rgb.location = auto_pos(200)
+
+    transparent = nodes.new('ShaderNodeBsdfTransparent')
+    transparent.location = auto_pos(y=-200)
+
+    mix_shader = nodes.new('ShaderNodeMixShader')
+    mix_shader.location = auto_pos(100)
+
+    group_output = nodes.new('NodeGroupOutput')
+    group_output.location = auto_pos(100)
+
+    # Link Nodes
+    links = node_group.links
+
+    links.new(group_input.outputs['Shader'], mix_shader.inputs[2])
+    links.new(group_input.outputs['Vector'], sepXYZ.inputs[0])
+
+    links.new(group_input.outputs['Width'], mul1.inputs[1])
+    links.new(group_input.outputs['Height'], mul2.inputs[1])
+
+    links.new(sepXYZ.outputs[0], mul1.inputs[0])
+    links.new(sepXYZ.outputs[1], mul2.inputs[0])
+
+    links.new(mul1.outputs[0], mod1.inputs[0])
+    links.new(mul2.outputs[0], mod2.inputs[0])
+
+    links.new(mod1.outputs[0], col_ramp1.inputs[0])
+    links.new(mod2.outputs[0], col_ramp2.inputs[0])
+
+    links.new(col_ramp1.outputs[0], mix_rgb.inputs[1])
+    links.new(col_ramp2.outputs[0], mix_rgb.inputs[2])
+
+    links.new(mix_rgb.outputs[0], mix_shader.inputs[0])
+    links.new(transparent.outputs[0], mix_shader.inputs[1])
+
+    links.new(mix_shader.outputs[0], group_output.inputs[0])
+
+
+def build_blend_group(node_group):
+    """
+    Fill the edge blend node group. It multiplies the projected color with the blend mask
+    and lifts its blacks by the black level mask. Both masks are gamma encoded images,
+    Gamma is the exponent that decodes them.
+    """
+    new_socket(node_group, 'Color', 'INPUT', 'NodeSocketColor')
+    new_socket(node_group, 'Blend', 'INPUT', 'NodeSocketColor')
+    new_socket(node_group, 'Black Level', 'INPUT', 'NodeSocketColor')
+    new_socket(node_group, 'Gamma', 'INPUT', 'NodeSocketFloat')
+    new_socket(node_group, 'Color', 'OUTPUT', 'NodeSocketColor')
+
+    nodes = node_group.nodes
+
+    auto_pos = auto_offset()
+
+    group_input = nodes.new('NodeGroupInput')
+    group_input.location = auto_pos(200)
+
+    decode_blend = nodes.new('ShaderNodeGamma')
+    decode_blend.location = auto_pos(200)
+
+    decode_black = nodes.new('ShaderNodeGamma')
+    decode_black.location = auto_pos(y=-200)
+
+    multiply = nodes.new('ShaderNodeMixRGB')
+    multiply.blend_type = 'MULTIPLY'
+    multiply.inputs[0].default_value = 1
+    multiply.location = auto_pos(200)
+
+    # Mix towards white by the black level: color * (1 - black) + black.
+    lift = nodes.new('ShaderNodeMixRGB')
+    lift.inputs[2].default_value = (1, 1, 1, 1)
+    lift.location = auto_pos(200)
+
+    group_output = nodes.new('NodeGroupOutput')
+    group_output.location = auto_pos(200)
+
+    links = node_group.links
+
+    links.new(group_input.outputs['Blend'], decode_blend.inputs['Color'])
+    links.new(group_input.outputs['Gamma'], decode_blend.inputs['Gamma'])
+    links.new(group_input.outputs['Black Level'], decode_black.inputs['Color'])
+    links.new(group_input.outputs['Gamma'], decode_black.inputs['Gamma'])
+
+    links.new(group_input.outputs['Color'], multiply.inputs[1])
+    links.new(decode_blend.outputs[0], multiply.inputs[2])
+
+    links.new(decode_black.outputs[0], lift.inputs[0])
+    links.new(multiply.outputs[0], lift.inputs[1])
+
+    links.new(lift.outputs[0], group_output.inputs[0])
+
+
+def build_lens_group(node_group):
+    """
+    Fill the lens node group. It multiplies the projected color with the relative
+    illumination of the lens, the blue channel of the lens lookup image. The lookup image
+    itself is a node of every projector, the distortion is applied by sampling it.
+    """
+    new_socket(node_group, 'Color', 'INPUT', 'NodeSocketColor')
+    new_socket(node_group, 'Lens LUT', 'INPUT', 'NodeSocketColor')
+    new_socket(node_group, 'Color', 'OUTPUT', 'NodeSocketColor')
+
+    nodes = node_group.nodes
+
+    auto_pos = auto_offset()
+
+    group_input = nodes.new('NodeGroupInput')
+    group_input.location = auto_pos(200)
+
+    separate = nodes.new('ShaderNodeSeparateRGB')
+    separate.location = auto_pos(200)
+
+    multiply = nodes.new('ShaderNodeMixRGB')
+    multiply.blend_type = 'MULTIPLY'
+    multiply.inputs[0].default_value = 1
+    multiply.location = auto_pos(200)
+
+    group_output = nodes.new('NodeGroupOutput')
+    group_output.location = auto_pos(200)
+
+    links = node_group.links
+
+    links.new(group_input.outputs['Lens LUT'], separate.inputs[0])
+    links.new(group_input.outputs['Color'], multiply.inputs[1])
+    links.new(separate.outputs['B'], multiply.inputs[2])
+    links.new(multiply.outputs[0], group_output.inputs[0])
+
+
+def build_corner_pin_group(node_group):
+    """
+    Fill the corner pin node group. It applies the homography of the corner pin (see
+    optics.corner_pin_homography()) to the texture vector: the rows of the 3x3 matrix are
+    group inputs, so moving a corner only changes these nine numbers. The UV is extended to
+    (u, v, 1), transformed with three dot products and divided by w. A w behind the horizon
+    of the pinned image is clamped to a tiny positive value, which sends it far outside.
+    """
+    new_socket(node_group, 'UV', 'INPUT', 'NodeSocketVector')
+    for row in ('Row 1', 'Row 2', 'Row 3'):
+        new_socket(node_group, row, 'INPUT', 'NodeSocketVector')
+    new_socket(node_group, 'UV', 'OUTPUT', 'NodeSocketVector')
+
+    nodes = node_group.nodes
+
+    auto_pos = auto_offset()
+
+    group_input = nodes.new('NodeGroupInput')
+    group_input.location = auto_pos(200)
+
+    separate = nodes.new('ShaderNodeSeparateXYZ')
+    separate.location = auto_pos(200)
+
+    homogeneous = nodes.new('ShaderNodeCombineXYZ')
+    homogeneous.inputs['Z'].default_value = 1.0
+    homogeneous.location = auto_pos(200)
+
+    # One dot product per row of the matrix: x, y and w.
+    x, _ = auto_pos(200)
+    dots = []
+    for i in range(3):
+        dot = nodes.new('ShaderNodeVectorMath')
+        dot.operation = 'DOT_PRODUCT'
+        dot.location = (x, -150 * i)
+        dots.append(dot)
+
+    positive_w = nodes.new('ShaderNodeMath')
+    positive_w.operation = 'MAXIMUM'
+    positive_w.inputs[1].default_value = 1e-6
+    positive_w.location = auto_pos(200)
+
+    divide_x = nodes.new('ShaderNodeMath')
+    divide_x.operation = 'DIVIDE'
+    divide_x.location = auto_pos(200)
+
+    divide_y = nodes.new('ShaderNodeMath')
+    divide_y.operation = 'DIVIDE'
+    divide_y.location = auto_pos(y=-150)
+
+    combine = nodes.new('ShaderNodeCombineXYZ')
+    combine.location = auto_pos(200)
+
+    group_output = nodes.new('NodeGroupOutput')
+    group_output.location = auto_pos(200)
+
+    links = node_group.links
+
+    links.new(group_input.outputs['UV'], separate.inputs[0])
+    links.new(separate.outputs[0], homogeneous.inputs[0])
+    links.new(separate.outputs[1], homogeneous.inputs[1])
+    for i, dot in enumerate(dots):
+        links.new(group_input.outputs[i + 1], dot.inputs[0])
+        links.new(homogeneous.outputs[0], dot.inputs[1])
+
+    links.new(dots[2].outputs['Value'], positive_w.inputs[0])
+    links.new(dots[0].outputs['Value'], divide_x.inputs[0])
+    links.new(positive_w.outputs[0], divide_x.inputs[1])
+    links.new(dots[1].outputs['Value'], divide_y.inputs[0])
+    links.new(positive_w.outputs[0], divide_y.inputs[1])
+
+    links.new(divide_x.outputs[0], combine.inputs[0])
+    links.new(divide_y.outputs[0], combine.inputs[1])
+    links.new(combine.outputs[0], group_output.inputs[0])
+
+
+# Bump a version whenever the layout of its group changes.
+LIBRARY = {
+    PROJECTOR_GROUP: (2, build_projector_group),
+    PIXEL_GRID_GROUP: (2, build_pixel_grid_group),
+    BLEND_GROUP: (1, build_blend_group),
+    LENS_GROUP: (1, build_lens_group),
+    CORNER_PIN_GROUP: (2, build_corner_pin_group),
+}
+
+
+def get_node_group(name):
+    """ Return the up to date shared node group called name. """
+    version, build = LIBRARY[name]
+    node_group, _ = ensure_node_group(name, version, build)
+    return node_group
+
+
+def upgrade_library():
+    """
+    Bring the shared node groups of a loaded file up to date and merge their duplicates.
+    Groups the file doesn't contain are not created here, get_node_group() creates them
+    when a projector needs them. Return True if a group that was already in use changed;
+    the node trees using it have to be rebuilt then, because links to removed sockets are gone.
+    """
+    changed = False
+    for name, (version, build) in LIBRARY.items():
+        existed = name in bpy.data.node_groups
+        if not existed and not find_duplicates(name):
+            continue
+        node_group, rebuilt = ensure_node_group(name, version, build)
+        changed |= rebuilt and existed
+        changed |= merge_duplicates(node_group) > 0
+    return changed
@@ -0,0 +1,200 @@
+"""
+Optics of a projector as plain NumPy math.
+
+Nothing in here depends on Blender, so this module can be imported, tested and used for
+analysis outside of it. Every function accepts scalars or arrays (one entry per projector)
+and broadcasts them against each other, so thousands of configurations are evaluated in
+a single call.
+
+Conventions (the same the projector rig uses):
+    throw_ratio    distance / image width
+    width, height  resolution of the projected image in pixels
+    h_shift        horizontal lens shift in percent of the image width
+    v_shift        vertical lens shift in percent of the image height
+The projector looks along -Z of its local space, X points right and Y up.
+"""
+import numpy as np
+
+# Corner order used by corner_rays(), the same as the corner pin uses.
+CORNERS = ('top_left', 'top_right', 'bottom_left', 'bottom_right')
+
+
+def _arrays(*values):
+    return np.broadcast_arrays(*(np.asarray(v, dtype=np.float64) for v in values))
+
+
+def inverted_aspect_ratio(width, height):
+    """ height / width of the projected image. """
+    width, height = _arrays(width, height)
+    return height / width
+
+
+def field_of_view(throw_ratio):
+    """ Horizontal opening angle in radians. This is what the camera angle is set to. """
+    throw_ratio = np.asarray(throw_ratio, dtype=np.float64)
+    return np.arctan(0.5 / throw_ratio) * 2
+
+
+def vertical_field_of_view(throw_ratio, width, height):
+    """ Vertical opening angle in radians. """
+    throw_ratio, width, height = _arrays(throw_ratio, width, height)
+    return np.arctan(0.5 / throw_ratio * height / width) * 2
+
+
+def camera_shift(h_shift, v_shift, width, height):
+    """
+    Camera shift_x and shift_y. Blender measures both in units of the larger sensor side,
+    which is the image width for landscape resolutions. Returns an array of shape (..., 2).
+    """
+    h_shift, v_shift, width, height = _arrays(h_shift, v_shift, width, height)
+    return np.stack((h_shift / 100, v_shift / 100 * height / width), axis=-1)
+
+
+def mapping_scale(throw_ratio, width, height):
+    """ Scale input of the projector node group. Returns an array of shape (..., 3). """
+    throw_ratio, width, height = _arrays(throw_ratio, width, height)
+    return np.stack((1 / throw_ratio, 1 / throw_ratio * height / width, np.ones_like(throw_ratio)), axis=-1)
+
+
+def mapping_offset(throw_ratio, h_shift, v_shift, width, height):
+    """ Offset input of the projector node group. Returns an array of shape (..., 3). """
+    throw_ratio, h_shift, v_shift, width, height = _arrays(throw_ratio, h_shift, v_shift, width, height)
+    return np.stack((h_shift / 100 / throw_ratio,
+                     v_shift / 100 / throw_ratio * height / width,
+                     np.zeros_like(throw_ratio)), axis=-1)
+
+
+def image_size(throw_ratio, distance, width, height):
+    """ Width and height of the projected image at a distance. Returns an array of shape (..., 2). """
+    throw_ratio, distance, width, height = _arrays(throw_ratio, distance, width, height)
+    image_width = distance / throw_ratio
+    return np.stack((image_width, image_width * height / width), axis=-1)
+
+
+def image_center(throw_ratio, h_shift, v_shift, distance, width, height):
+    """ Center of the projected image in the plane at distance, relative to the optical axis. Shape (..., 2). """
+    size = image_size(throw_ratio, distance, width, height)
+    h_shift, v_shift = _arrays(h_shift, v_shift)
+    return size * np.stack((h_shift, v_shift), axis=-1) / 100
+
+
+def frustum_angles(throw_ratio, h_shift, v_shift, width, height):
+    """
+    Signed angles in radians between the optical axis and the left, right, bottom and top
+    planes of the (possibly shifted, so asymmetric) frustum. Returns an array of shape (..., 4).
+    """
+    size = image_size(throw_ratio, 1.0, width, height)
+    center = image_center(throw_ratio, h_shift, v_shift, 1.0, width, height)
+    low = center - size / 2
+    high = center + size / 2
+    return np.arctan(np.stack((low[..., 0], high[..., 0], low[..., 1], high[..., 1]), axis=-1))
+
+
+def corner_rays(throw_ratio, h_shift, v_shift, width, height, normalize=False):
+    """
+    Directions from the lens through the four image corners in the order of CORNERS, in the
+    local space of the projector. Unless normalized, a ray ends in the plane at distance 1.
+    Returns an array of shape (..., 4, 3).
+    """
+    size = image_size(throw_ratio, 1.0, width, height)
+    center = image_center(throw_ratio, h_shift, v_shift, 1.0, width, height)
+    signs = np.array(((-1, 1), (1, 1), (-1, -1), (1, -1)), dtype=np.float64)
+    xy = center[..., np.newaxis, :] + signs * size[..., np.newaxis, :] / 2
+    rays = np.concatenate((xy, np.full(xy.shape[:-1] + (1,), -1.0)), axis=-1)
+    if normalize:
+        rays /= np.linalg.norm(rays, axis=-1, keepdims=True)
+    return rays
+
+
+def throw_ratio_from_angle(angle):
+    """ Inverse of field_of_view(). """
+    angle = np.asarray(angle, dtype=np.float64)
+    return 0.5 / np.tan(angle / 2)
+
+
+def clamp_to_limits(values, low, high):
+    """
+    Clamp values into [low, high] element-wise. A NaN limit means there is no limit on that
+    side, e.g. for projectors without a lens profile.
+    """
+    values, low, high = _arrays(values, low, high)
+    return np.fmin(np.fmax(values, low), high)
+
+
+def lens_lut(distortion, vignetting, width, height, size=512):
+    """
+    Lookup texture of the lens distortion and vignetting, in the style of an STMap.
+    The texture covers the projected image; every pixel holds the image coordinate (u, v)
+    that the lens shows there in R and G, and the relative brightness there in B.
+
+    distortion is the radial displacement in the corners as a fraction of the distance to
+    the center, negative for barrel and positive for pincushion distortion. vignetting is the
+    fraction of light lost in the corners. Both are radial around the image center.
+    Returns a (rows, size, 4) float32 array, rows following the aspect ratio of width x height.
+    """
+    aspect = height / width
+    rows = max(2, int(round(size * aspect)))
+    u = (np.arange(size) + 0.5) / size
+    v = (np.arange(rows) + 0.5) / rows
+    x = (u - 0.5)[np.newaxis, :]
+    y = ((v - 0.5) * aspect)[:, np.newaxis]
+    # Distances normalized to 1 in the corners.
+    corner = 0.5 * np.sqrt(1 + aspect ** 2)
+    radius = np.sqrt(x ** 2 + y ** 2) / corner
+
+    # The lens moves an image point at radius r to r * (1 + k r^2). Invert that for the
+    # radius of every pixel with a few Newton steps; k is clipped so the map doesn't fold.
+    k = float(np.clip(distortion, -0.25, 0.25))
+    source = radius.copy()
+    for _ in range(6):
+        source -= (source + k * source ** 3 - radius) / (1 + 3 * k * source ** 2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scale = np.where(radius > 0, source / radius, 1.0)
+
+    lut = np.empty((rows, size, 4), dtype=np.float32)
+    lut[..., 0] = 0.5 + x * scale
+    lut[..., 1] = 0.5 + y * scale / aspect
+    # Barrel distortion pulls the corners of the image in, the pixels outside of it stay dark.
+    inside = ((lut[..., 0] >= 0) & (lut[..., 0] <= 1) & (lut[..., 1] >= 0) & (lut[..., 1] <= 1))
+    lut[..., 2] = np.clip(1 - vignetting * radius ** 2, 0, 1) * inside
+    lut[..., 3] = inside
+    return lut
+
+
+# Image corners in texture coordinates, in the order of CORNERS.
+UNIT_CORNERS = ((0.0, 1.0), (1.0, 1.0), (0.0, 0.0), (1.0, 0.0))
+
+
+def corner_pin_homography(corners):
+    """
+    3x3 homography of a corner pin. corners are the positions (u, v) the corners of the
+    image are pinned to, in the order of CORNERS, as a (..., 4, 2) array. The matrix maps a
+    texture coordinate (u, v, 1) of the projector to the image coordinate (x, y, w) to
+    sample there, divided by w. Degenerate corners (three on a line) give the identity.
+    """
+    corners = np.asarray(corners, dtype=np.float64)
+    # The projective map of the unit square to the quad (Heckbert), then its inverse.
+    # Numbered counterclockwise from the bottom left, as the unit square (0, 0), (1, 0), (1, 1), (0, 1).
+    (x3, y3), (x2, y2), (x0, y0), (x1, y1) = (np.moveaxis(corners[..., i, :], -1, 0) for i in range(4))
+    sx, sy = x0 - x1 + x2 - x3, y0 - y1 + y2 - y3
+    dx1, dx2, dy1, dy2 = x1 - x2, x3 - x2, y1 - y2, y3 - y2
+    den = dx1 * dy2 - dx2 * dy1
+    degenerate = np.abs(den) < 1e-12
+    den = np.where(degenerate, 1.0, den)
+    g = (sx * dy2 - dx2 * sy) / den
+    h = (dx1 * sy - sx * dy1) / den
+    square_to_quad = np.stack((
+        np.stack((x1 - x0 + g * x1, x3 - x0 + h * x3, x0), axis=-1),
+        np.stack((y1 - y0 + g * y1, y3 - y0 + h * y3, y0), axis=-1),
+        np.stack((g, h, np.ones_like(g)), axis=-1)), axis=-2)
+    # Three corners on a line don't span a quad.
+    degenerate |= np.abs(np.linalg.det(square_to_quad)) < 1e-12
+    square_to_quad[degenerate] = np.eye(3)
+    return np.linalg.inv(square_to_quad)
+
+
+def apply_homography(matrix, uv):
+    """ The image coordinates a homography maps the texture coordinates uv (..., 2) to. """
+    uv = np.asarray(uv, dtype=np.float64)
+    points = np.concatenate((uv, np.ones(uv.shape[:-1] + (1,))), axis=-1) @ np.swapaxes(matrix, -1, -2)
+    return points[..., :2] / points[..., 2:]
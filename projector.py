@@ -4,8 +4,10 @@ import os
 
 from enum import Enum
 import bpy
+import numpy as np
 from bpy.types import Operator
 
+from . import handles, node_groups, optics, registry, scheduler
 from .helper import (ADDON_ID, auto_offset,
                      get_projectors, get_projector, random_color)
 
@@ -35,9 +37,20 @@ RESOLUTIONS = [
     # 17:9 aspect ratio
     ('4096x2160', 'Native 4K (4096x2160) 17:9', '', 11),
     # 1:1 aspect ratio
-    ('1000x1000', 'Square (1000x1000) 1:1', '', 12)
+    ('1000x1000', 'Square (1000x1000) 1:1', '', 12),
+    # Any other resolution, see custom_width and custom_height.
+    ('custom', 'Custom', 'Enter the resolution manually', 13)
 ]
 
+TEST_PATTERN_PREFIX = '_proj.tex.'
+LENS_LUT_PREFIX = '_proj.lens.'
+
+# Custom property on a lens lookup image with the (distortion, vignetting) it was generated for.
+LENS_LUT_KEY = 'projectors_lens'
+
+# Width of the lens lookup images in pixels, the height follows the aspect ratio.
+LENS_LUT_SIZE = 512
+
 PROJECTED_OUTPUTS = [(Textures.CUSTOM_TEXTURE.value, 'Select Texture', '', 1)]
 
 
@@ -60,597 +73,437 @@ class PROJECTOR_OT_change_color_randomly(Operator):
         return {'FINISHED'}
 
 
-def create_projector_textures():
-    """ This function checks if the needed images exist and if not creates them. """
-    name_template = '_proj.tex.{}'
-    for res in RESOLUTIONS:
-        img_name = name_template.format(res[0])
-        w, h = res[0].split('x')
-        if not bpy.data.images.get(img_name):
-            log.debug(f'Create projection texture: {res}')
-            bpy.ops.image.new(name=img_name,
-                              width=int(w),
-                              height=int(h),
-                              color=(0.0, 0.0, 0.0, 1.0),
-                              alpha=True,
-                              generated_type='COLOR_GRID',
-                              float=False)
+def selected_resolution(proj_settings):
+    """ Return the resolution selected in the dropdown (or entered as custom resolution) as integers. """
+    if proj_settings.resolution == 'custom':
+        return proj_settings.custom_width, proj_settings.custom_height
+    w, h = proj_settings.resolution.split('x')
+    return int(w), int(h)
 
-        bpy.data.images[img_name].use_fake_user = True
 
+def get_test_pattern(width, height):
+    """
+    Return the test pattern image for a resolution and create it if it doesn't exist yet.
+    The image is generated by Blender, so only its parameters are saved in the blend file and
+    the pixels are allocated when the image is actually used. It has no fake user; once no
+    projector shows it anymore it is removed.
+    """
+    img_name = f'{TEST_PATTERN_PREFIX}{width}x{height}'
+    image = bpy.data.images.get(img_name)
+    if not image:
+        log.debug(f'Create projection texture: {img_name}')
+        image = bpy.data.images.new(img_name, width=width, height=height, alpha=True)
+        image.generated_type = 'COLOR_GRID'
+    return image
 
-def create_projector_node_group():
-    """Create projector node group"""
-    # Check if it already exists
-    node_group_name = '_Projectors-Addon_NodeGroup'
-    node_group = bpy.data.node_groups.get(node_group_name)
-    
-    if not node_group:
-        # Create new node group
-        node_group = bpy.data.node_groups.new(node_group_name, 'ShaderNodeTree')
-    
-    return node_group
 
-def add_projector_node_tree_to_spot(spot):
+def remove_unused_test_patterns():
     """
-    This function turns a spot light into a projector.
-    This is achieved through a texture on the spot light and some basic math.
+    Remove all test pattern and lens lookup images no projector uses anymore.
+    Older versions of the addon created a pattern for every resolution up front and kept them
+    with a fake user, so the fake user is ignored here.
     """
-    # helper.py에서 import하지 않고 직접 함수 정의
-    def is_blender_40_or_newer():
-        return bpy.app.version >= (4, 0, 0)
-    
-    def is_blender_43_or_newer():
-        return bpy.app.version >= (4, 3, 0)
+    removed = 0
+    for image in list(bpy.data.images):
+        if not image.name.startswith((TEST_PATTERN_PREFIX, LENS_LUT_PREFIX)):
+            continue
+        if image.users - int(image.use_fake_user) == 0:
+            bpy.data.images.remove(image)
+            removed += 1
+    return removed
 
-    spot.data.use_nodes = True
-    root_tree = spot.data.node_tree
-    root_tree.nodes.clear()
-    
-    # Get node group
-    node_group = create_projector_node_group()
 
-    # Create node group node
-    group = spot.data.node_tree.nodes.new('ShaderNodeGroup')
-    group.node_tree = node_group
-    group.label = "!! Don't touch !!"
-    
-    # Add nodes and connection logic (reuse existing code)
-    nodes = group.node_tree.nodes
-    tree = group.node_tree
-
-    # Create output socket in node group
-    if is_blender_40_or_newer():
-        # Interface for Blender 4.0+ version
-        node_group.interface.new_socket('texture vector',  in_out="OUTPUT", socket_type='NodeSocketVector')
-        node_group.interface.new_socket('color', in_out="OUTPUT", socket_type='NodeSocketColor')
-    else:
-        # Interface for previous versions
-        output = node_group.outputs
-        output.new('NodeSocketVector', 'texture vector')
-        output.new('NodeSocketColor', 'color')
+def lens_parameters(projector):
+    """ (distortion, vignetting) of the lens profile applied to a projector. """
+    return (float(projector.get('lens_distortion', 0.0)),
+            float(projector.get('lens_vignetting', 0.0)))
 
-    # # Inside Group Node #
-    # #####################
 
-    # Hold important nodes inside a group node.
-    group = spot.data.node_tree.nodes.new('ShaderNodeGroup')
-    group.node_tree = node_group
-    group.label = "!! Don't touch !!"
+def get_lens_lut(projector):
+    """
+    Return the lookup image of the lens distortion and vignetting of a projector (see
+    optics.lens_lut()). There is one image per lens and aspect ratio, projectors with the
+    same lens share it. Projectors without a lens model share the image of the same
+    distortion and vignetting. It is only generated again when the lens profile changed.
+    """
+    width, height = projector_resolution(projector)
+    divisor = math.gcd(int(width), int(height)) or 1
+    parameters = lens_parameters(projector)
+    lens = '/'.join((projector.get('lens_manufacturer', ''), projector.get('lens_model', ''))).strip('/')
+    if not lens:
+        # The values themselves (repr() is exact), so two custom lenses never share an image.
+        lens = 'custom({!r},{!r})'.format(*parameters)
+    img_name = f'{LENS_LUT_PREFIX}{lens}.{int(width) // divisor}x{int(height) // divisor}'
+
+    image = bpy.data.images.get(img_name)
+    if image and tuple(image.get(LENS_LUT_KEY, ())) == parameters and image.packed_file:
+        return image
+
+    lut = optics.lens_lut(*parameters, width, height, size=LENS_LUT_SIZE)
+    rows, columns = lut.shape[:2]
+    if image and tuple(image.size) != (columns, rows):
+        bpy.data.images.remove(image)
+        image = None
+    if not image:
+        log.debug(f'Create lens lookup texture: {img_name}')
+        image = bpy.data.images.new(img_name, width=columns, height=rows, alpha=True, float_buffer=True)
+        image.colorspace_settings.name = 'Non-Color'
+    image.pixels.foreach_set(lut.ravel())
+    image.update()
+    # Float images are packed as OpenEXR, the coordinates keep their full precision.
+    image.pack()
+    image[LENS_LUT_KEY] = parameters
+    return image
 
-    nodes = group.node_tree.nodes
-    tree = group.node_tree
 
-    auto_pos = auto_offset()
+def create_projector_node_group():
+    """ Return the shared projector node group. It is created only once per file. """
+    return node_groups.get_node_group(node_groups.PROJECTOR_GROUP)
 
-    tex = nodes.new('ShaderNodeTexCoord')
-    tex.location = auto_pos(200)
 
-    geo = nodes.new('ShaderNodeNewGeometry')
-    geo.location = auto_pos(0, -300)
-    vec_transform = nodes.new('ShaderNodeVectorTransform')
-    vec_transform.location = auto_pos(200)
-    vec_transform.vector_type = 'NORMAL'
+def build_root_tree(light):
+    """
+    (Re)build the node tree of a projector spot light.
+    The heavy lifting is done by shared node groups; the root tree only holds one group node
+    per shared group plus the nodes the user interacts with. An already projected image is kept.
+    """
+    light.use_nodes = True
+    root_tree = light.node_tree
+    # Cached node handles of this tree are about to become invalid.
+    handles.invalidate()
+    old_image_node = root_tree.nodes.get('Image Texture')
+    old_image = old_image_node.image if old_image_node else None
+    root_tree.nodes.clear()
 
-    map_1 = nodes.new('ShaderNodeMapping')
-    map_1.vector_type = 'TEXTURE'
-    # Flip the image horizontally and vertically to display it the intended way.
-    if bpy.app.version < (2, 81):
-        map_1.scale[0] = -1
-        map_1.scale[1] = -1
-    else:
-        map_1.inputs[3].default_value[0] = -1
-        map_1.inputs[3].default_value[1] = -1
-    map_1.location = auto_pos(200)
-
-    sep = nodes.new('ShaderNodeSeparateXYZ')
-    sep.location = auto_pos(350)
-
-    div_1 = nodes.new('ShaderNodeMath')
-    div_1.operation = 'DIVIDE'
-    div_1.name = ADDON_ID + 'div_01'
-    div_1.location = auto_pos(200)
-
-    div_2 = nodes.new('ShaderNodeMath')
-    div_2.operation = 'DIVIDE'
-    div_2.name = ADDON_ID + 'div_02'
-    div_2.location = auto_pos(y=-200)
-
-    com = nodes.new('ShaderNodeCombineXYZ')
-    com.inputs['Z'].default_value = 1.0
-    com.location = auto_pos(200)
-
-    map_2 = nodes.new('ShaderNodeMapping')
-    map_2.location = auto_pos(200)
-    map_2.vector_type = 'TEXTURE'
-
-    add = nodes.new('ShaderNodeMixRGB')
-    add.blend_type = 'ADD'
-    add.inputs[0].default_value = 1
-    add.location = auto_pos(350)
-
-    # Texture
-    # a) Image
-    img = nodes.new('ShaderNodeTexImage')
-    img.extension = 'CLIP'
-    img.location = auto_pos(200)
-
-    # b) Generated checker texture.
-    checker_tex = nodes.new('ShaderNodeTexChecker')
-    # checker_tex.inputs['Color2'].default_value = random_color(alpha=True)
-    checker_tex.inputs[3].default_value = 8
-    checker_tex.inputs[1].default_value = (1, 1, 1, 1)
-    checker_tex.location = auto_pos(y=-300)
-
-    mix_rgb = nodes.new('ShaderNodeMixRGB')
-    mix_rgb.name = 'Mix.001'
-    mix_rgb.inputs[1].default_value = (0, 0, 0, 0)
-    mix_rgb.location = auto_pos(200, y=-300)
-
-    group_output_node = node_group.nodes.new('NodeGroupOutput')
-    group_output_node.location = auto_pos(200)
+    # Hold important nodes inside a group node.
+    group = root_tree.nodes.new('ShaderNodeGroup')
+    group.node_tree = create_projector_node_group()
+    group.name = 'Group'
+    group.label = "!! Don't touch !!"
+    group.inputs['Scale'].default_value = (1, 1, 1)
+    group.inputs['Checker Color'].default_value = (1, 1, 1, 1)
 
     # # Root Nodes #
     # ##############
     auto_pos_root = auto_offset()
     # Image Texture
     user_texture = root_tree.nodes.new('ShaderNodeTexImage')
+    user_texture.name = 'Image Texture'
     user_texture.extension = 'CLIP'
     user_texture.label = 'Add your Image Texture or Movie here'
     user_texture.location = auto_pos_root(200, y=200)
+    user_texture.image = old_image
     # Emission
     emission = root_tree.nodes.new('ShaderNodeEmission')
+    emission.name = 'Emission'
     emission.inputs['Strength'].default_value = 1
     emission.location = auto_pos_root(300)
     # Material Output
     output = root_tree.nodes.new('ShaderNodeOutputLight')
+    output.name = 'Light Output'
     output.location = auto_pos_root(200)
 
-    # # LINK NODES #
-    # ##############
-
-    # Link inside group node
-    if(bpy.app.version >= (4, 0)):
-        tree.links.new(geo.outputs['Incoming'], vec_transform.inputs['Vector'])
-        tree.links.new(vec_transform.outputs['Vector'], map_1.inputs['Vector'])
-    else:
-        tree.links.new(tex.outputs['Normal'], map_1.inputs['Vector'])
-    tree.links.new(map_1.outputs['Vector'], sep.inputs['Vector'])
-
-    tree.links.new(sep.outputs[0], div_1.inputs[0])  # X -> value0
-    tree.links.new(sep.outputs[2], div_1.inputs[1])  # Z -> value1
-    tree.links.new(sep.outputs[1], div_2.inputs[0])  # Y -> value0
-    tree.links.new(sep.outputs[2], div_2.inputs[1])  # Z -> value1
-
-    tree.links.new(div_1.outputs[0], com.inputs[0])
-    tree.links.new(div_2.outputs[0], com.inputs[1])
-
-    tree.links.new(com.outputs['Vector'], map_2.inputs['Vector'])
-
-    # Textures
-    # a) generated texture
-    tree.links.new(map_2.outputs['Vector'], add.inputs['Color1'])
-    tree.links.new(add.outputs['Color'], img.inputs['Vector'])
-    tree.links.new(add.outputs['Color'], group_output_node.inputs[0])
-    # b) checker texture
-    tree.links.new(add.outputs['Color'], checker_tex.inputs['Vector'])
-    tree.links.new(img.outputs['Alpha'], mix_rgb.inputs[0])
-    tree.links.new(checker_tex.outputs['Color'], mix_rgb.inputs[2])
-
     # Link in root
     root_tree.links.new(group.outputs['texture vector'], user_texture.inputs['Vector'])
-    root_tree.links.new(group.outputs['color'], emission.inputs['Color'])
+    root_tree.links.new(user_texture.outputs['Color'], emission.inputs['Color'])
     root_tree.links.new(emission.outputs['Emission'], output.inputs['Surface'])
 
     # Pixel Grid Setup
-    pixel_grid_group = create_pixel_grid_node_group()
-    pixel_grid_node = spot.data.node_tree.nodes.new('ShaderNodeGroup')
-    pixel_grid_node.node_tree = pixel_grid_group
+    pixel_grid_node = root_tree.nodes.new('ShaderNodeGroup')
+    pixel_grid_node.node_tree = create_pixel_grid_node_group()
     pixel_grid_node.label = "Pixel Grid"
     pixel_grid_node.name = 'pixel_grid'
-    loc = root_tree.nodes['Emission'].location
+    loc = emission.location
     pixel_grid_node.location = (loc[0], loc[1] - 150)
 
-    root_tree.links.new(group.outputs[0], pixel_grid_node.inputs[1])
-    root_tree.links.new(emission.outputs[0], pixel_grid_node.inputs[0])
-    
-    # Blender 4.3 specific settings
-    if is_blender_43_or_newer():
-        # Handle changed node API in 4.3
-        pass
+    root_tree.links.new(group.outputs['texture vector'], pixel_grid_node.inputs['Vector'])
+    root_tree.links.new(emission.outputs[0], pixel_grid_node.inputs['Shader'])
 
-def get_resolution(proj_settings, context):
-    """ Find out what resolution is currently used and return it.
-    Resolution from the dropdown or the resolution from the custom texture.
+
+def add_projector_node_tree_to_spot(spot):
     """
+    This function turns a spot light into a projector.
+    This is achieved through a texture on the spot light and some basic math.
+    """
+    build_root_tree(spot.data)
+
+
+def get_spot(projector):
+    """ Return the spot light that does the actual projection for a projector. """
+    for child in projector.children:
+        if child.type == 'LIGHT':
+            return child
+    return None
+
+
+def projector_resolution(projector):
+    """ Find out what resolution a projector currently uses without relying on the context. """
+    proj_settings = projector.proj_settings
     if proj_settings.use_custom_texture_res and proj_settings.projected_texture == Textures.CUSTOM_TEXTURE.value:
-        projector = get_projector(context)
-        if not projector or not hasattr(projector, "children") or len(projector.children) == 0:
-            return float(1920), float(1080)  # 기본값 반환
-            
-        root_tree = projector.children[0].data.node_tree
-        if not root_tree:
-            return float(1920), float(1080)  # 기본값 반환
-            
-        image_node = root_tree.nodes.get('Image Texture')
-        if not image_node or not image_node.image:
+        rig = handles.get(projector)
+        if not rig or not rig.image.image:
             return float(1920), float(1080)  # 기본값 반환
-            
+
         # 이미지 해상도 직접 접근
-        w = image_node.image.size[0]
-        h = image_node.image.size[1]
-        
+        w, h = rig.image.image.size
+
         # 유효한 해상도 확인
         if w <= 0 or h <= 0:
             return float(1920), float(1080)  # 기본값 반환
     else:
-        w, h = proj_settings.resolution.split('x')
+        w, h = selected_resolution(proj_settings)
 
     return float(w), float(h)
 
 
-def update_throw_ratio(proj_settings, context):
+def get_resolution(proj_settings, context):
+    """ Find out what resolution is currently used and return it.
+    Resolution from the dropdown or the resolution from the custom texture.
     """
-    Adjust some settings on a camera to achieve a throw ratio
+    return projector_resolution(proj_settings.id_data)
+
+
+def _projector_group_node(projector):
+    """ Return the projector group node in the root tree of the spot light or None. """
+    rig = handles.get(projector)
+    return rig.group if rig else None
+
+
+# Lens limits stored on a projector object by update_from_lens_profile().
+LIMITED_SETTINGS = ('throw_ratio', 'h_shift', 'v_shift')
+
+
+def _limits(projectors, prop):
+    """ Lower and upper lens limits of prop for every projector. NaN where a projector has none. """
+    low = np.full(len(projectors), np.nan)
+    high = np.full(len(projectors), np.nan)
+    for i, projector in enumerate(projectors):
+        min_value = projector.get(f"{prop}_min", None)
+        max_value = projector.get(f"{prop}_max", None)
+        # 최소값과 최대값이 모두 있을 때만 제한 적용
+        if min_value is not None and max_value is not None:
+            low[i], high[i] = min_value, max_value
+    return low, high
+
+
+def apply_optics(projectors):
+    """
+    Write throw ratio and lens shift of projectors into their cameras and texture mappings.
+    Values outside of the lens limits of a projector are clamped first. All math runs
+    vectorized over the projectors through the optics module, the loop at the end only
+    copies the results into the rigs.
     """
-    # 무한 재귀 방지 플래그 추가
-    if getattr(update_throw_ratio, '_is_updating', False):
+    if not projectors:
         return
-    
-    update_throw_ratio._is_updating = True
-    
-    try:
-        projector = get_projector(context)
-        if not projector:
-            return
-        
-        # 렌즈 제한 확인 및 적용
-        min_throw = projector.get("throw_ratio_min", None)
-        max_throw = projector.get("throw_ratio_max", None)
-        
-        # 제한 값이 있고, 현재 값이 범위를 벗어나면 조정
-        if min_throw is not None and max_throw is not None:
-            if proj_settings.throw_ratio < min_throw:
-                proj_settings["throw_ratio"] = min_throw  # 직접 값 설정으로 재귀 방지
-            elif proj_settings.throw_ratio > max_throw:
-                proj_settings["throw_ratio"] = max_throw  # 직접 값 설정으로 재귀 방지
-        
-        # 기존 코드 유지
-        throw_ratio = proj_settings.get('throw_ratio')
-        distance = 1
-        alpha = math.atan((distance/throw_ratio)*.5) * 2
-        projector.data.lens_unit = 'FOV'
-        projector.data.angle = alpha
-        projector.data.sensor_width = 10
-        projector.data.display_size = 1
+    settings = [projector.proj_settings for projector in projectors]
+
+    # 렌즈 제한 확인 및 적용
+    values = {}
+    for prop in LIMITED_SETTINGS:
+        current = np.array([getattr(proj_settings, prop) for proj_settings in settings])
+        clamped = optics.clamp_to_limits(current, *_limits(projectors, prop))
+        for i in np.flatnonzero(clamped != current):
+            settings[i][prop] = float(clamped[i])  # 직접 값 설정으로 콜백 호출 방지
+        values[prop] = clamped
+
+    throw_ratio, h_shift, v_shift = (values[prop] for prop in LIMITED_SETTINGS)
+    w, h = np.array([projector_resolution(projector) for projector in projectors]).T
+
+    angles = optics.field_of_view(throw_ratio).tolist()
+    shifts = optics.camera_shift(h_shift, v_shift, w, h).tolist()
+    scales = optics.mapping_scale(throw_ratio, w, h).tolist()
+    offsets = optics.mapping_offset(throw_ratio, h_shift, v_shift, w, h).tolist()
+
+    for i, projector in enumerate(projectors):
+        cam = projector.data
+        cam.lens_unit = 'FOV'
+        cam.angle = angles[i]
+        cam.sensor_width = 10
+        cam.display_size = 1
+        cam.shift_x, cam.shift_y = shifts[i]
 
         # Adjust Texture to fit new camera ###
-        w, h = get_resolution(proj_settings, context)
-        aspect_ratio = w/h
-        inverted_aspect_ratio = 1/aspect_ratio
+        group_node = _projector_group_node(projector)
+        if group_node:
+            group_node.inputs['Scale'].default_value = scales[i]
+            group_node.inputs['Offset'].default_value = offsets[i]
 
-        # Projected Texture
-        # 직접 호출 대신 안전 검사 추가
-        if not getattr(update_projected_texture, '_is_updating', False):
-            update_projected_texture(proj_settings, context)
 
-        # 스포트라이트 노드 업데이트
-        try:
-            # 자식 객체 확인 안전하게 수행
-            spot = None
-            if hasattr(projector, "children") and len(projector.children) > 0:
-                spot = projector.children[0]
-                
-            if spot and hasattr(spot.data, "node_tree"):
-                nodes = spot.data.node_tree.nodes.get('Group')
-                if nodes and hasattr(nodes, "node_tree") and hasattr(nodes.node_tree, "nodes"):
-                    mapping_node = nodes.node_tree.nodes.get('Mapping.001')
-                    if mapping_node:
-                        if bpy.app.version < (2, 81):
-                            mapping_node.scale[0] = 1 / throw_ratio
-                            mapping_node.scale[1] = 1 / throw_ratio * inverted_aspect_ratio
-                        else:
-                            mapping_node.inputs[3].default_value[0] = 1 / throw_ratio
-                            mapping_node.inputs[3].default_value[1] = 1 / throw_ratio * inverted_aspect_ratio
-        except Exception as e:
-            print(f"Error updating spotlight nodes: {e}")
+def apply_resolution_texture(projector):
+    """ Show the default test texture that matches the selected resolution. """
+    rig = handles.get(projector)
+    if not rig:
+        return
+    image_texture_node = rig.image
+
+    # 선택된 해상도에 맞는 테스트 패턴으로 변경 (필요할 때만 생성)
+    old_image = image_texture_node.image
+    test_pattern = get_test_pattern(*selected_resolution(projector.proj_settings))
+    if old_image == test_pattern:
+        return
+    image_texture_node.image = test_pattern
 
-        # 렌즈 시프트 업데이트 (무한 재귀 방지 검사 추가)
-        if not getattr(update_lens_shift, '_is_updating', False):
-            update_lens_shift(proj_settings, context)
-    finally:
-        # 플래그 해제
-        update_throw_ratio._is_updating = False
+    # 더 이상 사용되지 않는 이전 테스트 패턴 제거 (커스텀 이미지는 유지)
+    if old_image and old_image.name.startswith(TEST_PATTERN_PREFIX) and old_image.users == 0:
+        bpy.data.images.remove(old_image)
 
-def update_lens_shift(proj_settings, context):
+
+def _link_once(node_tree, from_socket, to_socket):
+    """ Link two sockets unless exactly this link already exists, so unchanged links are not recreated. """
+    if to_socket.is_linked and to_socket.links[0].from_socket == from_socket:
+        return
+    node_tree.links.new(from_socket, to_socket)
+
+
+def apply_pixel_grid(projector):
+    """ Update the pixel grid resolution and link it in or out. """
+    rig = handles.get(projector)
+    if not rig:
+        return
+    width, height = projector_resolution(projector)
+    rig.pixel_grid.inputs['Width'].default_value = width
+    rig.pixel_grid.inputs['Height'].default_value = height
+    if projector.proj_settings.show_pixel_grid:
+        _link_once(rig.node_tree, rig.pixel_grid.outputs[0], rig.output_surface)
+    else:
+        _link_once(rig.node_tree, rig.emission.outputs[0], rig.output_surface)
+
+
+def apply_power(projector):
+    """ Copy the projector power to the spot light. """
+    rig = handles.get(projector)
+    if rig:
+        rig.spot.data.energy = projector.proj_settings.power
+
+
+def refresh_projector(projector):
     """
-    Apply the shift to the camera and texture.
+    Recompute every derived value of a projector exactly once.
+    Unlike the update callbacks this does not depend on the selection, so it can be used for
+    projectors that were created or changed from a script.
     """
-    # 무한 재귀 방지 플래그
-    if getattr(update_lens_shift, '_is_updating', False):
-        return
-    
-    update_lens_shift._is_updating = True
-    
-    try:
-        projector = get_projector(context)
-        if not projector:
-            return
-        
-        # 렌즈 제한 확인 및 적용
-        h_min = projector.get("h_shift_min", None)
-        h_max = projector.get("h_shift_max", None)
-        v_min = projector.get("v_shift_min", None)
-        v_max = projector.get("v_shift_max", None)
-        
-        # 현재 시프트 값 가져오기
-        h_shift = proj_settings.h_shift
-        v_shift = proj_settings.v_shift
-        
-        # 값 변경 여부 플래그
-        values_changed = False
-        
-        # 수평 시프트 제한 적용
-        if h_min is not None and h_max is not None:
-            if h_shift < h_min:
-                h_shift = h_min
-                # 직접 프로퍼티 값 설정 (콜백 호출 방지)
-                proj_settings["h_shift"] = h_min
-                values_changed = True
-            elif h_shift > h_max:
-                h_shift = h_max
-                proj_settings["h_shift"] = h_max
-                values_changed = True
-        
-        # 수직 시프트 제한 적용
-        if v_min is not None and v_max is not None:
-            if v_shift < v_min:
-                v_shift = v_min
-                proj_settings["v_shift"] = v_min
-                values_changed = True
-            elif v_shift > v_max:
-                v_shift = v_max
-                proj_settings["v_shift"] = v_max
-                values_changed = True
-        
-            
-        # 나머지 계산을 위해 값을 백분율로 변환 (%)
-        h_shift_normalized = h_shift / 100
-        v_shift_normalized = v_shift / 100
-        throw_ratio = proj_settings.get('throw_ratio')
+    scheduler.run(projector, scheduler.ALL)
 
-        w, h = get_resolution(proj_settings, context)
-        inverted_aspect_ratio = h/w
 
-        # 카메라 속성 업데이트
-        cam = projector
-        if cam and hasattr(cam, "data"):
-            cam.data.shift_x = h_shift_normalized
-            cam.data.shift_y = v_shift_normalized * inverted_aspect_ratio
+# The update callbacks only mark what changed; scheduler.flush() does the actual work.
+
+def update_throw_ratio(proj_settings, context):
+    """
+    Adjust some settings on a camera to achieve a throw ratio
+    """
+    scheduler.mark(proj_settings.id_data, scheduler.OPTICS)
 
-        # 스포트라이트 노드 설정 업데이트 - 안전 검사 추가
-        try:
-            if hasattr(projector, "children") and len(projector.children) > 0:
-                spot = projector.children[0]
-                if spot and hasattr(spot.data, "node_tree"):
-                    nodes = spot.data.node_tree.nodes.get('Group')
-                    if nodes and hasattr(nodes, "node_tree") and hasattr(nodes.node_tree, "nodes"):
-                        mapping_node = nodes.node_tree.nodes.get('Mapping.001')
-                        if mapping_node:
-                            if bpy.app.version < (2, 81):
-                                mapping_node.translation[0] = h_shift_normalized / throw_ratio
-                                mapping_node.translation[1] = v_shift_normalized / throw_ratio * inverted_aspect_ratio
-                            else:
-                                mapping_node.inputs[1].default_value[0] = h_shift_normalized / throw_ratio
-                                mapping_node.inputs[1].default_value[1] = v_shift_normalized / throw_ratio * inverted_aspect_ratio
-        except Exception as e:
-            print(f"Error updating spotlight nodes for lens shift: {e}")
-    finally:
-        # 플래그 해제
-        update_lens_shift._is_updating = False
+
+def update_lens_shift(proj_settings, context):
+    """
+    Apply the shift to the camera and texture.
+    """
+    scheduler.mark(proj_settings.id_data, scheduler.OPTICS)
 
 
 def update_resolution(proj_settings, context):
     """해상도 변경 시 호출되는 함수"""
-    projector = get_projector(context)
-    if not projector or not projector.children or len(projector.children) == 0:
-        return
-        
-    spot = projector.children[0]
-    if not spot or not spot.data or not spot.data.node_tree:
-        return
-        
-    # 이미지 텍스처 노드 찾기
-    image_texture_node = None
-    for node in spot.data.node_tree.nodes:
-        if node.bl_idname == 'ShaderNodeTexImage':
-            image_texture_node = node
-            break
-            
-    if not image_texture_node:
-        return
-        
-    # 선택된 해상도에 맞는 기본 텍스처 이미지로 변경
-    default_texture_name = f'_proj.tex.{proj_settings.resolution}'
-    if default_texture_name in bpy.data.images:
-        # 이전 이미지 저장
-        old_image = image_texture_node.image
-        
-        # 새 이미지 설정
-        image_texture_node.image = bpy.data.images[default_texture_name]
-        print(f"텍스처 이미지를 {default_texture_name}으로 변경")
-        
-        # 커스텀 이미지가 아닌 경우에만 이전 이미지 해제
-        if old_image and old_image.name.startswith('_proj.tex.'):
-            old_image.user_clear()
-    
-    # 픽셀 그리드 설정 업데이트
-    update_pixel_grid(proj_settings, context)
-    
-    # 노드 연결 업데이트 확인
-    update_projected_texture(proj_settings, context)
-    
-    # throw ratio 업데이트 (해상도에 맞게 투사 비율 조정)
-    update_throw_ratio(proj_settings, context)
+    # 테스트 패턴, 투사 비율, 픽셀 그리드, 노드 연결 모두 해상도에 의존
+    scheduler.mark(proj_settings.id_data, scheduler.TEXTURE | scheduler.OPTICS |
+                   scheduler.PIXEL_GRID | scheduler.LINKS)
 
 
 def update_checker_color(proj_settings, context):
     # Update checker texture color
-    nodes = get_projector(
-        context).children[0].data.node_tree.nodes['Group'].node_tree.nodes
+    group_node = _projector_group_node(proj_settings.id_data)
     c = proj_settings.projected_color
-    nodes['Checker Texture'].inputs['Color2'].default_value = [c.r, c.g, c.b, 1]
+    group_node.inputs['Checker Color'].default_value = [c.r, c.g, c.b, 1]
 
 
 def update_power(proj_settings, context):
     # Update spotlight power
-    spot = get_projector(context).children[0]
-    spot.data.energy = proj_settings["power"]
+    scheduler.mark(proj_settings.id_data, scheduler.POWER)
 
 
-def update_pixel_grid(proj_settings, context):
-    """ Update the pixel grid. Meaning, make it visible by linking the right node and updating the resolution. """
-    root_tree = get_projector(context).children[0].data.node_tree
-    nodes = root_tree.nodes
-    pixel_grid_nodes = nodes['pixel_grid'].node_tree.nodes
-    width, height = get_resolution(proj_settings, context)
-    pixel_grid_nodes['_width'].outputs[0].default_value = width
-    pixel_grid_nodes['_height'].outputs[0].default_value = height
-    if proj_settings.show_pixel_grid:
-        root_tree.links.new(nodes['pixel_grid'].outputs[0], nodes['Light Output'].inputs[0])
-    else:
-        root_tree.links.new(nodes['Emission'].outputs[0], nodes['Light Output'].inputs[0])
+def update_edge_blend(proj_settings, context):
+    scheduler.mark(proj_settings.id_data, scheduler.LINKS)
 
-    
-def create_pixel_grid_node_group():
-    node_group = bpy.data.node_groups.new(
-        '_Projectors-Addon_PixelGrid', 'ShaderNodeTree')
 
-    # Create input/output sockets for the node group.
-    if(bpy.app.version >= (4, 0)):
-        node_group.interface.new_socket('Shader', socket_type='NodeSocketShader')
-        node_group.interface.new_socket('Vector', socket_type='NodeSocketVector')
+def update_simulate_lens(proj_settings, context):
+    scheduler.mark(proj_settings.id_data, scheduler.LINKS)
 
-        node_group.interface.new_socket('Shader', in_out='OUTPUT', socket_type='NodeSocketShader')
-    else:
-        inputs = node_group.inputs
-        inputs.new('NodeSocketShader', 'Shader')
-        inputs.new('NodeSocketVector', 'Vector')
-
-        outputs = node_group.outputs
-        outputs.new('NodeSocketShader', 'Shader')
-
-    nodes = node_group.nodes
-
-    auto_pos = auto_offset()
-
-    group_input = nodes.new('NodeGroupInput')
-    group_input.location = auto_pos(200)
-
-    sepXYZ = nodes.new('ShaderNodeSeparateXYZ')
-    sepXYZ.location = auto_pos(200)
-
-    in_width = nodes.new('ShaderNodeValue')
-    in_width.name = '_width'
-    in_width.label = 'Width'
-    in_width.location = auto_pos(100)
-
-    in_height = nodes.new('ShaderNodeValue')
-    in_height.name = '_height'
-    in_height.label = 'Height'
-    in_height.location = auto_pos(y=-200)
-
-    mul1 = nodes.new('ShaderNodeMath')
-    mul1.operation = 'MULTIPLY'
-    mul1.location = auto_pos(100)
-
-    mul2 = nodes.new('ShaderNodeMath')
-    mul2.operation = 'MULTIPLY'
-    mul2.location = auto_pos(y=-200)
-
-    mod1 = nodes.new('ShaderNodeMath')
-    mod1.operation = 'MODULO'
-    mod1.inputs[1].default_value = 1
-    mod1.location = auto_pos(100)
-
-    mod2 = nodes.new('ShaderNodeMath')
-    mod2.operation = 'MODULO'
-    mod2.inputs[1].default_value = 1
-    mod2.location = auto_pos(y=-200)
-
-    col_ramp1 = nodes.new('ShaderNodeValToRGB')
-    col_ramp1.color_ramp.elements[1].position = 0.025
-    col_ramp1.color_ramp.interpolation = 'CONSTANT'
-    col_ramp1.location = auto_pos(100)
-
-    col_ramp2 = nodes.new('ShaderNodeValToRGB')
-    col_ramp2.color_ramp.elements[1].position = 0.025
-    col_ramp2.color_ramp.interpolation = 'CONSTANT'
-    col_ramp2.location = auto_pos(y=-200)
-
-    mix_rgb = nodes.new('ShaderNodeMixRGB')
-    mix_rgb.use_clamp = True
-    mix_rgb.blend_type = 'MULTIPLY'
-    mix_rgb.inputs[0].default_value = 1
-    mix_rgb.location = auto_pos(200)
-    
-    transparent = nodes.new('ShaderNodeBsdfTransparent')
-    transparent.location = auto_pos(y=-200)
-
-    mix_shader = nodes.new('ShaderNodeMixShader')
-    mix_shader.location = auto_pos(100)
-
-    group_output = nodes.new('NodeGroupOutput')
-    group_output.location = auto_pos(100)
-    
-    # Link Nodes
-    links = node_group.links
 
-    links.new(group_input.outputs[0], mix_shader.inputs[2])
-    links.new(group_input.outputs[1], sepXYZ.inputs[0])
-
-    links.new(in_width.outputs[0], mul1.inputs[1])
-    links.new(in_height.outputs[0], mul2.inputs[1])
-
-    links.new(sepXYZ.outputs[0], mul1.inputs[0])
-    links.new(sepXYZ.outputs[1], mul2.inputs[0])
-
-    links.new(mul1.outputs[0], mod1.inputs[0])
-    links.new(mul2.outputs[0], mod2.inputs[0])
+def update_pixel_grid(proj_settings, context):
+    """ Update the pixel grid. Meaning, make it visible by linking the right node and updating the resolution. """
+    scheduler.mark(proj_settings.id_data, scheduler.PIXEL_GRID)
 
-    links.new(mod1.outputs[0], col_ramp1.inputs[0])
-    links.new(mod2.outputs[0], col_ramp2.inputs[0])
 
-    links.new(col_ramp1.outputs[0], mix_rgb.inputs[1])
-    links.new(col_ramp2.outputs[0], mix_rgb.inputs[2])
+def propagate_to_selected(proj_settings, context, prop):
+    """
+    Copy prop from the active projector to all other selected projectors, if editing all
+    selected projectors is enabled in the scene. Lens limits of the targets are applied when
+    their optics are recomputed, which happens for all of them in one vectorized pass.
+    """
+    source = proj_settings.id_data
+    scene = getattr(context, 'scene', None)
+    if not scene or not scene.proj_edit_selected or getattr(context, 'active_object', None) != source:
+        return []
+    targets = [projector for projector in get_projectors(context, only_selected=True) if projector != source]
+    if not targets:
+        return []
+    value = getattr(proj_settings, prop)
+    with scheduler.batch():
+        for projector in targets:
+            # The update callbacks of the targets only mark them dirty, they don't propagate
+            # any further because the targets are not the active object.
+            setattr(projector.proj_settings, prop, value)
+    return targets
+
+
+def edit_selected(prop, update):
+    """ Wrap the update callback of prop so changes on the active projector reach all selected projectors. """
+    def wrapper(proj_settings, context):
+        if update:
+            update(proj_settings, context)
+        propagate_to_selected(proj_settings, context, prop)
+    return wrapper
+
+
+def update_from_lens_profile(projector, profile):
+    """
+    Store the limits of a lens profile on a projector and bring its settings within them.
+    Returns True if the profile could be applied.
+    """
+    if not projector or not profile or 'specs' not in profile:
+        return False
+    specs = profile['specs']
+
+    # 기존 제한값 초기화
+    for prop in LIMITED_SETTINGS:
+        for key in (f"{prop}_min", f"{prop}_max"):
+            if key in projector:
+                del projector[key]
+
+    throw_ratio = specs.get('throw_ratio')
+    if isinstance(throw_ratio, dict) and 'min' in throw_ratio and 'max' in throw_ratio:
+        projector["throw_ratio_min"] = throw_ratio['min']
+        projector["throw_ratio_max"] = throw_ratio['max']
+
+    lens_shift = specs.get('lens_shift', {})
+    for prop, key in (('h_shift', 'h_shift_range'), ('v_shift', 'v_shift_range')):
+        if key in lens_shift:
+            projector[f"{prop}_min"], projector[f"{prop}_max"] = lens_shift[key]
 
-    links.new(mix_rgb.outputs[0], mix_shader.inputs[0])
-    links.new(transparent.outputs[0], mix_shader.inputs[1])
+    try:
+        from .lens_management.database import apply_optical_properties
+        apply_optical_properties(profile, projector)
+    except ImportError:
+        pass
 
-    links.new(mix_shader.outputs[0], group_output.inputs[0])
+    # 새 제한으로 값 조정 및 재계산
+    scheduler.mark(projector, scheduler.OPTICS | scheduler.PIXEL_GRID | scheduler.LINKS)
+    return True
 
-    return node_group
     
+def create_pixel_grid_node_group():
+    """ Return the shared pixel grid node group. It is created only once per file. """
+    return node_groups.get_node_group(node_groups.PIXEL_GRID_GROUP)
+
 
 def create_projector(context):
     """
@@ -658,7 +511,6 @@ def create_projector(context):
     The camera is the object intended for the user to manipulate and custom properties are stored there.
     The spotlight with a custom nodetree is responsible for actual projection of the texture.
     """
-    create_projector_textures()
     log.debug('Creating projector.')
 
     # Create a camera and a spotlight
@@ -692,37 +544,22 @@ def create_projector(context):
 
 
 def init_projector(proj_settings, context):
-    # 기본 속성 설정
-    proj_settings.throw_ratio = 0.8
-    proj_settings.power = 1000.0
-    proj_settings.projected_texture = Textures.CUSTOM_TEXTURE.value  # 항상 Custom Texture로 설정
-    proj_settings.h_shift = 0.0
-    proj_settings.v_shift = 0.0
-    proj_settings.resolution = '1920x1080'
-    proj_settings.use_custom_texture_res = True
-
-    # 프로젝터 객체에 is_projector 플래그 설정
-    context.object['is_projector'] = True
-    
-    # 프로젝터 초기화
-    update_throw_ratio(proj_settings, context)
-    update_projected_texture(proj_settings, context)
-    update_resolution(proj_settings, context)
-    update_lens_shift(proj_settings, context)
-    update_power(proj_settings, context)
-    update_pixel_grid(proj_settings, context)
-    
-    # 기본 이미지 텍스처 설정 - 기본 테스트 패턴 이미지 설정
-    projector = get_projector(context)
-    if projector and hasattr(projector, "children") and len(projector.children) > 0:
-        spot = projector.children[0]
-        if spot and hasattr(spot.data, "node_tree"):
-            image_node = spot.data.node_tree.nodes.get('Image Texture')
-            if image_node:
-                # 기본 텍스처 이름 형식: '_proj.tex.1920x1080'
-                default_texture_name = f'_proj.tex.{proj_settings.resolution}'
-                if default_texture_name in bpy.data.images:
-                    image_node.image = bpy.data.images[default_texture_name]
+    # 모든 변경을 모아서 한 번만 계산
+    with scheduler.batch():
+        # 기본 속성 설정
+        proj_settings.throw_ratio = 0.8
+        proj_settings.power = 1000.0
+        proj_settings.projected_texture = Textures.CUSTOM_TEXTURE.value  # 항상 Custom Texture로 설정
+        proj_settings.h_shift = 0.0
+        proj_settings.v_shift = 0.0
+        proj_settings.resolution = '1920x1080'
+        proj_settings.use_custom_texture_res = True
+
+        # 프로젝터 레지스트리에 등록 (is_projector 플래그와 고유 ID 설정)
+        registry.add(context.object)
+
+        # 프로젝터 초기화
+        scheduler.mark(proj_settings.id_data, scheduler.ALL)
     
     # 렌즈 관리 초기화
     if hasattr(context.object, "lens_manager"):
@@ -783,108 +620,167 @@ class PROJECTOR_OT_create_projector(Operator):
 
 def update_projected_texture(proj_settings, context):
     """투사 출력 소스 업데이트"""
-    projector = get_projector(context)
-    if not projector:
-        return
-        
-    # 스팟라이트 확인
-    if not hasattr(projector, "children") or len(projector.children) == 0:
-        return
-        
-    spot = projector.children[0]
-    if not spot or not hasattr(spot.data, "node_tree"):
-        return
-        
-    root_tree = spot.data.node_tree
-    
-    # 주요 노드 찾기
-    group_node = root_tree.nodes.get('Group')
-    emission_node = root_tree.nodes.get('Emission')
-    light_output_node = None
-    for node in root_tree.nodes:
-        if node.bl_idname == 'ShaderNodeOutputLight':
-            light_output_node = node
-            break
-    
-    # 이미지 텍스처 노드 찾기
-    custom_tex_node = root_tree.nodes.get('Image Texture')
-    
-    if not all([group_node, emission_node, light_output_node, custom_tex_node]):
-        print("필수 노드를 찾을 수 없음")
-        return
-    
-    # 기존 연결 제거 (Emission 입력과 Light Output 입력만)
-    links_to_remove = []
-    for link in root_tree.links:
-        if link.to_node == emission_node and link.to_socket == emission_node.inputs[0]:
-            links_to_remove.append(link)
-        elif link.to_node == light_output_node:
-            links_to_remove.append(link)
-    
-    for link in links_to_remove:
-        root_tree.links.remove(link)
-    
-    # 그룹 노드 트리와 출력 확인
-    texture_vector_output = None
-    for output in group_node.outputs:
-        if output.name == 'texture vector':
-            texture_vector_output = output
-            break
-    
-    if not texture_vector_output:
-        print("texture vector 출력을 찾을 수 없음")
+    # 텍스처 소스가 바뀌면 해상도(이미지 크기)도 바뀔 수 있음
+    scheduler.mark(proj_settings.id_data, scheduler.LINKS | scheduler.OPTICS | scheduler.PIXEL_GRID)
+
+
+def apply_projected_texture(projector):
+    """ Link the projected image, the emission and the light output of a projector (and the corner pin if enabled). """
+    rig = handles.get(projector)
+    if not rig:
         return
-    
-    # Custom Texture 모드: Image Texture -> Emission
-    # Image Texture -> Emission
-    root_tree.links.new(custom_tex_node.outputs[0], emission_node.inputs[0])
-    print("Image Texture -> Emission 연결 생성됨")
-    
-    # 항상 Emission -> Light Output 연결
-    root_tree.links.new(emission_node.outputs[0], light_output_node.inputs[0])
-    print("Emission -> Light Output 연결 생성됨")
-    
+    proj_settings = projector.proj_settings
+    if proj_settings.simulate_lens:
+        rig = add_lens_nodes(projector)
+        rig.lens_lut.image = get_lens_lut(projector)
+        _link_once(rig.node_tree, rig.texture_vector, rig.lens_lut.inputs['Vector'])
+    warp_grid = getattr(projector, 'warp_grid', None)
+    if warp_grid and warp_grid.enabled:
+        rig = add_warp_nodes(projector)
+        try:
+            from .warp import texture
+            texture.bake(projector, rig)
+        except Exception as e:
+            log.error(f'Could not bake the warp grid of {projector.name}: {e}')
+        source = rig.lens_lut.outputs['Color'] if proj_settings.simulate_lens and rig.lens_lut else rig.texture_vector
+        _link_once(rig.node_tree, source, rig.warp_map.inputs['Vector'])
+        _link_once(rig.node_tree, source, rig.warp.inputs[0])
+    root_tree = rig.node_tree
+    simulate_lens = proj_settings.simulate_lens and rig.lens
+
+    # Custom Texture 모드: Image Texture -> (Edge Blend ->) (Lens ->) Emission
+    color = rig.image_color
+    if proj_settings.edge_blend and rig.blend:
+        _link_once(root_tree, color, rig.blend.inputs['Color'])
+        color = rig.blend.outputs['Color']
+    if simulate_lens:
+        _link_once(root_tree, color, rig.lens.inputs['Color'])
+        color = rig.lens.outputs['Color']
+    _link_once(root_tree, color, rig.emission_color)
+
     # 코너 핀이 활성화된 경우 처리
     if hasattr(projector, 'corner_pin') and projector.corner_pin.enabled:
         try:
             from . import corner_pin
             corner_pin.nodes.update_corner_pin_nodes(projector)
-            print("코너 핀 노드 업데이트됨")
         except Exception as e:
             print(f"코너 핀 업데이트 오류: {e}")
     else:
-        # 코너 핀이 비활성화된 경우 직접 Group -> Image Texture 연결
-        vector_input = None
-        for input in custom_tex_node.inputs:
-            if input.name == 'Vector':
-                vector_input = input
-                break
-        
-        if not vector_input and len(custom_tex_node.inputs) > 0:
-            vector_input = custom_tex_node.inputs[0]
-        
-        if vector_input:
-            # 기존 연결 제거
-            for link in list(root_tree.links):
-                if link.to_node == custom_tex_node and link.to_socket == vector_input:
-                    root_tree.links.remove(link)
-            
-            # Group -> Image Texture 연결
-            root_tree.links.new(texture_vector_output, vector_input)
-            print("Group -> Image Texture 연결 생성됨")
-    
-    # 픽셀 그리드 적용 여부에 따라 출력 연결 업데이트
-    if proj_settings.show_pixel_grid:
-        pixel_grid_node = root_tree.nodes.get('pixel_grid')
-        if pixel_grid_node:
-            # 기존 Light Output 연결 제거
-            for link in list(root_tree.links):
-                if link.to_node == light_output_node:
-                    root_tree.links.remove(link)
-            
-            # Pixel Grid -> Light Output 연결
-            root_tree.links.new(pixel_grid_node.outputs[0], light_output_node.inputs[0])
-            print("픽셀 그리드 활성화: Pixel Grid -> Light Output 연결 생성됨")
+        # 코너 핀이 비활성화된 경우 직접 Group (-> Lens LUT) (-> Warp) -> Image Texture 연결
+        _link_once(root_tree, corrected_texture_vector(projector, rig), rig.image_vector)
+
+    # 픽셀 그리드 적용 여부에 따라 출력 연결 업데이트 (항상 Emission 또는 Pixel Grid -> Light Output)
+    if projector.proj_settings.show_pixel_grid:
+        _link_once(root_tree, rig.pixel_grid.outputs[0], rig.output_surface)
+    else:
+        _link_once(root_tree, rig.emission.outputs[0], rig.output_surface)
+
+
+def corrected_texture_vector(projector, rig):
+    """
+    The texture vector of a projector after the lens distortion and the warp grid, if they
+    are enabled. The projected image, or the corner pin in front of it, samples with it.
+    """
+    source = rig.texture_vector
+    if projector.proj_settings.simulate_lens and rig.lens_lut:
+        source = rig.lens_lut.outputs['Color']
+    warp_grid = getattr(projector, 'warp_grid', None)
+    if warp_grid and warp_grid.enabled and rig.warp:
+        source = rig.warp.outputs['Vector']
+    return source
+
+
+def add_blend_nodes(projector):
+    """
+    Add the edge blend group and the two mask image nodes to the root tree of a projector.
+    The masks are sampled with the uncorrected texture vector, they belong to the pixels of
+    the projector, not to the (corner pinned) content. Returns the RigHandles or None.
+    """
+    rig = handles.get(projector)
+    if not rig or rig.blend:
+        return rig
+    root_tree = rig.node_tree
+    x, y = rig.emission.location
+
+    masks = []
+    for name, offset in (('Blend Mask', -350), ('Black Level Mask', -650)):
+        mask = root_tree.nodes.new('ShaderNodeTexImage')
+        mask.name = mask.label = name
+        mask.extension = 'CLIP'
+        mask.location = (x - 500, y + offset)
+        root_tree.links.new(rig.texture_vector, mask.inputs['Vector'])
+        masks.append(mask)
+
+    blend = root_tree.nodes.new('ShaderNodeGroup')
+    blend.node_tree = node_groups.get_node_group(node_groups.BLEND_GROUP)
+    blend.name = blend.label = 'Edge Blend'
+    blend.location = (x - 200, y - 350)
+    blend.inputs['Gamma'].default_value = 2.2
+    root_tree.links.new(masks[0].outputs['Color'], blend.inputs['Blend'])
+    root_tree.links.new(masks[1].outputs['Color'], blend.inputs['Black Level'])
+
+    scheduler.mark(projector, scheduler.LINKS)
+    return handles.get(projector)
+
+
+def add_lens_nodes(projector):
+    """
+    Add the lens lookup image node and the lens group to the root tree of a projector.
+    The lookup image is sampled with the uncorrected texture vector and its color is the
+    distorted texture vector, which feeds the corner pin or the projected image. Its blue
+    channel, the vignetting, darkens the projected color in the lens group.
+    Returns the RigHandles or None.
+    """
+    rig = handles.get(projector)
+    if not rig or rig.lens:
+        return rig
+    root_tree = rig.node_tree
+    x, y = rig.emission.location
+
+    lut = root_tree.nodes.new('ShaderNodeTexImage')
+    lut.name = lut.label = 'Lens LUT'
+    lut.extension = 'EXTEND'
+    lut.interpolation = 'Linear'
+    lut.location = (x - 500, y + 350)
+    root_tree.links.new(rig.texture_vector, lut.inputs['Vector'])
+
+    lens = root_tree.nodes.new('ShaderNodeGroup')
+    lens.node_tree = node_groups.get_node_group(node_groups.LENS_GROUP)
+    lens.name = lens.label = 'Lens'
+    lens.location = (x - 200, y + 350)
+    root_tree.links.new(lut.outputs['Color'], lens.inputs['Lens LUT'])
+
+    scheduler.mark(projector, scheduler.LINKS)
+    return handles.get(projector)
+
+
+def add_warp_nodes(projector):
+    """
+    Add the warp map image node and the node adding its displacement to the root tree of a
+    projector. The warp map is sampled once with the (lens distorted) texture vector, its
+    color is the displacement of the texture vector to the warped image (see warp.texture).
+    Returns the RigHandles or None.
+    """
+    rig = handles.get(projector)
+    if not rig or rig.warp:
+        return rig
+    root_tree = rig.node_tree
+    x, y = rig.emission.location
+
+    warp_map = root_tree.nodes.new('ShaderNodeTexImage')
+    warp_map.name = warp_map.label = 'Warp Map'
+    warp_map.extension = 'EXTEND'
+    warp_map.interpolation = 'Linear'
+    warp_map.location = (x - 500, y + 650)
+
+    warp = root_tree.nodes.new('ShaderNodeVectorMath')
+    warp.operation = 'ADD'
+    warp.name = warp.label = 'Warp'
+    warp.location = (x - 200, y + 650)
+    root_tree.links.new(warp_map.outputs['Color'], warp.inputs[1])
+
+    scheduler.mark(projector, scheduler.LINKS)
+    return handles.get(projector)
 
 
 class PROJECTOR_OT_delete_projector(Operator):
@@ -899,11 +795,23 @@ class PROJECTOR_OT_delete_projector(Operator):
 
     def execute(self, context):
         selected_projectors = get_projectors(context, only_selected=True)
+        orphans = []
         for projector in selected_projectors:
+            registry.remove(projector)
+            orphans.extend(child.data for child in projector.children if child.data)
+            orphans.append(projector.data)
             for child in projector.children:
                 bpy.data.objects.remove(child, do_unlink=True)
             else:
                 bpy.data.objects.remove(projector, do_unlink=True)
+        # The light data keeps its node tree, and with it the test pattern, until it is removed too.
+        for data in orphans:
+            if data.users == 0:
+                if isinstance(data, bpy.types.Light):
+                    bpy.data.lights.remove(data)
+                elif isinstance(data, bpy.types.Camera):
+                    bpy.data.cameras.remove(data)
+        remove_unused_test_patterns()
         return {'FINISHED'}
 
 
@@ -911,34 +819,51 @@ class ProjectorSettings(bpy.types.PropertyGroup):
     throw_ratio: bpy.props.FloatProperty(
         name="Throw Ratio",
         soft_min=0.4, soft_max=3,
-        update=update_throw_ratio,
+        update=edit_selected('throw_ratio', update_throw_ratio),
         subtype='FACTOR')
     power: bpy.props.FloatProperty(
         name="Projector Power",
         soft_min=0, soft_max=999999,
-        update=update_power,
+        update=edit_selected('power', update_power),
         unit='POWER')
+    lumens: bpy.props.FloatProperty(
+        name="Brightness",
+        description="Rated light output in ANSI lumens, used by the illuminance analysis",
+        default=5000, min=0, soft_max=50000,
+        update=edit_selected('lumens', None))
     resolution: bpy.props.EnumProperty(
         items=RESOLUTIONS,
         default='1920x1080',
         description="Select a Resolution for your Projector",
-        update=update_resolution)
+        update=edit_selected('resolution', update_resolution))
+    custom_width: bpy.props.IntProperty(
+        name="Width",
+        description="Horizontal resolution when the resolution is set to Custom",
+        default=1920, min=1, soft_max=8192,
+        subtype='PIXEL',
+        update=edit_selected('custom_width', update_resolution))
+    custom_height: bpy.props.IntProperty(
+        name="Height",
+        description="Vertical resolution when the resolution is set to Custom",
+        default=1080, min=1, soft_max=8192,
+        subtype='PIXEL',
+        update=edit_selected('custom_height', update_resolution))
     use_custom_texture_res: bpy.props.BoolProperty(
         name="Use Image Resolution",
         default=True,
         description="Use the resolution from the image as the projector resolution. When loading a new image, toggle this to update.",
-        update=update_throw_ratio)
+        update=edit_selected('use_custom_texture_res', update_projected_texture))
     h_shift: bpy.props.FloatProperty(
         name="Horizontal Shift",
         description="Horizontal Lens Shift",
         soft_min=-20, soft_max=20,
-        update=update_lens_shift,
+        update=edit_selected('h_shift', update_lens_shift),
         subtype='PERCENTAGE')
     v_shift: bpy.props.FloatProperty(
         name="Vertical Shift",
         description="Vertical Lens Shift",
         soft_min=-20, soft_max=20,
-        update=update_lens_shift,
+        update=edit_selected('v_shift', update_lens_shift),
         subtype='PERCENTAGE')
     # projected_color 속성 제거 - Custom Texture만 사용하므로 필요 없음
     # 기본값을 CUSTOM_TEXTURE로 고정
@@ -946,12 +871,22 @@ class ProjectorSettings(bpy.types.PropertyGroup):
         items=[(Textures.CUSTOM_TEXTURE.value, 'Custom Texture', '', 1)],
         default=Textures.CUSTOM_TEXTURE.value,
         description="Texture to project",
-        update=update_throw_ratio)
+        update=update_projected_texture)
     show_pixel_grid: bpy.props.BoolProperty(
         name="Show Pixel Grid",
         description="When checked the image is divided into a pixel grid with the dimensions of the image resolution.",
         default=False,
-        update=update_pixel_grid)
+        update=edit_selected('show_pixel_grid', update_pixel_grid))
+    edge_blend: bpy.props.BoolProperty(
+        name="Edge Blend",
+        description="Multiply the projected image with the edge blend and black level masks of this projector",
+        default=False,
+        update=edit_selected('edge_blend', update_edge_blend))
+    simulate_lens: bpy.props.BoolProperty(
+        name="Simulate Lens",
+        description="Distort and vignette the projected image like the lens profile of this projector",
+        default=False,
+        update=edit_selected('simulate_lens', update_simulate_lens))
 
 
 def safe_set_node_input(node, input_name, value, fallback_names=None):
@@ -997,17 +932,57 @@ def check_projector_updates(scene):
                 obj["_needs_update"] = False
 
 
+def all_projectors():
+    """ Return all projectors in the blend file. """
+    return [obj for obj in registry.projectors() if get_spot(obj)]
+
+
+@bpy.app.handlers.persistent
+def upgrade_node_groups(*_):
+    """
+    Bring the shared node groups of a loaded file up to date.
+    Files saved with an older version of the addon can contain outdated groups or one
+    copy of a group per projector. If anything had to change, the node trees of all
+    projectors are rebuilt and their values are written into the new groups.
+    """
+    if not node_groups.upgrade_library():
+        return
+    for projector in all_projectors():
+        build_root_tree(get_spot(projector).data)
+        refresh_projector(projector)
+    log.info('Updated the projector node groups of this file.')
+
+
+@bpy.app.handlers.persistent
+def cleanup_test_patterns(*_):
+    """ Drop the test pattern images of a loaded file that are not shown by any projector. """
+    removed = remove_unused_test_patterns()
+    if removed:
+        log.info(f'Removed {removed} unused test pattern images.')
+
+
 def register():
+    bpy.app.handlers.load_post.append(upgrade_node_groups)
+    bpy.app.handlers.load_post.append(cleanup_test_patterns)
     bpy.utils.register_class(ProjectorSettings)
     bpy.utils.register_class(PROJECTOR_OT_create_projector)
     bpy.utils.register_class(PROJECTOR_OT_delete_projector)
     # PROJECTOR_OT_change_color_randomly 클래스 제거 - Custom Texture만 사용하므로 필요 없음
     bpy.types.Object.proj_settings = bpy.props.PointerProperty(
         type=ProjectorSettings)
+    bpy.types.Scene.proj_edit_selected = bpy.props.BoolProperty(
+        name="Edit All Selected",
+        description="Apply changes of the active projector to all selected projectors",
+        default=False)
 
 
 def unregister():
     # PROJECTOR_OT_change_color_randomly 클래스 제거
     bpy.utils.unregister_class(PROJECTOR_OT_delete_projector)
     bpy.utils.unregister_class(PROJECTOR_OT_create_projector)
-    bpy.utils.unregister_class(ProjectorSettings)
\ No newline at end of file
+    del bpy.types.Scene.proj_edit_selected
+    bpy.utils.unregister_class(ProjectorSettings)
+    if cleanup_test_patterns in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(cleanup_test_patterns)
+    if upgrade_node_groups in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(upgrade_node_groups)
\ No newline at end of file
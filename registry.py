@@ -0,0 +1,165 @@
+"""
+Registry of all projectors in the blend file.
+
+Finding projectors by walking every object of the scene gets slow in big scenes, and
+matching the 'Projector' name prefix breaks as soon as a projector is renamed. Instead
+every projector camera carries a stable ID property and the registry maps these IDs to
+the objects. The map is rebuilt from bpy.data when a file is loaded or an undo step is
+restored and kept current in between by a depsgraph handler, so looking up a projector
+is O(1) and iterating over them is O(number of projectors).
+"""
+import logging
+import uuid
+
+import bpy
+
+from .helper import ADDON_ID
+
+log = logging.getLogger(name=__file__)
+
+ID_KEY = ADDON_ID.format('id')
+SPOT_KEY = ADDON_ID.format('spot')
+
+# ID -> projector (camera) object
+_projectors = {}
+# as_pointer() -> ID of every registered object, to skip known objects in the depsgraph handler.
+_pointers = {}
+
+
+def _alive(obj):
+    """ Check that a stored object was not removed from the blend file in the meantime. """
+    try:
+        obj.name
+    except ReferenceError:
+        return False
+    return True
+
+
+def _has_projector_spot(obj):
+    for child in obj.children:
+        if child.type == 'LIGHT' and child.get(SPOT_KEY, False):
+            return True
+    return False
+
+
+def is_projector(obj):
+    """
+    Check if obj is a projector camera.
+    Projectors created before the registry existed only had the 'Projector' name prefix and
+    a spot light child, those are recognized too.
+    """
+    if obj.type != 'CAMERA':
+        return False
+    if obj.get(ID_KEY) or obj.get('is_projector', False):
+        return True
+    return obj.name.startswith('Projector') and _has_projector_spot(obj)
+
+
+def add(obj):
+    """
+    Register a projector and return its ID. Objects without an ID get a new one, and so do
+    copies of a registered projector (duplicating an object copies its ID property as well).
+    """
+    projector_id = obj.get(ID_KEY)
+    known = _projectors.get(projector_id)
+    if not projector_id or (known is not None and known != obj and _alive(known)):
+        projector_id = uuid.uuid4().hex
+        obj[ID_KEY] = projector_id
+    if not obj.get('is_projector', False):
+        obj['is_projector'] = True
+    _projectors[projector_id] = obj
+    _pointers[obj.as_pointer()] = projector_id
+    return projector_id
+
+
+def remove(obj):
+    """ Forget a projector, e.g. right before it gets deleted. """
+    _projectors.pop(obj.get(ID_KEY), None)
+    _pointers.pop(obj.as_pointer(), None)
+
+
+def get(projector_id):
+    """ Return the projector with the given ID or None. """
+    obj = _projectors.get(projector_id)
+    if obj is None:
+        return None
+    if not _alive(obj):
+        del _projectors[projector_id]
+        return None
+    return obj
+
+
+def projectors():
+    """ Return all projectors of the blend file. Removed objects are dropped on the way. """
+    result = []
+    for projector_id, obj in list(_projectors.items()):
+        if _alive(obj):
+            result.append(obj)
+        else:
+            del _projectors[projector_id]
+    return result
+
+
+def rebuild():
+    """ Rebuild the registry from scratch. This is the only place that looks at every object. """
+    _projectors.clear()
+    _pointers.clear()
+    for obj in bpy.data.objects:
+        if is_projector(obj):
+            add(obj)
+    log.debug(f'Projector registry holds {len(_projectors)} projectors.')
+
+
+def in_scene(obj, scene):
+    """ Check if a projector is part of a scene without walking the objects of the scene. """
+    if len(bpy.data.scenes) == 1:
+        return bool(obj.users_collection)
+    return scene in obj.users_scene
+
+
+@bpy.app.handlers.persistent
+def on_file_changed(*_):
+    """ Object references don't survive loading a file or restoring an undo step. """
+    rebuild()
+
+
+@bpy.app.handlers.persistent
+def on_depsgraph_update(scene, depsgraph):
+    """ Pick up projectors that were added by duplicating, appending, linking, ... """
+    for update in depsgraph.updates:
+        obj = update.id
+        if not isinstance(obj, bpy.types.Object):
+            continue
+        obj = obj.original
+        if obj.type != 'CAMERA':
+            continue
+        # Memory of removed objects gets reused, so a known pointer alone is not enough.
+        projector_id = _pointers.get(obj.as_pointer())
+        if projector_id is not None and obj.get(ID_KEY) == projector_id:
+            continue
+        if is_projector(obj):
+            add(obj)
+
+
+_HANDLERS = (
+    (bpy.app.handlers.load_post, on_file_changed),
+    (bpy.app.handlers.undo_post, on_file_changed),
+    (bpy.app.handlers.redo_post, on_file_changed),
+    (bpy.app.handlers.depsgraph_update_post, on_depsgraph_update),
+)
+
+
+def register():
+    for handlers, handler in _HANDLERS:
+        handlers.append(handler)
+    # The addon can be enabled while a file is open.
+    if isinstance(bpy.data, bpy.types.BlendData):
+        rebuild()
+
+
+def unregister():
+    for handlers, handler in _HANDLERS:
+        if handler in handlers:
+            handlers.remove(handler)
+    _projectors.clear()
+    _pointers.clear()
@@ -0,0 +1,151 @@
+"""
+Coalesced updates of the derived projector values.
+
+The update callbacks of proj_settings don't recompute anything themselves. They only mark
+which derived values of their projector are out of date. All marks are flushed together a
+moment later from a timer (or when the outermost batch() block is left), so every derived
+value of a projector is recomputed at most once per flush, no matter how many properties
+changed in between. Without an event loop (blender -b) there is no timer, then marks are
+flushed right away unless a batch() block is open.
+
+Because the flush runs after Blender pushed the undo step of a property edit, an undo step
+can hold settings whose derived values were never written. After every undo and redo all
+projectors are recomputed from their restored settings (see resync()).
+"""
+import logging
+from contextlib import contextmanager
+
+import bpy
+
+log = logging.getLogger(name=__file__)
+
+# Derived values of a projector.
+TEXTURE = 1 << 0     # Test pattern image that matches the resolution.
+OPTICS = 1 << 1      # Throw ratio and lens shift of the camera and the texture mapping.
+LINKS = 1 << 2       # Links of the projected texture, including the corner pin.
+PIXEL_GRID = 1 << 3  # Pixel grid resolution and visibility.
+POWER = 1 << 4       # Power of the spot light.
+ALL = TEXTURE | OPTICS | LINKS | PIXEL_GRID | POWER
+
+# as_pointer() -> [projector, flags]
+_dirty = {}
+_batch_depth = 0
+
+
+def run_many(entries):
+    """
+    Recompute the derived values of many projectors, in dependency order.
+    entries is a list of (projector, flags). The optics of all projectors are computed in one
+    vectorized pass.
+    """
+    from . import projector as proj
+    for projector, flags in entries:
+        if flags & TEXTURE:
+            # The test pattern can change the resolution, so this goes first.
+            proj.apply_resolution_texture(projector)
+    proj.apply_optics([projector for projector, flags in entries if flags & OPTICS])
+    for projector, flags in entries:
+        if flags & LINKS:
+            proj.apply_projected_texture(projector)
+        if flags & PIXEL_GRID:
+            proj.apply_pixel_grid(projector)
+        if flags & POWER:
+            proj.apply_power(projector)
+
+
+def run(projector, flags):
+    """ Recompute the derived values in flags of one projector. """
+    run_many([(projector, flags)])
+
+
+def _alive(projector):
+    try:
+        projector.name
+    except ReferenceError:
+        # Removed (or undone) before the flush.
+        return False
+    return True
+
+
+def flush():
+    """ Recompute everything that was marked dirty. """
+    while _dirty:
+        pending = [(projector, flags) for projector, flags in _dirty.values() if _alive(projector)]
+        _dirty.clear()
+        run_many(pending)
+
+
+def _on_timer():
+    flush()
+    return None
+
+
+def mark(projector, flags):
+    """ Mark derived values of a projector as out of date. """
+    key = projector.as_pointer()
+    entry = _dirty.get(key)
+    if entry:
+        entry[1] |= flags
+    else:
+        _dirty[key] = [projector, flags]
+
+    if _batch_depth:
+        return
+    if bpy.app.background:
+        flush()
+    elif not bpy.app.timers.is_registered(_on_timer):
+        bpy.app.timers.register(_on_timer, first_interval=0.0)
+
+
+@contextmanager
+def batch():
+    """
+    Collect all marks made inside the block and flush them once when the outermost
+    block is left, e.g. at the end of an operator that changes many properties.
+    """
+    global _batch_depth
+    _batch_depth += 1
+    try:
+        yield
+    finally:
+        _batch_depth -= 1
+        if not _batch_depth:
+            flush()
+
+
+@bpy.app.handlers.persistent
+def discard(*_):
+    """ Pending marks refer to objects that don't survive loading a file. """
+    _dirty.clear()
+
+
+@bpy.app.handlers.persistent
+def resync(*_):
+    """ Recompute the derived values of all projectors from the settings an undo or redo restored. """
+    from . import registry
+    _dirty.clear()
+    run_many([(projector, ALL) for projector in registry.projectors()])
+
+
+_HANDLERS = (
+    (bpy.app.handlers.load_pre, discard),
+    (bpy.app.handlers.undo_pre, discard),
+    (bpy.app.handlers.redo_pre, discard),
+    (bpy.app.handlers.undo_post, resync),
+    (bpy.app.handlers.redo_post, resync),
+)
+
+
+def register():
+    # After the registry, whose undo_post handler rebuilds the map of projectors first.
+    for handlers, handler in _HANDLERS:
+        handlers.append(handler)
+
+
+def unregister():
+    for handlers, handler in _HANDLERS:
+        if handler in handlers:
+            handlers.remove(handler)
+    if bpy.app.timers.is_registered(_on_timer):
+        bpy.app.timers.unregister(_on_timer)
+    _dirty.clear()
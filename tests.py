@@ -1,3 +1,4 @@
+import math
 import unittest
 import bpy
 from bpy.app.handlers import persistent
@@ -44,27 +45,16 @@ class TestProjector(unittest.TestCase):
         self.c.proj_settings.throw_ratio = 1
         self.assertEqual(self.c.proj_settings.throw_ratio, 1)
         self.assertAlmostEqual(self.c.data.angle, 0.9272952180016123, places=6)
-        # Test if mapping nodes was updated correctly
-        mapping_node = self.s.data.node_tree.nodes['Group'].node_tree.nodes['Mapping.001']
-        if bpy.app.version < (2, 81):
-            self.assertEqual(mapping_node.scale[0], 1)
-            self.assertAlmostEqual(mapping_node.scale[1], 0.5625)
-        else:
-            self.assertEqual(mapping_node.inputs['Scale'].default_value[0], 1)
-            self.assertAlmostEqual(
-                mapping_node.inputs['Scale'].default_value[1], 0.5625)
+        # Test if the scale input of the projector group node was updated correctly
+        group_node = self.nodes['Group']
+        self.assertEqual(group_node.inputs['Scale'].default_value[0], 1)
+        self.assertAlmostEqual(group_node.inputs['Scale'].default_value[1], 0.5625)
         # Test 2
         self.c.proj_settings.throw_ratio = 0.8
         self.assertAlmostEqual(self.c.proj_settings.throw_ratio, 0.8)
         self.assertAlmostEqual(self.c.data.angle, 1.1171986306871249, places=6)
-        if bpy.app.version < (2, 81):
-            self.assertEqual(mapping_node.scale[0], 1.250)
-            self.assertAlmostEqual(mapping_node.scale[1], 0.703125)
-        else:
-            self.assertEqual(
-                mapping_node.inputs['Scale'].default_value[0], 1.250)
-            self.assertAlmostEqual(
-                mapping_node.inputs['Scale'].default_value[1], 0.703125)
+        self.assertAlmostEqual(group_node.inputs['Scale'].default_value[0], 1.250)
+        self.assertAlmostEqual(group_node.inputs['Scale'].default_value[1], 0.703125)
 
     def test_update_lens_shift(self):
         self.c.proj_settings.throw_ratio = 1
@@ -72,19 +62,46 @@ class TestProjector(unittest.TestCase):
         # x shift
         self.c.proj_settings.h_shift = shift
         self.assertAlmostEqual(self.c.data.shift_x, 0.1)
-        # y shift
+        # y shift: Blender measures the camera shift in units of the image width, so 10% of
+        # the height of a 1920x1080 image is 0.1 * 1080 / 1920.
         self.c.proj_settings.v_shift = shift
-        self.assertAlmostEqual(self.c.data.shift_y, 0.1)
-        # Check correct update of mapping node
-        mapping_node = self.s.data.node_tree.nodes['Group'].node_tree.nodes['Mapping.001']
-        if bpy.app.version < (2, 81):
-            self.assertAlmostEqual(mapping_node.translation[0], 0.1)
-            self.assertAlmostEqual(mapping_node.translation[1], 0.1)
-        else:
-            self.assertAlmostEqual(
-                mapping_node.inputs['Location'].default_value[0], 0.1)
-            self.assertAlmostEqual(
-                mapping_node.inputs['Location'].default_value[1], 0.1)
+        self.assertAlmostEqual(self.c.data.shift_y, 0.1 * 0.5625)
+        # Check correct update of the offset input of the projector group node
+        group_node = self.nodes['Group']
+        self.assertAlmostEqual(group_node.inputs['Offset'].default_value[0], 0.1)
+        self.assertAlmostEqual(group_node.inputs['Offset'].default_value[1], 0.1 * 0.5625)
+
+    def test_shared_node_groups(self):
+        # A second projector reuses the node groups of the first one.
+        group_count = len(bpy.data.node_groups)
+        bpy.ops.projector.create()
+        other = bpy.context.object
+        self.assertEqual(len(bpy.data.node_groups), group_count)
+        other_nodes = other.children[0].data.node_tree.nodes
+        self.assertEqual(other_nodes['Group'].node_tree, self.nodes['Group'].node_tree)
+        self.assertEqual(other_nodes['pixel_grid'].node_tree, self.nodes['pixel_grid'].node_tree)
+        # Values are per projector.
+        other.proj_settings.throw_ratio = 2
+        self.assertNotEqual(other_nodes['Group'].inputs['Scale'].default_value[0],
+                            self.nodes['Group'].inputs['Scale'].default_value[0])
+        bpy.ops.object.select_all(action='DESELECT')
+        other.select_set(True)
+        bpy.ops.projector.delete()
+
+    def test_upgrade_library_creates_nothing(self):
+        import importlib
+        node_groups = importlib.import_module('Projectors.node_groups')
+        name = '_Projectors-Addon_Test'
+        node_groups.LIBRARY[name] = (1, lambda node_group: None)
+        try:
+            # Loading a file only upgrades the groups it has, new ones are made on demand.
+            self.assertFalse(node_groups.upgrade_library())
+            self.assertNotIn(name, bpy.data.node_groups)
+            node_group = node_groups.get_node_group(name)
+            self.assertEqual(node_group[node_groups.VERSION_KEY], 1)
+            bpy.data.node_groups.remove(node_group)
+        finally:
+            del node_groups.LIBRARY[name]
 
     def test_pixel_gird_on_off(self):
         # Turn Pixel Grid on
@@ -108,23 +125,119 @@ class TestProjector(unittest.TestCase):
             self.assertIn(('Emission', 'Light Output'), links_as_node_names)
 
     def test_pixel_grid_resolution(self):
-        nodes = self.s.data.node_tree.nodes['pixel_grid'].node_tree.nodes
+        pixel_grid = self.nodes['pixel_grid']
         # Check Pixel Grid default resolution
         width, height = self.c.proj_settings.resolution.split('x')
         self.assertEqual(
-            nodes['_width'].outputs[0].default_value, float(width))
+            pixel_grid.inputs['Width'].default_value, float(width))
         self.assertEqual(
-            nodes['_height'].outputs[0].default_value, float(height))
+            pixel_grid.inputs['Height'].default_value, float(height))
         # Check Pixel Grid resolution update
         x, y = 1024, 768
         self.c.proj_settings.resolution = f'{x}x{y}'
         self.assertEqual(
-            nodes['_width'].outputs[0].default_value, float(x))
+            pixel_grid.inputs['Width'].default_value, float(x))
         self.assertEqual(
-            nodes['_height'].outputs[0].default_value, float(y))
-        
+            pixel_grid.inputs['Height'].default_value, float(y))
 
+    def test_test_patterns_created_on_demand(self):
+        patterns = [img for img in bpy.data.images if img.name.startswith('_proj.tex.')]
+        self.assertEqual([img.name for img in patterns], ['_proj.tex.1920x1080'])
+        self.assertFalse(patterns[0].use_fake_user)
+        # Switching the resolution replaces the pattern that is no longer used.
+        self.c.proj_settings.resolution = '1024x768'
+        self.assertEqual(self.nodes['Image Texture'].image.name, '_proj.tex.1024x768')
+        self.assertNotIn('_proj.tex.1920x1080', bpy.data.images)
 
+    def test_delete_frees_test_pattern(self):
+        bpy.ops.projector.create()
+        other = bpy.context.object
+        other.proj_settings.resolution = '800x600'
+        light = other.children[0].data.name
+        bpy.ops.object.select_all(action='DESELECT')
+        other.select_set(True)
+        bpy.ops.projector.delete()
+        self.assertNotIn(light, bpy.data.lights)
+        self.assertNotIn('_proj.tex.800x600', bpy.data.images)
+        self.c.select_set(True)
+
+    def test_simulate_lens(self):
+        self.c['lens_distortion'] = -0.05
+        self.c['lens_vignetting'] = 0.2
+        self.c.proj_settings.simulate_lens = True
+        lut = self.nodes['Lens LUT']
+        self.assertEqual(lut.image.name, '_proj.lens.custom(-0.05,0.2).16x9')
+        self.assertTrue(lut.image.packed_file)
+        self.assertEqual(self.nodes['Image Texture'].inputs['Vector'].links[0].from_node, lut)
+        self.assertEqual(self.nodes['Emission'].inputs['Color'].links[0].from_node, self.nodes['Lens'])
+        self.assertAlmostEqual(lut.image['projectors_lens'][0], -0.05)
+        # A projector with other custom values gets its own image.
+        bpy.ops.projector.create()
+        other = bpy.context.object
+        other['lens_distortion'] = 0.05
+        other.proj_settings.simulate_lens = True
+        other_lut = other.children[0].data.node_tree.nodes['Lens LUT']
+        self.assertNotEqual(other_lut.image, lut.image)
+        self.assertAlmostEqual(lut.image['projectors_lens'][0], -0.05)
+        bpy.ops.object.select_all(action='DESELECT')
+        other.select_set(True)
+        bpy.ops.projector.delete()
+        bpy.context.view_layer.objects.active = self.c
+        self.c.select_set(True)
+        self.c.proj_settings.simulate_lens = False
+        self.assertEqual(self.nodes['Emission'].inputs['Color'].links[0].from_node, self.nodes['Image Texture'])
+
+    def test_corner_pin(self):
+        self.c.corner_pin.enabled = True
+        corner_pin = self.nodes['Corner Pin']
+        self.assertEqual(self.nodes['Image Texture'].inputs['Vector'].links[0].from_node, corner_pin)
+        self.assertEqual(corner_pin.inputs['Row 3'].default_value[:], [0, 0, 1])
+        # Moving a corner only writes the matrix.
+        self.c.corner_pin.top_left = (0.2, 1.0)
+        self.assertNotAlmostEqual(corner_pin.inputs['Row 3'].default_value[1], 0)
+        self.c.corner_pin.enabled = False
+        self.assertEqual(self.nodes['Image Texture'].inputs['Vector'].links[0].from_node, self.nodes['Group'])
+
+    def test_select_lens_with_body(self):
+        import importlib
+        properties = importlib.import_module('Projectors.lens_management.properties')
+        lens_manager = self.c.lens_manager
+        lens_manager.body = 'Epson/EB-PU1007W'
+        # Only Epson lenses fit the body; selecting another lens drops the body instead of failing.
+        properties.select_lens(lens_manager, 'Epson', 'ELPLM15')
+        self.assertEqual((lens_manager.body, lens_manager.model), ('Epson/EB-PU1007W', 'ELPLM15'))
+        properties.select_lens(lens_manager, 'Nec', 'NP13ZL')
+        self.assertEqual((lens_manager.body, lens_manager.manufacturer, lens_manager.model),
+                         ('NONE', 'Nec', 'NP13ZL'))
+
+    def test_warp_grid(self):
+        warp_grid = self.c.warp_grid
+        warp_grid.enabled = True
+        warp = self.nodes['Warp']
+        warp_map = self.nodes['Warp Map']
+        self.assertEqual(self.nodes['Image Texture'].inputs['Vector'].links[0].from_node, warp)
+        self.assertEqual(tuple(warp_map.image.size), (1024, 576))
+        self.assertEqual(warp_map.image.pixels[0], 0)
+        # Moving a control point re-bakes the warp map.
+        warp_grid.active_row, warp_grid.active_column = 0, 0
+        warp_grid.offset = (0.1, 0.0)
+        self.assertEqual(len(warp_grid['offsets']), 5 * 5 * 2)
+        self.assertLess(warp_map.image.pixels[0], -0.05)
+        # More rows keep the warp.
+        warp_grid.rows = 9
+        self.assertAlmostEqual(warp_grid.offset[0], 0.1)
+        warp_grid.enabled = False
+        self.assertEqual(self.nodes['Image Texture'].inputs['Vector'].links[0].from_node, self.nodes['Group'])
+
+    def test_custom_resolution(self):
+        self.c.proj_settings.resolution = 'custom'
+        self.c.proj_settings.custom_width = 2560
+        self.c.proj_settings.custom_height = 1600
+        image = self.nodes['Image Texture'].image
+        self.assertEqual(image.name, '_proj.tex.2560x1600')
+        self.assertEqual(tuple(image.size), (2560, 1600))
+        self.assertEqual(self.nodes['pixel_grid'].inputs['Width'].default_value, 2560.0)
+        self.assertEqual(self.nodes['pixel_grid'].inputs['Height'].default_value, 1600.0)
 
     def test_update_power(self):
         new_power = 30
@@ -137,6 +250,869 @@ class TestProjector(unittest.TestCase):
         bpy.ops.projector.delete()
 
 
+class TestScheduler(unittest.TestCase):
+    def setUp(self):
+        import importlib
+        self.scheduler = importlib.import_module('Projectors.scheduler')
+        self.projector = importlib.import_module('Projectors.projector')
+        bpy.ops.projector.create()
+        self.c = bpy.context.object
+
+    def test_batch_recomputes_once(self):
+        calls = []
+        apply_projected_texture = self.projector.apply_projected_texture
+        self.projector.apply_projected_texture = lambda projector: calls.append(projector)
+        try:
+            with self.scheduler.batch():
+                self.c.proj_settings.resolution = '1024x768'
+                self.c.proj_settings.throw_ratio = 1
+                self.c.proj_settings.h_shift = 5
+                self.c.proj_settings.use_custom_texture_res = False
+                # Nothing is recomputed inside the batch.
+                self.assertEqual(calls, [])
+        finally:
+            self.projector.apply_projected_texture = apply_projected_texture
+        self.assertEqual(calls, [self.c])
+        self.assertAlmostEqual(self.c.data.angle, 0.9272952180016123, places=6)
+        self.assertAlmostEqual(self.c.data.shift_x, 0.05)
+
+    def test_resync_after_undo(self):
+        self.c.proj_settings.throw_ratio = 1
+        # An undo step restores the settings, but not what the flush derived from them.
+        self.c.data.angle = 0.5
+        self.c.data.shift_x = 0.3
+        self.scheduler.resync()
+        self.assertAlmostEqual(self.c.data.angle, 0.9272952180016123, places=6)
+        self.assertAlmostEqual(self.c.data.shift_x, 0.0)
+
+    def tearDown(self):
+        bpy.ops.object.select_all(action='DESELECT')
+        self.c.select_set(True)
+        bpy.ops.projector.delete()
+
+
+class TestEditSelected(unittest.TestCase):
+    def setUp(self):
+        self.projectors = []
+        for _ in range(3):
+            bpy.ops.projector.create()
+            self.projectors.append(bpy.context.object)
+        # The second projector has a lens with a limited throw ratio.
+        self.projectors[1]['throw_ratio_min'] = 1.0
+        self.projectors[1]['throw_ratio_max'] = 1.5
+        for projector in self.projectors:
+            projector.select_set(True)
+        bpy.context.view_layer.objects.active = self.projectors[0]
+        bpy.context.scene.proj_edit_selected = True
+
+    def test_change_reaches_all_selected(self):
+        self.projectors[0].proj_settings.throw_ratio = 2
+        self.projectors[0].proj_settings.power = 500
+        self.assertAlmostEqual(self.projectors[2].proj_settings.throw_ratio, 2)
+        # Clamped to the lens limits of the second projector.
+        self.assertAlmostEqual(self.projectors[1].proj_settings.throw_ratio, 1.5)
+        self.assertAlmostEqual(self.projectors[1].data.angle, 2 * math.atan(0.5 / 1.5), places=6)
+        for projector in self.projectors:
+            self.assertEqual(projector.children[0].data.energy, 500)
+
+    def test_disabled(self):
+        bpy.context.scene.proj_edit_selected = False
+        self.projectors[0].proj_settings.power = 500
+        self.assertEqual(self.projectors[2].children[0].data.energy, 1000)
+
+    def tearDown(self):
+        bpy.context.scene.proj_edit_selected = False
+        bpy.ops.object.select_all(action='DESELECT')
+        for projector in self.projectors:
+            projector.select_set(True)
+        bpy.ops.projector.delete()
+
+
+class TestHandles(unittest.TestCase):
+    def setUp(self):
+        import importlib
+        self.handles = importlib.import_module('Projectors.handles')
+        bpy.ops.projector.create()
+        self.c = bpy.context.object
+        self.tree = self.c.children[0].data.node_tree
+
+    def test_handles_are_cached(self):
+        rig = self.handles.get(self.c)
+        self.assertTrue(rig.complete)
+        self.assertIs(self.handles.get(self.c), rig)
+        self.assertEqual(rig.image, self.tree.nodes['Image Texture'])
+        # A topology change invalidates the handles.
+        self.tree.nodes.new('ShaderNodeValue')
+        self.assertIsNot(self.handles.get(self.c), rig)
+
+    def test_repair(self):
+        self.tree.nodes.remove(self.tree.nodes['Emission'])
+        self.c.proj_settings.power = 20
+        self.assertIn('Emission', self.tree.nodes)
+        self.assertEqual(self.c.children[0].data.energy, 20)
+        links = [(link.from_node.name, link.to_node.name) for link in self.tree.links]
+        self.assertIn(('Emission', 'Light Output'), links)
+
+    def tearDown(self):
+        bpy.ops.object.select_all(action='DESELECT')
+        self.c.select_set(True)
+        bpy.ops.projector.delete()
+
+
+class TestCreateMany(unittest.TestCase):
+    def setUp(self):
+        import importlib
+        self.api = importlib.import_module('Projectors.api')
+
+    def test_create_many(self):
+        layouts = [{'location': (i, 0, 0), 'throw_ratio': 1} for i in range(5)]
+        projectors = self.api.create_many(layouts)
+        self.assertEqual(len(projectors), 5)
+        for i, cam in enumerate(projectors):
+            self.assertEqual(cam.type, 'CAMERA')
+            self.assertEqual(cam.location[0], i)
+            self.assertEqual(cam.children[0].type, 'LIGHT')
+            self.assertAlmostEqual(cam.data.angle, 0.9272952180016123, places=6)
+            self.assertEqual(cam.children[0].data.energy, 1000)
+        # Every projector owns its own light data.
+        self.assertEqual(len({cam.children[0].data.name for cam in projectors}), 5)
+        self.projectors = projectors
+
+    def tearDown(self):
+        for cam in getattr(self, 'projectors', []):
+            for child in cam.children:
+                bpy.data.objects.remove(child, do_unlink=True)
+            bpy.data.objects.remove(cam, do_unlink=True)
+
+
+class TestRegistry(unittest.TestCase):
+    def setUp(self):
+        import importlib
+        self.registry = importlib.import_module('Projectors.registry')
+        self.helper = importlib.import_module('Projectors.helper')
+        bpy.ops.projector.create()
+        self.c = bpy.context.object
+
+    def test_rename(self):
+        projector_id = self.c[self.registry.ID_KEY]
+        self.c.name = 'Stage Left'
+        self.assertEqual(self.registry.get(projector_id), self.c)
+        self.assertIn(self.c, self.helper.get_projectors(bpy.context))
+        self.assertEqual(self.helper.get_projector(bpy.context), self.c)
+
+    def test_get_projector_needs_single_selection(self):
+        bpy.ops.projector.create()
+        other = bpy.context.object
+        self.c.select_set(True)
+        # Two selected projectors: no single projector, but the active one can still be edited.
+        self.assertIsNone(self.helper.get_projector(bpy.context))
+        self.assertEqual(self.helper.get_active_projector(bpy.context), other)
+        bpy.ops.object.select_all(action='DESELECT')
+        other.select_set(True)
+        bpy.ops.projector.delete()
+        self.c.select_set(True)
+        bpy.context.view_layer.objects.active = self.c
+
+    def test_copy_gets_new_id(self):
+        copy = self.c.copy()
+        bpy.context.scene.collection.objects.link(copy)
+        self.registry.add(copy)
+        copy_id = copy[self.registry.ID_KEY]
+        self.assertNotEqual(copy_id, self.c[self.registry.ID_KEY])
+        self.assertEqual(self.registry.get(self.c[self.registry.ID_KEY]), self.c)
+        # Removed projectors drop out of the registry.
+        bpy.data.objects.remove(copy, do_unlink=True)
+        self.assertIsNone(self.registry.get(copy_id))
+
+    def test_rebuild(self):
+        projector_id = self.c[self.registry.ID_KEY]
+        self.registry.rebuild()
+        self.assertEqual(self.registry.get(projector_id), self.c)
+
+    def tearDown(self):
+        bpy.ops.object.select_all(action='DESELECT')
+        self.c.select_set(True)
+        bpy.ops.projector.delete()
+
+
+class TestOptics(unittest.TestCase):
+    def setUp(self):
+        import importlib
+        self.optics = importlib.import_module('Projectors.optics')
+
+    def test_matches_rig(self):
+        self.assertAlmostEqual(float(self.optics.field_of_view(1)), 0.9272952180016123)
+        scale = self.optics.mapping_scale(0.8, 1920, 1080)
+        self.assertAlmostEqual(scale[0], 1.25)
+        self.assertAlmostEqual(scale[1], 0.703125)
+        offset = self.optics.mapping_offset(1, 10, 10, 1920, 1080)
+        self.assertAlmostEqual(offset[0], 0.1)
+        self.assertAlmostEqual(offset[1], 0.1 * 0.5625)
+
+    def test_vectorized(self):
+        throw_ratios = [0.5, 1.0, 2.0]
+        sizes = self.optics.image_size(throw_ratios, 4.0, 1920, 1080)
+        self.assertEqual(sizes.shape, (3, 2))
+        self.assertAlmostEqual(sizes[2][0], 2.0)
+        rays = self.optics.corner_rays(throw_ratios, 0, 0, 1920, 1080)
+        self.assertEqual(rays.shape, (3, 4, 3))
+        # Without shift the frustum is symmetric.
+        self.assertAlmostEqual(rays[1][0][0], -rays[1][1][0])
+        angles = self.optics.frustum_angles(1.0, 10, 0, 1920, 1080)
+        self.assertGreater(angles[1], -angles[0])
+        self.assertAlmostEqual(float(self.optics.throw_ratio_from_angle(self.optics.field_of_view(1.3))), 1.3)
+
+    def test_lens_lut(self):
+        lut = self.optics.lens_lut(0, 0, 1920, 1080, size=64)
+        self.assertEqual(lut.shape, (36, 64, 4))
+        # An ideal lens shows every pixel where it is, at full brightness.
+        self.assertAlmostEqual(float(lut[0, 0, 0]), 0.5 / 64, places=6)
+        self.assertAlmostEqual(float(lut[-1, -1, 1]), 1 - 0.5 / 36, places=6)
+        self.assertTrue((lut[..., 2] == 1).all())
+        # Pincushion distortion shows the image smaller in the corners, barrel bigger.
+        pincushion = self.optics.lens_lut(0.05, 0.2, 1920, 1080, size=64)
+        barrel = self.optics.lens_lut(-0.05, 0.2, 1920, 1080, size=64)
+        self.assertGreater(pincushion[0, 0, 0], lut[0, 0, 0])
+        self.assertLess(barrel[0, 0, 0], 0)
+        self.assertEqual(barrel[0, 0, 2], 0)
+        self.assertAlmostEqual(float(pincushion[0, 0, 2]), 0.8, places=1)
+        self.assertAlmostEqual(float(pincushion[18, 32, 2]), 1, places=3)
+
+    def test_corner_pin_homography(self):
+        import numpy as np
+        unit = self.optics.UNIT_CORNERS
+        self.assertTrue(np.allclose(self.optics.corner_pin_homography(unit), np.eye(3)))
+        # Keystone: the top corners pinned inwards.
+        corners = [(0.2, 1.0), (0.8, 1.0), (0.0, 0.0), (1.0, 0.0)]
+        matrix = self.optics.corner_pin_homography(corners)
+        self.assertTrue(np.allclose(self.optics.apply_homography(matrix, corners), unit))
+        # Straight lines stay straight, unlike with bilinear interpolation: the diagonals
+        # of the quad meet at the center of the image.
+        center = self.optics.apply_homography(matrix, [0.5, 0.625])
+        self.assertTrue(np.allclose(center, (0.5, 0.5)))
+        # Three corners on a line give no correction.
+        flat = self.optics.corner_pin_homography([(0, 0), (0.5, 0.5), (1, 1), (1, 0)])
+        self.assertTrue(np.allclose(flat, np.eye(3)))
+
+
+class TestWarpGrid(unittest.TestCase):
+    def setUp(self):
+        import importlib
+        self.grid = importlib.import_module('Projectors.warp.grid')
+
+    def test_interpolation(self):
+        import numpy as np
+        knots = np.linspace(0, 1, 6)
+        for method in (self.grid.CATMULL_ROM, self.grid.BEZIER):
+            weights = self.grid.weight_matrix(np.random.rand(100), 6, method)
+            self.assertTrue(np.allclose(weights.sum(axis=1), 1))
+            self.assertLessEqual((weights != 0).sum(axis=1).max(), 4)
+            # Both splines pass through the points on the border.
+            border = self.grid.weight_matrix([0, 1], 6, method)
+            self.assertTrue(np.allclose(border[[0, 1], [0, 5]], 1))
+        # Catmull-Rom passes through every control point, the B-spline doesn't.
+        self.assertTrue(np.allclose(self.grid.weight_matrix(knots, 6, self.grid.CATMULL_ROM), np.eye(6)))
+        self.assertFalse(np.allclose(self.grid.weight_matrix(knots, 6, self.grid.BEZIER), np.eye(6)))
+        # Resampling to a finer grid keeps the warp.
+        offsets = np.random.rand(5, 5, 2)
+        resampled = self.grid.resample(offsets, 9, 9)
+        self.assertTrue(np.allclose(resampled[::2, ::2], offsets))
+
+    def test_bake(self):
+        import numpy as np
+        baker = self.grid.WarpBaker(384, 216, 17, 17)
+        baker.bake(np.zeros((17, 17, 2)))
+        self.assertTrue((baker.pixels[..., :2] == 0).all())
+        self.assertTrue((baker.pixels[..., 3] == 1).all())
+        self.assertIsNone(baker.update(np.zeros((17, 17, 2))))
+        offsets = np.random.rand(17, 17, 2) * 0.01
+        baker.bake(offsets)
+        # Moving one point re-bakes a few tiles, the same as baking everything.
+        offsets[8, 8] = (0.05, -0.02)
+        y0, y1, x0, x1 = baker.update(offsets)
+        self.assertLess((y1 - y0) * (x1 - x0), 384 * 216 / 10)
+        updated = baker.pixels.copy()
+        baker.bake(offsets)
+        self.assertTrue(np.allclose(updated, baker.pixels))
+
+
+class TestCoverage(unittest.TestCase):
+    def setUp(self):
+        import importlib
+        self.coverage = importlib.import_module('Projectors.analysis.coverage')
+        self.optics = importlib.import_module('Projectors.optics')
+
+    def spec(self, distance):
+        import numpy as np
+        matrix = np.eye(4)
+        matrix[2][3] = distance
+        return self.coverage.ProjectorSpec('p', matrix, 1.0, 0, 0, 1920, 1080)
+
+    def plane(self, z, size=4, count=81):
+        import numpy as np
+        xs, ys = np.meshgrid(np.linspace(-size, size, count), np.linspace(-size, size, count))
+        points = np.stack((xs.ravel(), ys.ravel(), np.full(xs.size, z)), axis=1)
+        return points, np.tile((0.0, 0.0, 1.0), (len(points), 1))
+
+    def test_pixel_density(self):
+        points, normals = self.plane(0)
+        result = self.coverage.analyze([self.spec(5)], points, normals)
+        center = len(points) // 2
+        self.assertEqual(result['overlap'][center], 1)
+        # 1920 pixels over an image that is 5m wide.
+        self.assertAlmostEqual(result['pixels_per_meter'][center], 384.0)
+        self.assertAlmostEqual(result['incidence'][center], 0.0)
+        # The corners of the plane are outside of the image.
+        self.assertEqual(result['overlap'][0], 0)
+
+    def test_occlusion(self):
+        import numpy as np
+        front, front_normals = self.plane(0)
+        back, back_normals = self.plane(-1)
+        points = np.concatenate((front, back))
+        normals = np.concatenate((front_normals, back_normals))
+        result = self.coverage.analyze([self.spec(5)], points, normals, subsample=8)
+        self.assertGreater(result['overlap'][:len(front)].sum(), 0)
+        self.assertEqual(result['overlap'][len(front):].sum(), 0)
+        result = self.coverage.analyze([self.spec(5)], points, normals, occlusion=False)
+        self.assertGreater(result['overlap'][len(front):].sum(), 0)
+
+    def test_operator(self):
+        bpy.ops.projector.create()
+        projector = bpy.context.object
+        projector.location = (0, 0, 5)
+        projector.rotation_euler = (0, 0, 0)
+        bpy.ops.mesh.primitive_plane_add(size=2)
+        plane = bpy.context.object
+        projector.select_set(True)
+        bpy.context.view_layer.update()
+        bpy.ops.projector.analyze_coverage()
+        mesh = plane.data
+        self.assertIn('Projector Coverage', mesh.attributes)
+        overlap = [v.value for v in mesh.attributes['proj_overlap'].data]
+        self.assertTrue(all(value == 1 for value in overlap))
+        bpy.data.objects.remove(plane)
+        bpy.context.view_layer.objects.active = projector
+        projector.select_set(True)
+        bpy.ops.projector.delete()
+
+
+class TestBlend(unittest.TestCase):
+    def setUp(self):
+        import importlib
+        self.coverage = importlib.import_module('Projectors.analysis.coverage')
+        self.blend = importlib.import_module('Projectors.analysis.blend')
+
+    def spec(self, x):
+        import numpy as np
+        matrix = np.eye(4)
+        matrix[0][3] = x
+        matrix[2][3] = 5
+        return self.coverage.ProjectorSpec('p', matrix, 1.0, 0, 0, 960, 540)
+
+    def test_light_adds_up(self):
+        import numpy as np
+        xs, ys = np.meshgrid(np.linspace(-6, 6, 241), np.linspace(-3, 3, 121))
+        points = np.stack((xs.ravel(), ys.ravel(), np.zeros(xs.size)), axis=1)
+        normals = np.tile((0.0, 0.0, 1.0), (len(points), 1))
+        specs = [self.spec(-2), self.spec(2)]
+        masks = list(self.blend.masks(specs, points, normals, black_level=0.01, gamma=2.2))
+
+        light = np.zeros(len(points))
+        black = np.zeros(len(points))
+        for spec, (blend, lift) in zip(specs, masks):
+            self.assertEqual(blend.shape, (540, 960))
+            u, v, _ = self.coverage.project(spec, points)
+            inside = (u >= 0) & (u < 1) & (v >= 0) & (v < 1)
+            rows, columns = (v[inside] * 540).astype(int), (u[inside] * 960).astype(int)
+            light[inside] += blend[rows, columns] ** 2.2
+            black[inside] += 0.01 + lift[rows, columns] ** 2.2
+        covered = light > 0
+        self.assertLess(np.abs(light[covered] - 1).max(), 0.02)
+        # Away from the overlap the black is lifted to the black of two projectors.
+        self.assertAlmostEqual(black[(np.abs(points[:, 0]) > 1) & covered].min(), 0.02, places=4)
+
+    def test_operator(self):
+        bpy.ops.projector.create()
+        projector = bpy.context.object
+        projector.location = (0, 0, 5)
+        projector.rotation_euler = (0, 0, 0)
+        bpy.ops.mesh.primitive_plane_add(size=4)
+        plane = bpy.context.object
+        bpy.context.scene.proj_analysis.target = plane
+        bpy.context.scene.proj_analysis.blend_samples = 10000
+        bpy.ops.projector.generate_blend_masks()
+
+        self.assertTrue(projector.proj_settings.edge_blend)
+        spot = projector.children[0]
+        nodes = spot.data.node_tree.nodes
+        self.assertEqual(tuple(nodes['Blend Mask'].image.size), (1920, 1080))
+        self.assertEqual(nodes['Emission'].inputs['Color'].links[0].from_node, nodes['Edge Blend'])
+
+        bpy.context.scene.proj_analysis.target = None
+        bpy.data.objects.remove(plane)
+        bpy.context.view_layer.objects.active = projector
+        projector.select_set(True)
+        bpy.ops.projector.delete()
+
+
+class TestPhotometry(unittest.TestCase):
+    def setUp(self):
+        import importlib
+        self.coverage = importlib.import_module('Projectors.analysis.coverage')
+        self.photometry = importlib.import_module('Projectors.analysis.photometry')
+
+    def analyze(self, **light):
+        import numpy as np
+        matrix = np.eye(4)
+        matrix[2][3] = 5
+        spec = self.coverage.ProjectorSpec('p', matrix, 1.0, 0, 0, 1920, 1080)
+        points = np.array(((0.0, 0.0, 0.0), (2.0, 1.0, 0.0), (9.0, 0.0, 0.0)))
+        normals = np.tile((0.0, 0.0, 1.0), (len(points), 1))
+        return self.photometry.analyze([spec], points, normals, **light)
+
+    def test_lumens(self):
+        # 5000 lumens on a 5m x 2.8125m image.
+        lux = self.analyze(lumens=[5000])
+        self.assertAlmostEqual(lux[0], 5000 / 14.0625)
+        self.assertAlmostEqual(lux[1], lux[0])
+        self.assertEqual(lux[2], 0)
+        lux = self.analyze(lumens=[5000], vignetting=0.2)
+        self.assertLess(lux[1], lux[0])
+
+    def test_power(self):
+        lux = self.analyze(intensity=self.photometry.intensity_from_power([1000]))
+        self.assertAlmostEqual(lux[0], 1000 * 683 / (4 * math.pi) / 25)
+        self.assertLess(lux[1], lux[0])
+
+    def test_uniformity(self):
+        stats = self.photometry.uniformity([0, 100, 200, 300])
+        self.assertEqual(stats['min'], 100)
+        self.assertEqual(stats['average'], 200)
+        self.assertAlmostEqual(stats['min_max'], 1 / 3)
+
+
+class TestPlacement(unittest.TestCase):
+    def setUp(self):
+        import importlib
+        self.placement = importlib.import_module('Projectors.analysis.placement')
+
+    def test_solve(self):
+        import numpy as np
+        rng = np.random.default_rng(1)
+        # A 12m x 4m wall facing -Y.
+        points = np.stack((rng.uniform(-6, 6, 2000), np.zeros(2000), rng.uniform(0, 4, 2000)), axis=1)
+        normals = np.tile((0.0, -1.0, 0.0), (len(points), 1))
+        lens = self.placement.Lens('Test', 'Zoom', 1.2, 1.8, -10, 10, -30, 30)
+        with self.placement.Solver(points, normals, (-6, -12, 2), (6, -4, 4), [lens],
+                                   required_overlap=0.15, workers=1) as solver:
+            results = solver.solve(3, candidate_count=300)
+        self.assertEqual(len(results), 3)
+        self.assertGreater(solver.coverage, 0.9)
+        for result in results:
+            self.assertTrue(np.all(result.position >= (-6, -12, 2)) and np.all(result.position <= (6, -4, 4)))
+            self.assertTrue(1.2 <= result.throw_ratio <= 1.8)
+            self.assertTrue(-30 <= result.v_shift <= 30)
+
+    def wall(self):
+        import numpy as np
+        rng = np.random.default_rng(1)
+        points = np.stack((rng.uniform(-6, 6, 500), np.zeros(500), rng.uniform(0, 4, 500)), axis=1)
+        return points, np.tile((0.0, -1.0, 0.0), (len(points), 1))
+
+    def test_solve_in_pool(self):
+        import numpy as np
+        lens = self.placement.Lens('Test', 'Zoom', 1.2, 1.8, -10, 10, -30, 30)
+        results = []
+        for workers in (1, 2):
+            # The pool is scored in workers, or in this process if they can't be started;
+            # all random draws happen here, so both give the same placement.
+            with self.placement.Solver(*self.wall(), (-6, -12, 2), (6, -4, 4), [lens],
+                                       workers=workers, seed=3) as solver:
+                results.append(solver.solve(2, candidate_count=100, refine_rounds=1))
+        self.assertEqual(len(results[0]), len(results[1]))
+        for serial, pooled in zip(*results):
+            self.assertTrue(np.allclose(serial.position, pooled.position))
+            self.assertAlmostEqual(serial.throw_ratio, pooled.throw_ratio)
+
+    def test_broken_pool_falls_back(self):
+        from concurrent.futures.process import BrokenProcessPool
+
+        class BrokenPool:
+            def submit(self, *args):
+                raise BrokenProcessPool('no workers')
+
+            def shutdown(self, wait=True):
+                pass
+
+        lens = self.placement.Lens('Test', 'Zoom', 1.2, 1.8, -10, 10, -30, 30)
+        with self.placement.Solver(*self.wall(), (-6, -12, 2), (6, -4, 4), [lens], workers=1) as solver:
+            solver._executor = BrokenPool()
+            candidates = solver.random_candidates(50)
+            scores = solver.score(candidates)
+            self.assertEqual(scores.shape, (50,))
+            self.assertIsNone(solver._executor)
+
+    def test_look_at(self):
+        import numpy as np
+        rotation = self.placement.look_at(np.array(((0.0, -5.0, 0.0),)), np.array(((0.0, 0.0, 0.0),)))[0]
+        # The camera looks along its -Z axis, X stays horizontal.
+        self.assertTrue(np.allclose(-rotation[:, 2], (0, 1, 0)))
+        self.assertAlmostEqual(rotation[2][0], 0)
+
+
+class TestLensFinder(unittest.TestCase):
+    def setUp(self):
+        import importlib
+        self.finder = importlib.import_module('Projectors.lens_management.finder')
+        limits = [
+            (0.35, 0.35, -15, 15, -60, 60),
+            (1.2, 1.8, -10, 10, -30, 30),
+            (1.4, 2.4, -30, 30, -60, 60),
+            (4.0, 6.0, -30, 30, -60, 60),
+        ]
+        self.index = self.finder.LensIndex([('A', 'UST'), ('A', 'Standard'), ('B', 'Zoom'), ('B', 'Tele')], limits)
+
+    def test_query(self):
+        # 9m away, 6m wide: throw ratio 1.5.
+        throw_ratio = self.finder.required_throw_ratio(9.0, 6.0)
+        matches = self.index.query(throw_ratio, v_shift=20)
+        # The zoom lens has more vertical shift to spare.
+        self.assertEqual([match.model for match in matches], ['Zoom', 'Standard'])
+        self.assertAlmostEqual(matches[0].throw_ratio, 1.5)
+        self.assertEqual([match.model for match in self.index.query(throw_ratio, v_shift=40)], ['Zoom'])
+        self.assertEqual(self.index.query(3.0), [])
+
+    def test_tolerance(self):
+        matches = self.index.query(3.8, tolerance=0.1)
+        self.assertEqual([match.model for match in matches], ['Tele'])
+        self.assertAlmostEqual(matches[0].throw_ratio, 4.0)
+        self.assertGreater(matches[0].throw_error, 0)
+
+    def test_many_lenses(self):
+        import random
+        rng = random.Random(0)
+        limits = []
+        for _ in range(2000):
+            low = rng.uniform(0.3, 8.0)
+            limits.append((low, low * rng.choice((1.0, rng.uniform(1.0, 2.0))), -20, 20, -50, 50))
+        index = self.finder.LensIndex([('M', str(i)) for i in range(len(limits))], limits)
+        for throw_ratio in (0.3, 1.5, 4.2, 9.0):
+            expected = {str(i) for i, lens in enumerate(limits) if lens[0] <= throw_ratio <= lens[1]}
+            self.assertEqual({match.model for match in index.query(throw_ratio)}, expected)
+
+
+class TestThrowChart(unittest.TestCase):
+    def setUp(self):
+        import importlib
+        self.charts = importlib.import_module('Projectors.lens_management.charts')
+        self.chart = self.charts.throw_chart(
+            [('A', 'Standard'), ('B', 'Zoom')],
+            [(1.2, 1.8, -10, 10, -30, 30), (1.4, 2.4, -30, 30, -60, 60)],
+            self.charts.chart_widths(2, 6, 3), 9 / 16)
+
+    def test_chart(self):
+        self.assertEqual(self.chart.distance.shape, (2, 3, 2))
+        # A 4m wide image is 1.2 * 4 to 1.8 * 4 away.
+        self.assertEqual(self.chart.distance[0, 1].tolist(), [4.8, 7.2])
+        self.assertAlmostEqual(self.chart.heights[2], 3.375)
+        self.assertAlmostEqual(self.chart.h_offset[1, 0, 1], 0.6)
+        self.assertAlmostEqual(self.chart.v_offset[1, 2, 0], -0.6 * 3.375)
+
+    def test_conversions(self):
+        import importlib
+        database = importlib.import_module('Projectors.lens_management.database')
+        self.assertEqual(database.focal_length_to_throw_ratio([35.0, 70.0, -1.0]).tolist(), [1.0, 2.0, 1.0])
+        self.assertEqual(database.throw_ratio_to_focal_length(2.0), 70.0)
+
+    def test_export(self):
+        import csv, json, os, tempfile
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'chart.csv')
+            self.charts.export_chart(self.chart, path)
+            with open(path, newline='') as f:
+                rows = list(csv.DictReader(f))
+            self.assertEqual(len(rows), 6)
+            self.assertEqual((rows[4]['model'], float(rows[4]['distance_max'])), ('Zoom', 9.6))
+            path = os.path.join(directory, 'chart.json')
+            self.charts.export_chart(self.chart, path)
+            with open(path) as f:
+                data = json.load(f)
+            self.assertEqual(data['lenses'][1]['distance'][1], [5.6, 9.6])
+
+
+class TestLensDatabase(unittest.TestCase):
+    def setUp(self):
+        import importlib
+        import json
+        import tempfile
+        self.database = importlib.import_module('Projectors.lens_management.database')
+        self.directory = tempfile.TemporaryDirectory()
+        for name in ('acme', 'bolt'):
+            with open(f'{self.directory.name}/{name}.json', 'w', encoding='utf-8') as f:
+                json.dump({'L1': {'specs': {'throw_ratio': '1.2 to 1.8:1'}}}, f)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_lazy_loading(self):
+        db = self.database.LensDatabase(self.directory.name)
+        # Listing manufacturers doesn't parse any file.
+        self.assertEqual(db.get_manufacturers(), ['Acme', 'Bolt'])
+        self.assertEqual(db.last_load_time, {})
+        self.assertEqual(db.get_throw_ratio_limits('Acme', 'L1'), (1.2, 1.8))
+        self.assertEqual(list(db.last_load_time), ['Acme'])
+
+    def test_edit(self):
+        db = self.database.LensDatabase(self.directory.name)
+        generation = db.generation
+        self.assertTrue(db.add_lens_model('Bolt', 'L2', {'throw_min': 2.0, 'throw_max': 3.0}))
+        self.assertGreater(db.generation, generation)
+        self.assertEqual(self.database.LensDatabase(self.directory.name).get_models('Bolt'), ['L1', 'L2'])
+
+    def test_generations(self):
+        db = self.database.LensDatabase(self.directory.name)
+        db.get_models('Acme')
+        db.get_models('Bolt')
+        acme, bolt, listed = db.manufacturer_generation('Acme'), db.manufacturer_generation('Bolt'), db.list_generation
+        # Reading doesn't change anything.
+        db.get_lens_profile('Acme', 'L1')
+        self.assertEqual(db.manufacturer_generation('Acme'), acme)
+        # An edit only changes its manufacturer.
+        db.add_lens_model('Bolt', 'L2', {'throw_min': 2.0, 'throw_max': 3.0})
+        self.assertEqual(db.manufacturer_generation('Acme'), acme)
+        self.assertGreater(db.manufacturer_generation('Bolt'), bolt)
+        self.assertEqual(db.list_generation, listed)
+        db.add_manufacturer('Cato')
+        self.assertGreater(db.list_generation, listed)
+        # Refreshing changes all.
+        db.refresh_database()
+        self.assertGreater(db.manufacturer_generation('Acme'), acme)
+
+    def test_reload_changed(self):
+        import json
+        import os
+        db = self.database.LensDatabase(self.directory.name)
+        self.assertEqual(db.get_models('Acme'), ['L1'])
+        self.assertEqual(db.reload_changed(), (set(), False))
+        path = f'{self.directory.name}/acme.json'
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'L1': {'specs': {'throw_ratio': 1.5}}, 'L2': {'specs': {'throw_ratio': 2.0}}}, f)
+        mtime = os.path.getmtime(path) + 10
+        os.utime(path, (mtime, mtime))
+        # Bolt was never loaded, so only Acme is parsed again.
+        self.assertEqual(db.reload_changed(), ({'Acme'}, False))
+        self.assertEqual(db.get_models('Acme'), ['L1', 'L2'])
+        self.assertNotIn('Bolt', db.last_load_time)
+        os.remove(f'{self.directory.name}/bolt.json')
+        self.assertEqual(db.reload_changed(), (set(), True))
+        self.assertEqual(db.get_manufacturers(), ['Acme'])
+
+    def test_journal(self):
+        import os
+        db = self.database.LensDatabase(self.directory.name)
+        for i in range(10):
+            db.add_lens_model('Acme', f'Z{i}', {'throw_min': 1.0, 'throw_max': 2.0})
+        db.rename_lens_model('Acme', 'Z0', 'Y0')
+        db.delete_lens_model('Acme', 'Z1')
+        # The edits are journaled, the file is untouched until the journal is compacted.
+        self.assertTrue(os.path.exists(f'{self.directory.name}/acme.json.journal'))
+        # A line cut off by a crash is skipped.
+        with open(f'{self.directory.name}/acme.json.journal', 'a', encoding='utf-8') as f:
+            f.write('{"op": "delete", "mo')
+        models = self.database.LensDatabase(self.directory.name).get_models('Acme')
+        self.assertEqual(len(models), 10)
+        self.assertIn('Y0', models)
+        self.assertNotIn('Z1', models)
+        db.flush()
+        self.assertFalse(os.path.exists(f'{self.directory.name}/acme.json.journal'))
+        self.assertEqual(self.database.LensDatabase(self.directory.name).get_models('Acme'), models)
+
+
+class TestLensImporter(unittest.TestCase):
+    def setUp(self):
+        import importlib
+        import tempfile
+        self.database = importlib.import_module('Projectors.lens_management.database')
+        self.importer = importlib.import_module('Projectors.lens_management.importer')
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_parse(self):
+        self.assertEqual(self.importer.parse_throw("1.45-1.8:1"), (1.45, 1.8))
+        self.assertEqual(self.importer.parse_throw("1.45:1 to 1.8:1"), (1.45, 1.8))
+        self.assertEqual(self.importer.parse_throw("0,38 : 1"), (0.38, 0.38))
+        self.assertEqual(self.importer.parse_shift("±50%"), (-50.0, 50.0))
+        self.assertEqual(self.importer.parse_shift("-5 to +60 %"), (-5.0, 60.0))
+        self.assertEqual(self.importer.parse_shift("0"), (0.0, 0.0))
+        with self.assertRaises(ValueError):
+            self.importer.parse_throw("wide")
+
+    def test_import(self):
+        import json
+        import os
+        source = f'{self.directory.name}/source'
+        os.mkdir(source)
+        with open(f'{source}/acme.csv', 'w', encoding='utf-8') as f:
+            f.write("Model;Throw Ratio;H Shift (%);V Shift (%);Notes\n"
+                    "ZL-1;1,45-1,8:1;±10;-5 to +60;Zoom\n"
+                    "ZL-2;;±10;±50;\n"
+                    "ZL-3;2.0:1;;;\n")
+        with open(f'{source}/bolt.json', 'w', encoding='utf-8') as f:
+            json.dump({'B1': {'specs': {'throw_ratio': '0.8:1', 'lens_shift': {'h_shift_range': [-5, 5],
+                                                                                 'v_shift_range': [0, 0]}}},
+                       'B2': {'specs': {}}}, f)
+        db = self.database.LensDatabase(f'{self.directory.name}/database')
+        report = self.importer.import_paths(db, [source])
+        self.assertEqual(report.imported, {'Acme': 2, 'Bolt': 1})
+        self.assertEqual([(error.file, error.line, error.model) for error in report.errors],
+                         [('acme.csv', 3, 'ZL-2'), ('bolt.json', None, 'B2')])
+        # The valid rows are committed.
+        db = self.database.LensDatabase(f'{self.directory.name}/database')
+        self.assertEqual(db.get_models('Acme'), ['ZL-1', 'ZL-3'])
+        self.assertEqual(db.get_throw_ratio_limits('Acme', 'ZL-1'), (1.45, 1.8))
+        self.assertEqual(db.get_lens_shift_limits('Acme', 'ZL-1', is_horizontal=False), (-5.0, 60.0))
+        self.assertEqual(db.get_lens_shift_limits('Acme', 'ZL-3', is_horizontal=True), (0.0, 0.0))
+
+    def test_import_manufacturer_case(self):
+        database = f'{self.directory.name}/database'
+        db = self.database.LensDatabase(database)
+        db.add_lens_models('Acme', {'ZL-1': self.importer.make_profile((1.5, 1.5), (0, 0), (0, 0))})
+        with open(f'{self.directory.name}/lenses.csv', 'w', encoding='utf-8') as f:
+            f.write("Manufacturer,Model,Throw Ratio\n"
+                    "ACME,ZL-2,2.0:1\n")
+        report = self.importer.import_paths(db, [f'{self.directory.name}/lenses.csv'])
+        self.assertEqual(report.imported, {'Acme': 1})
+        # The lenses already in the catalogue are kept.
+        db = self.database.LensDatabase(database)
+        self.assertEqual(db.get_manufacturers(), ['Acme'])
+        self.assertEqual(db.get_models('Acme'), ['ZL-1', 'ZL-2'])
+
+
+class TestLensSearch(unittest.TestCase):
+    def setUp(self):
+        import importlib
+        import json
+        import tempfile
+        self.database = importlib.import_module('Projectors.lens_management.database')
+        self.search = importlib.import_module('Projectors.lens_management.search')
+        self.directory = tempfile.TemporaryDirectory()
+        lenses = {'acme': {'EB-L1500': 'Standard zoom', 'ELPLX02': 'Ultra short throw'},
+                  'bolt': {'BX-200': 'Long zoom'}}
+        for name, models in lenses.items():
+            with open(f'{self.directory.name}/{name}.json', 'w', encoding='utf-8') as f:
+                json.dump({model: {'specs': {'throw_ratio': 1.5, 'notes': notes}} for model, notes in models.items()}, f)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_search(self):
+        db = self.database.LensDatabase(self.directory.name)
+        index = self.search.SearchIndex()
+        index.sync(db)
+
+        def first(query):
+            return index.search(query)[0][:2]
+        self.assertEqual(first('ebl15'), ('Acme', 'EB-L1500'))
+        self.assertEqual(first('EB-L'), ('Acme', 'EB-L1500'))
+        # A typo
+        self.assertEqual(first('elplz02'), ('Acme', 'ELPLX02'))
+        # Notes
+        self.assertEqual(first('ultra short'), ('Acme', 'ELPLX02'))
+        self.assertEqual(index.search('qqqq'), [])
+
+        # Edits are indexed per manufacturer.
+        db.rename_lens_model('Bolt', 'BX-200', 'BX-300')
+        index.sync(db)
+        self.assertEqual(first('bx300'), ('Bolt', 'BX-300'))
+        self.assertNotIn(('Bolt', 'BX-200'), [result[:2] for result in index.search('bx200')])
+        db.delete_manufacturer('Bolt')
+        index.sync(db)
+        self.assertEqual(len(index), 2)
+
+
+class TestBodyCatalogue(unittest.TestCase):
+    def setUp(self):
+        import importlib
+        import json
+        import tempfile
+        self.bodies = importlib.import_module('Projectors.lens_management.bodies')
+        self.directory = tempfile.TemporaryDirectory()
+        with open(f'{self.directory.name}/acme.json', 'w', encoding='utf-8') as f:
+            json.dump({'P1': {'lumens': 7000, 'resolution': '1920x1200', 'lenses': {'acme': ['L1', 'L2']}},
+                       'P2': {'lumens': 12000, 'resolution': [4096, 2160], 'lenses': {'Acme': ['L2'], 'Bolt': ['B1']}}}, f)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_index(self):
+        catalogue = self.bodies.BodyCatalogue(self.directory.name)
+        self.assertEqual([body.model for body in catalogue.get_bodies()], ['P1', 'P2'])
+        self.assertEqual(catalogue.compatible_manufacturers('Acme/P2'), {'Acme', 'Bolt'})
+        self.assertEqual(catalogue.compatible_models('Acme/P1', 'Acme'), {'L1', 'L2'})
+        self.assertEqual(catalogue.compatible_models('Acme/P1', 'Bolt'), set())
+        # No body, no filter.
+        self.assertIsNone(catalogue.compatible_models('NONE', 'Bolt'))
+        self.assertTrue(catalogue.fits('NONE', 'Bolt', 'B2'))
+        self.assertFalse(catalogue.fits('Acme/P1', 'Bolt', 'B1'))
+        self.assertEqual([body.model for body in catalogue.bodies_for_lens('Acme', 'L2')], ['P1', 'P2'])
+        self.assertEqual(self.bodies.parse_resolution(catalogue.get_body('Acme/P2').resolution), (4096, 2160))
+
+    def test_reload_changed(self):
+        import json
+        import os
+        catalogue = self.bodies.BodyCatalogue(self.directory.name)
+        generation = catalogue.generation
+        catalogue.get_bodies()
+        self.assertFalse(catalogue.reload_changed())
+        path = f'{self.directory.name}/bolt.json'
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'Q1': {'lumens': 5000, 'lenses': {'Bolt': ['B1']}}}, f)
+        self.assertTrue(catalogue.reload_changed())
+        self.assertGreater(catalogue.generation, generation)
+        self.assertEqual(len(catalogue.bodies_for_lens('Bolt', 'B1')), 2)
+        os.remove(path)
+        self.assertTrue(catalogue.reload_changed())
+        self.assertEqual(len(catalogue.bodies_for_lens('Bolt', 'B1')), 1)
+
+
+class TestSQLiteLensDatabase(unittest.TestCase):
+    def setUp(self):
+        import importlib
+        import tempfile
+        self.database = importlib.import_module('Projectors.lens_management.database')
+        self.directory = tempfile.TemporaryDirectory()
+        self.db = self.database.open_database(f'{self.directory.name}/lenses.sqlite')
+
+    def tearDown(self):
+        self.db.close()
+        self.directory.cleanup()
+
+    def test_edit(self):
+        self.assertTrue(self.db.add_manufacturer('Acme'))
+        self.assertTrue(self.db.add_lens_model('Acme', 'Z1', {'throw_min': 1.2, 'throw_max': 1.8, 'notes': 'Zoom lens'}))
+        self.assertFalse(self.db.add_lens_model('Acme', 'Z1', {}))
+        self.assertTrue(self.db.update_lens_model('Acme', 'Z1', {'v_shift_min': -20, 'v_shift_max': 20}))
+        self.assertEqual(self.db.get_lens_shift_limits('Acme', 'Z1', is_horizontal=False), (-20, 20))
+        self.assertTrue(self.db.rename_manufacturer('Acme', 'Bolt'))
+        self.assertEqual(self.db.get_models('Bolt'), ['Z1'])
+        self.assertEqual(self.db.find_lenses(1.5, 0, 10), [('Bolt', 'Z1')])
+        self.assertEqual(self.db.search('zoo'), [('Bolt', 'Z1')])
+        self.assertTrue(self.db.delete_lens_model('Bolt', 'Z1'))
+        self.assertEqual(self.db.search('zoo'), [])
+
+    def test_json(self):
+        self.db.import_lens_database(self.database.lens_db)
+        self.assertEqual(self.db.get_manufacturers(), self.database.lens_db.get_manufacturers())
+        path = f'{self.directory.name}/epson.json'
+        self.assertTrue(self.db.export_database(path, 'Epson')[0])
+        self.assertTrue(self.db.delete_manufacturer('Epson'))
+        self.assertTrue(self.db.import_database(path)[0])
+        self.assertEqual(self.db.get_models('Epson'), self.database.lens_db.get_models('Epson'))
+
+
 def run_tests():
     testLoader = unittest.TestLoader()
     testLoader.testMethodPrefix = "test"
@@ -1,4 +1,5 @@
-from .helper import get_projectors
+from . import handles
+from .helper import get_active_projector, get_projectors
 from .projector import RESOLUTIONS, Textures
 
 import bpy
@@ -29,13 +30,17 @@ class PROJECTOR_PT_projector_settings(Panel):
             box.operator('projector.switch_to_cycles')
 
         selected_projectors = get_projectors(context, only_selected=True)
-        if len(selected_projectors) == 1:
-            projector = selected_projectors[0]
+        projector = get_active_projector(context)
+        if projector:
             proj_settings = projector.proj_settings
 
             layout.separator()
 
             layout.label(text='Projector Settings:')
+            # 여러 프로젝터 선택 시: 활성 프로젝터의 변경을 모든 선택된 프로젝터에 적용
+            if len(selected_projectors) > 1:
+                layout.prop(context.scene, 'proj_edit_selected',
+                            text=f'Edit All Selected ({len(selected_projectors)})')
             box = layout.box()
             
             # 렌즈 제한 확인
@@ -65,11 +70,16 @@ class PROJECTOR_PT_projector_settings(Panel):
             row.prop(proj_settings, 'throw_ratio')
             
             box.prop(proj_settings, 'power', text='Power')
+            box.prop(proj_settings, 'lumens', text='Lumens')
             
             # 해상도 설정
             res_row = box.row()
             res_row.prop(proj_settings, 'resolution',
                         text='Resolution', icon='PRESET')
+            if proj_settings.resolution == 'custom':
+                col = box.column(align=True)
+                col.prop(proj_settings, 'custom_width')
+                col.prop(proj_settings, 'custom_height')
             
             # 해상도 자동 감지 옵션
             box.prop(proj_settings, 'use_custom_texture_res', 
@@ -86,13 +96,17 @@ class PROJECTOR_PT_projector_settings(Panel):
                 
             # 픽셀 그리드 옵션
             box.prop(proj_settings, 'show_pixel_grid')
+            box.prop(proj_settings, 'edge_blend')
+            box.prop(proj_settings, 'simulate_lens')
 
             # 텍스처 설정 섹션
             box = layout.box()
             box.label(text="Texture Settings")
             # 이미지 텍스처 선택
-            node = projector.children[0].data.node_tree.nodes['Image Texture']
-            box.template_image(node, 'image', node.image_user, compact=False)
+            rig = handles.get(projector, allow_repair=False)
+            if rig:
+                node = rig.image
+                box.template_image(node, 'image', node.image_user, compact=False)
 
             # 렌즈 정보 표시
             if hasattr(projector, "lens_manager") and projector.lens_manager.has_lens_selected:
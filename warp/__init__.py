@@ -0,0 +1,31 @@
+"""
+Warp grids for projection onto curved or uneven screens.
+
+The interpolation and baking (grid) only need NumPy and can be used without Blender; the
+settings, the warp map images, the operators and the panel are loaded when bpy is
+available.
+"""
+try:
+    import bpy
+except ImportError:
+    bpy = None
+
+if bpy is not None:
+    from . import properties
+    from . import operators
+    from . import texture
+    from . import panel
+
+
+def register():
+    properties.register()
+    operators.register()
+    texture.register()
+    panel.register()
+
+
+def unregister():
+    panel.unregister()
+    texture.unregister()
+    operators.unregister()
+    properties.unregister()
@@ -0,0 +1,115 @@
+"""
+Warp grids: a rows x columns grid of control points over the projected image for curved or
+uneven screens, interpolated into a smooth displacement of every pixel.
+
+The control points lie on a regular lattice in the texture coordinates of the projector,
+row 0 at the bottom (v = 0) and column 0 on the left (u = 0). Every point has an offset
+(du, dv): the image content at that point moves by it. Between the points the offsets are
+interpolated with a uniform cubic spline:
+    CATMULL_ROM  passes through every control point
+    BEZIER       the cubic B-spline, the smooth curve of joined cubic Bezier segments
+                 that is pulled towards the control points
+Outside the grid the first and last points are extrapolated linearly, so both splines
+pass through the points on the border.
+
+Both splines are separable, the displacement of the pixels is Wy @ offsets @ Wx.T with a
+weight matrix per axis. A control point only weighs on the four grid cells (tiles) on
+either side of it, so WarpBaker re-bakes only the pixel rectangle of the tiles around the
+points that changed.
+"""
+import numpy as np
+
+CATMULL_ROM = 'CATMULL_ROM'
+BEZIER = 'BEZIER'
+
+# Coefficients of the weights of the four control points around a segment in powers of t.
+BASIS = {
+    CATMULL_ROM: np.array(((0, 2, 0, 0), (-1, 0, 1, 0), (2, -5, 4, -1), (-1, 3, -3, 1)), dtype=np.float64) / 2,
+    BEZIER: np.array(((1, 4, 1, 0), (-3, 0, 3, 0), (3, -6, 3, 0), (-1, 3, -3, 1)), dtype=np.float64) / 6,
+}
+
+
+def pixel_centers(count):
+    """ Texture coordinates of the centers of count pixels. """
+    return (np.arange(count) + 0.5) / count
+
+
+def weight_matrix(positions, count, method=CATMULL_ROM):
+    """
+    (len(positions), count) weights of count control points, evenly spaced from 0 to 1, at
+    positions in [0, 1]. Every row has at most four weights that aren't 0.
+    """
+    positions = np.asarray(positions, dtype=np.float64)
+    scaled = np.clip(positions, 0, 1) * (count - 1)
+    segment = np.minimum(scaled.astype(np.int64), count - 2)
+    t = (scaled - segment)[:, np.newaxis]
+    weights = np.concatenate((np.ones_like(t), t, t * t, t * t * t), axis=1) @ BASIS[method]
+
+    # Weights of the control points with one extrapolated point at either end ...
+    padded = np.zeros((len(positions), count + 2))
+    padded[np.arange(len(positions))[:, np.newaxis], segment[:, np.newaxis] + np.arange(4)] = weights
+    # ... folded back onto the control points: p[-1] = 2 p[0] - p[1], p[count] = 2 p[-1] - p[-2].
+    extend = np.zeros((count + 2, count))
+    extend[1:-1] = np.eye(count)
+    extend[0, :2] = (2, -1)
+    extend[-1, -2:] = (-1, 2)
+    return padded @ extend
+
+
+def resample(offsets, rows, columns, method=CATMULL_ROM):
+    """ Offsets of a grid of rows x columns points that follow the warp of offsets (R, C, 2). """
+    offsets = np.asarray(offsets, dtype=np.float64)
+    wy = weight_matrix(np.linspace(0, 1, rows), offsets.shape[0], method)
+    wx = weight_matrix(np.linspace(0, 1, columns), offsets.shape[1], method)
+    return np.einsum('yr,rcd,xc->yxd', wy, offsets, wx)
+
+
+class WarpBaker:
+    """
+    Displacement texture of a warp grid as a (height, width, 4) float32 array, in the layout
+    of Blender image pixels. R and G hold the displacement of the texture coordinates to
+    sample the image with, the opposite of the offsets.
+    """
+
+    def __init__(self, width, height, rows, columns, method=CATMULL_ROM):
+        self.key = (width, height, rows, columns, method)
+        self.wy = weight_matrix(pixel_centers(height), rows, method)
+        self.wx = weight_matrix(pixel_centers(width), columns, method)
+        # Pixel rows and columns every control point weighs on, [start, stop).
+        self.y_ranges = self._ranges(self.wy)
+        self.x_ranges = self._ranges(self.wx)
+        self.offsets = np.zeros((rows, columns, 2))
+        self.pixels = np.zeros((height, width, 4), dtype=np.float32)
+        self.pixels[..., 3] = 1
+
+    @staticmethod
+    def _ranges(weights):
+        nonzero = weights != 0
+        start = np.argmax(nonzero, axis=0)
+        stop = len(weights) - np.argmax(nonzero[::-1], axis=0)
+        return np.stack((start, stop), axis=-1)
+
+    def _bake(self, y0, y1, x0, x1):
+        wy, wx = self.wy[y0:y1], self.wx[x0:x1]
+        for channel in range(2):
+            self.pixels[y0:y1, x0:x1, channel] = -(wy @ self.offsets[..., channel] @ wx.T)
+
+    def bake(self, offsets):
+        """ Bake all pixels for offsets (rows, columns, 2). """
+        self.offsets = np.array(offsets, dtype=np.float64).reshape(self.offsets.shape)
+        self._bake(0, self.pixels.shape[0], 0, self.pixels.shape[1])
+
+    def update(self, offsets):
+        """
+        Re-bake the tiles around the control points whose offsets changed. Returns the
+        re-baked pixel rectangle (y0, y1, x0, x1), None if nothing changed.
+        """
+        offsets = np.asarray(offsets, dtype=np.float64).reshape(self.offsets.shape)
+        rows, columns = np.nonzero((offsets != self.offsets).any(axis=-1))
+        if not len(rows):
+            return None
+        self.offsets = offsets.copy()
+        y0, y1 = self.y_ranges[rows, 0].min(), self.y_ranges[rows, 1].max()
+        x0, x1 = self.x_ranges[columns, 0].min(), self.x_ranges[columns, 1].max()
+        self._bake(y0, y1, x0, x1)
+        return int(y0), int(y1), int(x0), int(x1)
@@ -0,0 +1,59 @@
+import bpy
+from bpy.types import Operator
+
+from ..helper import get_projector
+from .properties import update_warp
+
+
+class PROJECTOR_OT_warp_reset(Operator):
+    """Move all control points of the warp grid of the selected projector back to their place"""
+    bl_idname = 'projector.warp_reset'
+    bl_label = 'Reset Warp Grid'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        return bool(get_projector(context))
+
+    def execute(self, context):
+        warp_grid = get_projector(context).warp_grid
+        warp_grid.set_offsets(warp_grid.offsets() * 0)
+        update_warp(warp_grid, context)
+        return {'FINISHED'}
+
+
+class PROJECTOR_OT_warp_select_point(Operator):
+    """Edit the next control point of the warp grid"""
+    bl_idname = 'projector.warp_select_point'
+    bl_label = 'Select Control Point'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    row: bpy.props.IntProperty(name="Rows", description="Rows to move up", default=0)
+    column: bpy.props.IntProperty(name="Columns", description="Columns to move right", default=0)
+
+    @classmethod
+    def poll(cls, context):
+        return bool(get_projector(context))
+
+    def execute(self, context):
+        warp_grid = get_projector(context).warp_grid
+        row, column = warp_grid.active_point()
+        warp_grid.active_row = max(0, min(row + self.row, warp_grid.rows - 1))
+        warp_grid.active_column = max(0, min(column + self.column, warp_grid.columns - 1))
+        return {'FINISHED'}
+
+
+classes = (
+    PROJECTOR_OT_warp_reset,
+    PROJECTOR_OT_warp_select_point,
+)
+
+
+def register():
+    for cls in classes:
+        bpy.utils.register_class(cls)
+
+
+def unregister():
+    for cls in reversed(classes):
+        bpy.utils.unregister_class(cls)
@@ -0,0 +1,54 @@
+import bpy
+from bpy.types import Panel
+
+from ..helper import get_projector
+
+
+class PROJECTOR_PT_warp(Panel):
+    bl_label = "Warp Grid"
+    bl_idname = "PROJECTOR_PT_warp"
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_category = "Projector"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    @classmethod
+    def poll(cls, context):
+        return bool(get_projector(context))
+
+    def draw_header(self, context):
+        self.layout.prop(get_projector(context).warp_grid, 'enabled', text="")
+
+    def draw(self, context):
+        layout = self.layout
+        layout.use_property_split = True
+        layout.use_property_decorate = False
+        warp_grid = get_projector(context).warp_grid
+        layout.active = warp_grid.enabled
+
+        col = layout.column(align=True)
+        col.prop(warp_grid, 'rows')
+        col.prop(warp_grid, 'columns')
+        layout.prop(warp_grid, 'interpolation')
+
+        row, column = warp_grid.active_point()
+        layout.label(text=f'Control Point: Row {row}, Column {column}')
+        # Arrows step through the control points, like moving a cursor over the grid.
+        grid_row = layout.row(align=True)
+        for icon, step in (('TRIA_LEFT', (0, -1)), ('TRIA_DOWN', (-1, 0)),
+                           ('TRIA_UP', (1, 0)), ('TRIA_RIGHT', (0, 1))):
+            op = grid_row.operator('projector.warp_select_point', text="", icon=icon)
+            op.row, op.column = step
+        col = layout.column(align=True)
+        col.prop(warp_grid, 'active_row')
+        col.prop(warp_grid, 'active_column')
+        layout.prop(warp_grid, 'offset')
+        layout.operator('projector.warp_reset', icon='LOOP_BACK')
+
+
+def register():
+    bpy.utils.register_class(PROJECTOR_PT_warp)
+
+
+def unregister():
+    bpy.utils.unregister_class(PROJECTOR_PT_warp)
@@ -0,0 +1,109 @@
+import bpy
+import numpy as np
+from bpy.props import BoolProperty, EnumProperty, FloatVectorProperty, IntProperty, PointerProperty
+
+from .. import scheduler
+from . import grid, texture
+
+# Largest number of control points per side.
+MAX_POINTS = 33
+
+
+def update_enabled(warp_grid, context):
+    """ Adding or removing the warp from the texture vector changes the links of the node tree. """
+    scheduler.mark(warp_grid.id_data, scheduler.LINKS)
+
+
+def update_size(warp_grid, context):
+    """ Resample the offsets to the new number of rows and columns, keeping the warp. """
+    rows, columns = warp_grid.get('shape', (warp_grid.rows, warp_grid.columns))
+    offsets = warp_grid.offsets((rows, columns))
+    warp_grid.set_offsets(grid.resample(offsets, warp_grid.rows, warp_grid.columns, warp_grid.interpolation))
+    update_warp(warp_grid, context)
+
+
+def update_warp(warp_grid, context):
+    if warp_grid.enabled:
+        texture.bake(warp_grid.id_data)
+
+
+def get_offset(warp_grid):
+    row, column = warp_grid.active_point()
+    return warp_grid.offsets()[row, column].tolist()
+
+
+def set_offset(warp_grid, value):
+    offsets = warp_grid.offsets()
+    offsets[warp_grid.active_point()] = value
+    warp_grid.set_offsets(offsets)
+    # Only the tiles around the active point are baked again.
+    update_warp(warp_grid, bpy.context)
+
+
+class WarpGridSettings(bpy.types.PropertyGroup):
+    """
+    Warp grid of a projector. Stored on the projector object, the offsets of the control
+    points in one flat ID property array of rows x columns x (du, dv).
+    """
+    enabled: BoolProperty(
+        name="Warp Grid",
+        description="Warp the projected image with a grid of control points",
+        default=False,
+        update=update_enabled)
+    rows: IntProperty(
+        name="Rows",
+        description="Number of control points from the bottom to the top of the image",
+        default=5, min=2, max=MAX_POINTS,
+        update=update_size)
+    columns: IntProperty(
+        name="Columns",
+        description="Number of control points from the left to the right of the image",
+        default=5, min=2, max=MAX_POINTS,
+        update=update_size)
+    interpolation: EnumProperty(
+        name="Interpolation",
+        items=[(grid.CATMULL_ROM, 'Catmull-Rom', 'Smooth curves through every control point'),
+               (grid.BEZIER, 'Bezier', 'Smoother curves of joined cubic Bezier segments, '
+                                       'pulled towards the control points')],
+        default=grid.CATMULL_ROM,
+        update=update_warp)
+    active_row: IntProperty(
+        name="Row",
+        description="Row of the control point to edit, 0 is the bottom of the image",
+        default=0, min=0, max=MAX_POINTS - 1)
+    active_column: IntProperty(
+        name="Column",
+        description="Column of the control point to edit, 0 is the left of the image",
+        default=0, min=0, max=MAX_POINTS - 1)
+    offset: FloatVectorProperty(
+        name="Offset",
+        description="Offset of the control point to edit, as a fraction of the image width and height",
+        size=2, step=0.1, precision=4, subtype='XYZ',
+        get=get_offset, set=set_offset)
+
+    def active_point(self):
+        """ (row, column) of the control point to edit, within the grid. """
+        return min(self.active_row, self.rows - 1), min(self.active_column, self.columns - 1)
+
+    def offsets(self, shape=None):
+        """ Offsets of the control points as a (rows, columns, 2) array, zero if there are none yet. """
+        rows, columns = shape or (self.rows, self.columns)
+        values = self.get('offsets')
+        if values is None or len(values) != rows * columns * 2:
+            return np.zeros((rows, columns, 2))
+        return np.array(values, dtype=np.float64).reshape(rows, columns, 2)
+
+    def set_offsets(self, offsets):
+        offsets = np.asarray(offsets, dtype=np.float64)
+        self['offsets'] = offsets.ravel().tolist()
+        self['shape'] = offsets.shape[:2]
+
+
+def register():
+    bpy.utils.register_class(WarpGridSettings)
+    bpy.types.Object.warp_grid = PointerProperty(type=WarpGridSettings)
+
+
+def unregister():
+    del bpy.types.Object.warp_grid
+    bpy.utils.unregister_class(WarpGridSettings)
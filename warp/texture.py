@@ -0,0 +1,88 @@
+"""
+Warp map images in the node trees of the projectors.
+
+The displacement of the warp grid of a projector (see grid.py) is baked into one float
+image per projector, which the node tree samples once and adds to the texture vector. A
+WarpBaker is kept per projector, so moving a control point only computes the tiles around
+it before the pixels are written with a single foreach_set.
+"""
+import bpy
+
+from .. import handles, images
+from ..projector import projector_resolution
+from . import grid
+
+# Longest side of a warp map in pixels. The displacement is smooth, the linear
+# interpolation between the pixels is far below a projector pixel even at 4K, and every
+# edit uploads the whole image to the GPU.
+WARP_MAP_SIZE = 1024
+
+# projector.as_pointer() -> WarpBaker
+_bakers = {}
+
+
+def map_size(projector):
+    """ (width, height) of the warp map of a projector, in its aspect ratio. """
+    width, height = projector_resolution(projector)
+    scale = min(1.0, WARP_MAP_SIZE / max(width, height))
+    return max(2, int(round(width * scale))), max(2, int(round(height * scale)))
+
+
+def warp_image(node, name, width, height):
+    """ Return the image of the warp map node, created or replaced at width x height as needed. """
+    image = node.image
+    if image is not None and tuple(image.size) != (width, height):
+        bpy.data.images.remove(image)
+        image = None
+    if image is None:
+        image = bpy.data.images.new(name, width, height, alpha=True, float_buffer=True)
+        image.colorspace_settings.name = 'Non-Color'
+        node.image = image
+    return images.mark(image)
+
+
+def bake(projector, rig=None):
+    """
+    Bring the warp map of a projector up to date with its warp grid. After the first bake
+    only the tiles around the control points that changed are computed again.
+    Returns the re-baked pixel region (y0, y1, x0, x1) or None if nothing changed.
+    """
+    rig = rig or handles.get(projector)
+    if not rig or not rig.warp_map:
+        return None
+    warp_grid = projector.warp_grid
+    width, height = map_size(projector)
+    key = (width, height, warp_grid.rows, warp_grid.columns, warp_grid.interpolation)
+    image = rig.warp_map.image
+
+    baker = _bakers.get(projector.as_pointer())
+    if baker is None or baker.key != key or image is None or tuple(image.size) != (width, height):
+        baker = grid.WarpBaker(*key)
+        baker.bake(warp_grid.offsets())
+        _bakers[projector.as_pointer()] = baker
+        region = (0, height, 0, width)
+    else:
+        region = baker.update(warp_grid.offsets())
+        if region is None:
+            return None
+
+    image = warp_image(rig.warp_map, f'{projector.name} Warp', width, height)
+    image.pixels.foreach_set(baker.pixels.ravel())
+    image.update()
+    return region
+
+
+@bpy.app.handlers.persistent
+def clear_bakers(*_):
+    """ The pointers of the projectors of another file mean nothing. """
+    _bakers.clear()
+
+
+def register():
+    bpy.app.handlers.load_post.append(clear_bakers)
+
+
+def unregister():
+    if clear_bakers in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(clear_bakers)
+    _bakers.clear()